@@ -0,0 +1,192 @@
+"""
+Headless HTTP service for ingest / list / delete / search / answer.
+
+Run (one set of models and clients per worker process; workers share nothing but
+Qdrant and Mem0, so any number of them can sit behind a load balancer):
+    uvicorn api:app --host 0.0.0.0 --port 8000 --workers 4
+
+Streaming endpoints return newline-delimited JSON (application/x-ndjson).
+"""
+import json
+import queue
+import threading
+from collections import OrderedDict
+from contextlib import asynccontextmanager
+from typing import List, Optional
+
+from dotenv import load_dotenv
+from fastapi import FastAPI, File, HTTPException, Request, UploadFile
+from fastapi.responses import StreamingResponse
+from pydantic import BaseModel
+from starlette.concurrency import run_in_threadpool
+
+from src import tracing
+from src.prompt_builder import ConversationWindow
+from src.rag_service import MODES
+from src.resources import get_rag_service
+
+load_dotenv()
+
+MAX_SESSIONS = 1024
+
+
+class SearchRequest(BaseModel):
+    question: str
+    filename: Optional[str] = None
+    limit: int = 5
+
+
+class Message(BaseModel):
+    role: str
+    content: str
+
+
+class AnswerRequest(BaseModel):
+    question: str
+    messages: List[Message] = []
+    mode: str = "hybrid"
+    filename: Optional[str] = None
+    session_id: Optional[str] = None
+
+
+class SessionWindows:
+    """
+    ConversationWindow per (user, session), least recently used evicted first.
+    A session that lands on another worker simply starts a new rolling summary.
+    """
+
+    def __init__(self, max_sessions: int = MAX_SESSIONS):
+        self.max_sessions = max_sessions
+        self._windows = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, user_id: str, session_id: Optional[str]):
+        if not session_id:
+            return ConversationWindow()
+        key = (user_id, session_id)
+        with self._lock:
+            window = self._windows.pop(key, None) or ConversationWindow()
+            self._windows[key] = window
+            while len(self._windows) > self.max_sessions:
+                self._windows.popitem(last=False)
+            return window
+
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    # models, Qdrant client and caches load once per worker, before the first request
+    app.state.service = await run_in_threadpool(get_rag_service)
+    app.state.windows = SessionWindows()
+    yield
+
+
+app = FastAPI(title="GFG RAG service", lifespan=lifespan)
+
+
+def _ndjson(event: dict) -> bytes:
+    return (json.dumps(event, default=str) + "\n").encode("utf-8")
+
+
+@app.get("/health")
+async def health():
+    return {"status": "ok"}
+
+
+@app.get("/users/{user_id}/documents")
+async def list_documents(user_id: str, request: Request):
+    # doc_id, filename, chunks, pages, bytes, ingested_at per document
+    return await run_in_threadpool(request.app.state.service.documents, user_id)
+
+
+# :path so filenames containing "/" (sent encoded as %2F) still reach the handler
+@app.delete("/users/{user_id}/documents/{filename:path}")
+async def delete_document(user_id: str, filename: str, request: Request):
+    await run_in_threadpool(request.app.state.service.delete, user_id, filename)
+    return {"deleted": filename}
+
+
+@app.post("/users/{user_id}/documents")
+async def ingest_document(user_id: str, request: Request, file: UploadFile = File(...)):
+    """
+    Streams {"type": "progress", ...} events while pages are embedded, then
+    {"type": "done", ...summary} (or {"type": "error"}).
+    """
+    service = request.app.state.service
+    data = await file.read()
+    events = queue.Queue()
+
+    def run():
+        try:
+            summary = service.ingest(
+                user_id, file.filename, data,
+                progress=lambda chunks, page, pages: events.put(
+                    {"type": "progress", "chunks": chunks, "page": page, "pages": pages}
+                ),
+            )
+            events.put({"type": "done", **summary})
+        except Exception as e:
+            print(f"Ingest of {file.filename} failed: {e}")
+            events.put({"type": "error", "detail": str(e)})
+
+    threading.Thread(target=run, name="ingest", daemon=True).start()
+
+    def stream():
+        while True:
+            event = events.get()
+            yield _ndjson(event)
+            if event["type"] in ("done", "error"):
+                return
+
+    return StreamingResponse(stream(), media_type="application/x-ndjson")
+
+
+@app.post("/users/{user_id}/search")
+async def search_documents(user_id: str, body: SearchRequest, request: Request):
+    return await run_in_threadpool(
+        request.app.state.service.search, user_id, body.question, body.filename, body.limit
+    )
+
+
+@app.post("/users/{user_id}/answer")
+async def answer(user_id: str, body: AnswerRequest, request: Request):
+    """
+    Streams {"type": "retrieval", ...} once the lookups finish, then
+    {"type": "delta", "text"} per generated piece and finally
+    {"type": "done", "stats", "spans"}, or {"type": "error", "detail"} if generation
+    fails part-way.
+    """
+    if body.mode not in MODES:
+        raise HTTPException(status_code=422, detail=f"mode must be one of {sorted(MODES)}")
+    service = request.app.state.service
+    window = request.app.state.windows.get(user_id, body.session_id)
+    messages = [m.model_dump() for m in body.messages] or [{"role": "user", "content": body.question}]
+
+    def turn():
+        spans = tracing.start_turn()
+        stats = {}
+        retrieval, answer_stream = service.answer(
+            user_id, body.question, messages=messages, mode=body.mode, filename=body.filename,
+            window=window, stats=stats, session_id=body.session_id,
+        )
+        return spans, stats, retrieval, answer_stream
+
+    spans, stats, retrieval, answer_stream = await run_in_threadpool(turn)
+
+    def stream():
+        yield _ndjson({"type": "retrieval", **retrieval})
+        # each step runs in a fresh worker-thread context, so re-attach the turn's spans
+        while True:
+            tracing.start_turn(spans)
+            try:
+                delta = next(answer_stream, None)
+            except Exception as e:
+                # the 200 status is already sent; tell the client instead of cutting the body short
+                print(f"Answer for user {user_id} failed: {e}")
+                yield _ndjson({"type": "error", "detail": str(e)})
+                return
+            if delta is None:
+                break
+            yield _ndjson({"type": "delta", "text": delta})
+        yield _ndjson({"type": "done", "stats": stats, "spans": spans})
+
+    return StreamingResponse(stream(), media_type="application/x-ndjson")
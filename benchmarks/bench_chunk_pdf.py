@@ -0,0 +1,55 @@
+"""
+Benchmark sequential vs process-pool page extraction in chunk_pdf.
+
+Every worker count runs on a freshly started pool of exactly that size; the best of
+--repeat runs is reported, so the first run's process start-up is left out.
+
+Usage:
+    python -m benchmarks.bench_chunk_pdf [--workers 1 2 4 8] [--repeat 3]
+"""
+import argparse
+import glob
+import os
+import time
+
+from pipeline.chunk_pdf import chunk_pdf, shutdown_extraction_pools
+
+
+def time_chunk_pdf(path, workers, repeat):
+    best = float("inf")
+    docs = None
+    shutdown_extraction_pools()
+    for _ in range(repeat):
+        with open(path, "rb") as f:
+            start = time.perf_counter()
+            docs = chunk_pdf(f, workers=workers)
+            best = min(best, time.perf_counter() - start)
+    shutdown_extraction_pools()
+    return best, docs
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--data", default="data")
+    parser.add_argument("--workers", type=int, nargs="+", default=[1, 2, 4, os.cpu_count() or 1])
+    parser.add_argument("--repeat", type=int, default=3)
+    args = parser.parse_args()
+
+    workers_list = sorted(set(args.workers))
+    for path in sorted(glob.glob(os.path.join(args.data, "*.pdf"))):
+        print(f"\n{os.path.basename(path)}")
+        print(f"{'workers':>8} {'seconds':>9} {'speedup':>8} {'chunks':>7} {'same':>5}")
+        baseline_time, baseline_docs = time_chunk_pdf(path, 1, args.repeat)
+        for workers in workers_list:
+            if workers == 1:
+                elapsed, docs = baseline_time, baseline_docs
+            else:
+                elapsed, docs = time_chunk_pdf(path, workers, args.repeat)
+            print(
+                f"{workers:>8} {elapsed:>9.3f} {baseline_time / elapsed:>7.2f}x "
+                f"{len(docs):>7} {str(docs == baseline_docs):>5}"
+            )
+
+
+if __name__ == "__main__":
+    main()
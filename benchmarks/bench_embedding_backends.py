@@ -0,0 +1,72 @@
+"""
+Compare EmbeddingManager backends (torch, onnx, onnx-int8) on chunks from data/.
+
+Reports texts/sec per backend and cosine agreement with the torch vectors, so the
+ingest path can be switched to the fastest backend that still agrees closely.
+
+Usage:
+    python -m benchmarks.bench_embedding_backends [--batch-size 32] [--threads 4] [--limit 512]
+"""
+import argparse
+import glob
+import os
+import time
+
+import numpy as np
+
+from pipeline.chunk_pdf import chunk_pdf
+from src.embeddings import EmbeddingManager, BACKENDS
+
+
+def load_texts(data_dir, limit):
+    texts = []
+    for path in sorted(glob.glob(os.path.join(data_dir, "*.pdf"))):
+        with open(path, "rb") as f:
+            texts.extend(c["text"] for c in chunk_pdf(f))
+    return texts[:limit]
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--data", default="data")
+    parser.add_argument("--backends", nargs="+", default=list(BACKENDS))
+    parser.add_argument("--batch-size", type=int, default=32)
+    parser.add_argument("--threads", type=int, default=None)
+    parser.add_argument("--limit", type=int, default=512)
+    parser.add_argument("--repeat", type=int, default=3)
+    args = parser.parse_args()
+
+    texts = load_texts(args.data, args.limit)
+    print(f"{len(texts)} texts, batch size {args.batch_size}, threads {args.threads or 'default'}\n")
+    print(f"{'backend':>10} {'load s':>7} {'texts/s':>9} {'mean cos':>9} {'min cos':>8}")
+
+    reference = None
+    for backend in args.backends:
+        start = time.perf_counter()
+        try:
+            embedder = EmbeddingManager(backend=backend, batch_size=args.batch_size, threads=args.threads)
+            embedder.warm_up()
+        except Exception as e:
+            print(f"{backend:>10}  skipped ({e})")
+            continue
+        load_seconds = time.perf_counter() - start
+
+        best = float("inf")
+        for _ in range(args.repeat):
+            start = time.perf_counter()
+            vectors = embedder.embed_texts(texts)
+            best = min(best, time.perf_counter() - start)
+
+        if reference is None:
+            reference = vectors
+        a = reference / np.linalg.norm(reference, axis=1, keepdims=True)
+        b = vectors / np.linalg.norm(vectors, axis=1, keepdims=True)
+        cosine = np.sum(a * b, axis=1)
+        print(
+            f"{backend:>10} {load_seconds:>7.2f} {len(texts) / best:>9.1f} "
+            f"{cosine.mean():>9.5f} {cosine.min():>8.5f}"
+        )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,70 @@
+"""
+Query-embedding throughput and latency with and without the EmbeddingBatcher.
+
+C concurrent "sessions" each embed single questions back to back, once straight
+through EmbeddingManager (batch of one per call) and once through the batcher, for
+every (max_wait_ms, max_batch) setting. The embedding cache is off so every
+request reaches the model.
+
+Usage:
+    python -m benchmarks.bench_embedding_batcher [--sessions 1 8 32] [--wait-ms 1 5 10] [--max-batch 16 32]
+"""
+import argparse
+import itertools
+import threading
+import time
+
+import numpy as np
+
+from src.embedding_batcher import EmbeddingBatcher
+from src.embeddings import EmbeddingManager
+
+
+def run_load(embedder, sessions, per_session):
+    latencies = []
+    lock = threading.Lock()
+
+    def session(i):
+        local = []
+        for j in range(per_session):
+            start = time.perf_counter()
+            embedder.embed_texts([f"question {i}-{j}: what does the uploaded report say about topic {j}?"])
+            local.append(time.perf_counter() - start)
+        with lock:
+            latencies.extend(local)
+
+    threads = [threading.Thread(target=session, args=(i,)) for i in range(sessions)]
+    start = time.perf_counter()
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+    elapsed = time.perf_counter() - start
+    return len(latencies) / elapsed, np.percentile(latencies, 50) * 1000, np.percentile(latencies, 99) * 1000
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--sessions", type=int, nargs="+", default=[1, 8, 32])
+    parser.add_argument("--per-session", type=int, default=50)
+    parser.add_argument("--wait-ms", type=float, nargs="+", default=[1, 5, 10])
+    parser.add_argument("--max-batch", type=int, nargs="+", default=[16, 32])
+    args = parser.parse_args()
+
+    embedder = EmbeddingManager()
+    embedder.warm_up()
+
+    print(f"{'sessions':>8} {'wait ms':>8} {'max batch':>9} {'q/s':>8} {'p50 ms':>7} {'p99 ms':>7} {'mean batch':>10}")
+    for sessions in args.sessions:
+        qps, p50, p99 = run_load(embedder, sessions, args.per_session)
+        print(f"{sessions:>8} {'direct':>8} {'-':>9} {qps:>8.1f} {p50:>7.1f} {p99:>7.1f} {1.0:>10.1f}")
+        for wait_ms, max_batch in itertools.product(args.wait_ms, args.max_batch):
+            batcher = EmbeddingBatcher(embedder, max_wait_ms=wait_ms, max_batch=max_batch)
+            qps, p50, p99 = run_load(batcher, sessions, args.per_session)
+            stats = batcher.stats()
+            batcher.close()
+            print(f"{sessions:>8} {wait_ms:>8.1f} {max_batch:>9} {qps:>8.1f} {p50:>7.1f} {p99:>7.1f} {stats['mean_batch']:>10.1f}")
+
+
+if __name__ == "__main__":
+    main()
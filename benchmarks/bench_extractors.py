@@ -0,0 +1,64 @@
+"""
+Compare PDF text extraction backends on the data/ corpus.
+
+Reports pages/sec per backend and how closely each backend's text matches
+pdfplumber (the reference extractor) page by page.
+
+Usage:
+    python -m benchmarks.bench_extractors [--data data] [--backends pdfplumber pypdf pypdfium2 auto]
+"""
+import argparse
+import difflib
+import glob
+import os
+import time
+
+from pipeline.extractors import get_extractor, looks_garbled
+
+
+def _normalise(text):
+    return " ".join(text.split())
+
+
+def extract_all(extractor, data):
+    start = time.perf_counter()
+    pages = dict(extractor.iter_pages(data))
+    return pages, time.perf_counter() - start
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--data", default="data")
+    parser.add_argument("--backends", nargs="+", default=["pdfplumber", "pypdf", "pypdfium2", "auto"])
+    parser.add_argument("--page-timeout", type=float, default=0,
+                        help="per-page limit in seconds (0 = run in-process, no limit)")
+    args = parser.parse_args()
+
+    reference = get_extractor("pdfplumber", page_timeout=0)
+    for path in sorted(glob.glob(os.path.join(args.data, "*.pdf"))):
+        with open(path, "rb") as f:
+            data = f.read()
+        ref_pages, _ = extract_all(reference, data)
+
+        print(f"\n{os.path.basename(path)} ({len(ref_pages)} pages)")
+        print(f"{'backend':>22} {'pages/s':>9} {'similarity':>11} {'garbled':>8}")
+        for name in args.backends:
+            try:
+                extractor = get_extractor(name, page_timeout=args.page_timeout)
+                pages, elapsed = extract_all(extractor, data)
+            except ImportError as e:
+                print(f"{name:>22}  skipped ({e})")
+                continue
+            similarity = [
+                difflib.SequenceMatcher(None, _normalise(ref_pages[p]), _normalise(pages.get(p, ""))).ratio()
+                for p in ref_pages
+            ]
+            garbled = sum(1 for text in pages.values() if looks_garbled(text))
+            print(
+                f"{extractor.name:>22} {len(pages) / max(elapsed, 1e-9):>9.1f} "
+                f"{sum(similarity) / max(len(similarity), 1):>11.3f} {garbled:>8}"
+            )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,206 @@
+"""
+HNSW / tenant-index tuning harness for the settings used by ensure_collection.
+
+Sweeps hnsw_m, hnsw_payload_m, search-time ef and the number of tenants over a
+synthetic multi-tenant corpus. Every query is scoped to one tenant, as in the app, and compared with exact
+brute-force top-k inside that tenant. Reports build time, query p50/p99, QPS and
+recall@k, and writes all rows as JSON for regression tracking.
+
+With --thresholds it also shows, for the data/ PDFs, how often in-domain questions
+(verbatim spans) and off-topic questions clear each SCORE_THRESHOLD candidate.
+
+Runs without services against QdrantClient(":memory:"), which always searches
+exactly, so HNSW parameters only show their effect against a local Qdrant binary
+(--url http://localhost:6333).
+
+Usage:
+    python -m benchmarks.bench_hnsw [--url :memory:] [--n 20000] [--m 0 16] [--payload-m 8 16 32]
+        [--ef 32 64 128] [--tenants 1 10 100] [--out bench_hnsw.json] [--thresholds]
+"""
+import argparse
+import glob
+import itertools
+import json
+import os
+import platform
+import subprocess
+import time
+
+import numpy as np
+from qdrant_client import QdrantClient
+from qdrant_client.http import models
+
+from benchmarks.bench_quantization import synthetic_vectors, wait_until_indexed
+from qdrant_operations import QdrantConfig, drop_collection, ensure_collection, search, upsert_chunks
+
+OFF_TOPIC = [
+    "What is the capital of France?",
+    "Who won the football world cup in 2018?",
+    "How do I bake sourdough bread?",
+    "What is the weather like in Tokyo today?",
+    "Recommend a good science fiction novel",
+    "How many moons does Jupiter have?",
+    "What is the exchange rate of the euro?",
+    "How do I change a flat tyre?",
+]
+
+
+def make_client(url):
+    return QdrantClient(":memory:") if url == ":memory:" else QdrantClient(url=url, timeout=120)
+
+
+def build(client, cfg, vectors, tenant_of):
+    start = time.perf_counter()
+    ensure_collection(client, cfg, recreate=True)
+    # index every segment, however small, so the graph settings are what gets measured
+    client.update_collection(
+        collection_name=cfg.collection_name,
+        optimizers_config=models.OptimizersConfigDiff(indexing_threshold=1),
+    )
+    client.upload_collection(
+        collection_name=cfg.collection_name,
+        vectors=vectors,
+        payload=({"user_id": f"t{t}", "doc_id": "bench", "chunk_index": i} for i, t in enumerate(tenant_of)),
+        ids=range(len(vectors)),
+        batch_size=512,
+    )
+    wait_until_indexed(client, cfg.collection_name)
+    return time.perf_counter() - start
+
+
+def run_queries(client, cfg, vectors, tenant_of, queries, k):
+    latencies, hits = [], 0
+    for tenant, query in queries:
+        members = np.flatnonzero(tenant_of == tenant)
+        expected = set(members[np.argsort(-(vectors[members] @ query))[:k]].tolist())
+        start = time.perf_counter()
+        results = search(client, cfg, f"t{tenant}", query, limit=k)
+        latencies.append(time.perf_counter() - start)
+        hits += len({r["chunk_index"] for r in results} & expected)
+    return latencies, hits / (len(queries) * k)
+
+
+def sweep(args, client, rng):
+    rows = []
+    for tenants in args.tenants:
+        vectors = synthetic_vectors(args.n, args.dim, rng)
+        tenant_of = rng.integers(0, tenants, args.n)
+        picks = rng.choice(args.n, args.queries, replace=False)
+        queries = [
+            (int(tenant_of[i]), vectors[i] + 0.05 * rng.standard_normal(args.dim).astype(np.float32))
+            for i in picks
+        ]
+        for m, payload_m in itertools.product(args.m, args.payload_m):
+            cfg = QdrantConfig(
+                url=args.url, api_key=None, collection_name="bench_hnsw",
+                vector_size=args.dim, hnsw_m=m, hnsw_payload_m=payload_m,
+            )
+            try:
+                build_s = build(client, cfg, vectors, tenant_of)
+                for ef in args.ef:
+                    cfg.hnsw_ef = ef
+                    latencies, recall = run_queries(client, cfg, vectors, tenant_of, queries, args.k)
+                    row = {
+                        "tenants": tenants, "m": m, "payload_m": payload_m, "ef": ef,
+                        "vectors": args.n, "build_s": build_s,
+                        "p50_ms": float(np.percentile(latencies, 50) * 1000),
+                        "p99_ms": float(np.percentile(latencies, 99) * 1000),
+                        "qps": len(latencies) / sum(latencies),
+                        f"recall@{args.k}": recall,
+                    }
+                    rows.append(row)
+                    print(
+                        f"{tenants:>7} {m:>3} {payload_m:>9} {ef:>4} {build_s:>8.1f} {row['p50_ms']:>7.2f} "
+                        f"{row['p99_ms']:>7.2f} {row['qps']:>7.0f} {recall:>7.3f}"
+                    )
+            finally:
+                drop_collection(client, cfg)
+    return rows
+
+
+def threshold_sweep(args, client):
+    from pipeline.chunk_pdf import chunk_pdf
+    from src.embeddings import EmbeddingManager
+
+    embedder = EmbeddingManager()
+    cfg = QdrantConfig(url=args.url, api_key=None, collection_name="bench_threshold", vector_size=embedder.dimension)
+    ensure_collection(client, cfg, recreate=True)
+    try:
+        in_domain = []
+        for path in sorted(glob.glob(os.path.join(args.data, "*.pdf"))):
+            with open(path, "rb") as f:
+                chunks = chunk_pdf(f)
+            upsert_chunks(client, cfg, "pdfs", os.path.basename(path), embedder.embed_texts([c["text"] for c in chunks]), chunks)
+            in_domain.extend(" ".join(c["text"].split()[:12]) for c in chunks if len(c["text"].split()) >= 12)
+
+        def top_scores(questions):
+            vectors = embedder.embed_texts(questions)
+            return np.array([
+                (search(client, cfg, "pdfs", v, limit=1) or [{"score": 0.0}])[0]["score"] for v in vectors
+            ])
+
+        in_scores, off_scores = top_scores(in_domain[:args.queries]), top_scores(OFF_TOPIC)
+        rows = []
+        print(f"\n{'threshold':>9} {'in-domain kept':>15} {'off-topic kept':>15}")
+        for threshold in np.arange(0.20, 0.61, 0.05):
+            row = {
+                "threshold": round(float(threshold), 2),
+                "in_domain_kept": float(np.mean(in_scores >= threshold)),
+                "off_topic_kept": float(np.mean(off_scores >= threshold)),
+            }
+            rows.append(row)
+            print(f"{row['threshold']:>9.2f} {row['in_domain_kept']:>15.2f} {row['off_topic_kept']:>15.2f}")
+    finally:
+        drop_collection(client, cfg)
+    return rows
+
+
+def git_commit():
+    try:
+        return subprocess.check_output(["git", "rev-parse", "--short", "HEAD"], text=True).strip()
+    except Exception:
+        return None
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--url", default=":memory:")
+    parser.add_argument("--n", type=int, default=20_000)
+    parser.add_argument("--dim", type=int, default=384)
+    parser.add_argument("--queries", type=int, default=200)
+    parser.add_argument("--k", type=int, default=5)
+    parser.add_argument("--m", type=int, nargs="+", default=[0, 16])
+    parser.add_argument("--payload-m", type=int, nargs="+", default=[8, 16, 32])
+    parser.add_argument("--ef", type=int, nargs="+", default=[32, 64, 128])
+    parser.add_argument("--tenants", type=int, nargs="+", default=[1, 10, 100])
+    parser.add_argument("--thresholds", action="store_true", help="sweep SCORE_THRESHOLD on the data/ PDFs")
+    parser.add_argument("--data", default="data")
+    parser.add_argument("--out", default="bench_hnsw.json")
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args()
+
+    client = make_client(args.url)
+    rng = np.random.default_rng(args.seed)
+    if args.url == ":memory:":
+        print("Local mode searches exactly; use --url with a Qdrant binary to measure HNSW settings\n")
+
+    print(f"{'tenants':>7} {'m':>3} {'payload_m':>9} {'ef':>4} {'build s':>8} {'p50 ms':>7} {'p99 ms':>7} {'QPS':>7} {'recall':>7}")
+    results = {
+        "meta": {
+            "commit": git_commit(),
+            "url": args.url,
+            "python": platform.python_version(),
+            "args": vars(args),
+        },
+        "sweep": sweep(args, client, rng),
+    }
+    if args.thresholds:
+        results["thresholds"] = threshold_sweep(args, client)
+
+    with open(args.out, "w", encoding="utf-8") as f:
+        json.dump(results, f, indent=2)
+    print(f"\nWrote {args.out}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,166 @@
+"""
+Memory, latency and recall of the quantization / on_disk settings in QdrantConfig.
+
+Needs a local Qdrant server (quantization is ignored by QdrantClient(":memory:")):
+    docker run -p 6333:6333 qdrant/qdrant
+
+For each setting a fresh collection is built with ensure_collection from the same
+vectors (clustered synthetic ones, optionally plus the embedded data/ PDFs), queried
+through qdrant_operations.search, and compared with exact brute-force top-k.
+"est GB/1M" is an estimate, not a measurement: the bytes per million vectors implied
+by the vector layout (float32 originals unless on disk, plus the quantized copy; HNSW
+links and payload excluded). "RSS GB/1M" is measured: the growth of the server's
+resident memory (`memory_resident_bytes` on Qdrant's /metrics) while the collection
+is built, scaled to a million vectors. It includes the HNSW graph and payload, and it
+reads low when the allocator reuses memory freed by the previous collection, so use
+a fresh server per setting for exact figures. It shows "n/a" when /metrics is unavailable.
+
+Usage:
+    python -m benchmarks.bench_quantization [--url http://localhost:6333] [--n 100000] [--queries 200]
+"""
+import argparse
+import glob
+import os
+import time
+
+import numpy as np
+import requests
+from qdrant_client import QdrantClient
+from qdrant_client.http import models
+
+from qdrant_operations import QdrantConfig, drop_collection, ensure_collection, search
+
+USER_ID = "bench"
+
+SETTINGS = [
+    # name, quantization, on_disk, rescore
+    ("float32", None, False, True),
+    ("float32-disk", None, True, True),
+    ("int8", "scalar", False, True),
+    ("int8-norescore", "scalar", False, False),
+    ("int8-disk", "scalar", True, True),
+    ("binary-disk", "binary", True, True),
+]
+
+
+def estimated_ram_bytes_per_million(dim, quantization, on_disk):
+    originals = 0 if on_disk else dim * 4
+    quantized = {None: 0, "scalar": dim, "binary": dim / 8}[quantization]
+    return (originals + quantized) * 1_000_000
+
+
+def resident_bytes(url):
+    """
+    The Qdrant server's resident memory from its Prometheus metrics, or None.
+    """
+    try:
+        response = requests.get(f"{url.rstrip('/')}/metrics", timeout=5)
+        response.raise_for_status()
+    except requests.RequestException:
+        return None
+    for line in response.text.splitlines():
+        if line.startswith("memory_resident_bytes"):
+            return float(line.split()[-1])
+    return None
+
+
+def synthetic_vectors(n, dim, rng, clusters=64):
+    centres = rng.standard_normal((clusters, dim)).astype(np.float32)
+    vectors = centres[rng.integers(0, clusters, n)] + 0.5 * rng.standard_normal((n, dim)).astype(np.float32)
+    return vectors / np.linalg.norm(vectors, axis=1, keepdims=True)
+
+
+def pdf_vectors(data_dir):
+    from pipeline.chunk_pdf import chunk_pdf
+    from src.embeddings import EmbeddingManager
+
+    texts = []
+    for path in sorted(glob.glob(os.path.join(data_dir, "*.pdf"))):
+        with open(path, "rb") as f:
+            texts.extend(c["text"] for c in chunk_pdf(f))
+    if not texts:
+        return np.zeros((0, 384), dtype=np.float32)
+    vectors = EmbeddingManager().embed_texts(texts)
+    return vectors / np.linalg.norm(vectors, axis=1, keepdims=True)
+
+
+def wait_until_indexed(client, name, timeout=600):
+    deadline = time.time() + timeout
+    while time.time() < deadline:
+        if client.get_collection(name).status == models.CollectionStatus.GREEN:
+            return
+        time.sleep(0.5)
+    print(f"  {name} still indexing after {timeout}s, timings may be pessimistic")
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--url", default="http://localhost:6333")
+    parser.add_argument("--n", type=int, default=100_000)
+    parser.add_argument("--dim", type=int, default=384)
+    parser.add_argument("--queries", type=int, default=200)
+    parser.add_argument("--k", type=int, default=5)
+    parser.add_argument("--oversampling", type=float, default=2.0)
+    parser.add_argument("--with-pdfs", action="store_true", help="also index the embedded data/ PDFs")
+    parser.add_argument("--data", default="data")
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args()
+
+    rng = np.random.default_rng(args.seed)
+    vectors = synthetic_vectors(args.n, args.dim, rng)
+    if args.with_pdfs:
+        vectors = np.vstack([vectors, pdf_vectors(args.data)])
+    queries = vectors[rng.choice(len(vectors), args.queries, replace=False)]
+    queries = queries + 0.05 * rng.standard_normal(queries.shape).astype(np.float32)
+    truth = np.argsort(-(queries @ vectors.T), axis=1)[:, :args.k]
+
+    client = QdrantClient(url=args.url, timeout=120)
+    print(f"{len(vectors)} vectors, dim {args.dim}, {args.queries} queries, recall@{args.k}\n")
+    print(f"{'setting':>15} {'est GB/1M':>10} {'RSS GB/1M':>10} {'build s':>8} {'p50 ms':>7} {'p99 ms':>7} {'recall':>7} {'loss':>6}")
+    baseline_recall = None
+    for name, quantization, on_disk, rescore in SETTINGS:
+        cfg = QdrantConfig(
+            url=args.url, api_key=None, collection_name=f"bench_quant_{name}", vector_size=args.dim,
+            quantization=quantization, on_disk=on_disk, rescore=rescore, oversampling=args.oversampling,
+        )
+        try:
+            rss_before = resident_bytes(args.url)
+            start = time.perf_counter()
+            ensure_collection(client, cfg, recreate=True)
+            client.upload_collection(
+                collection_name=cfg.collection_name,
+                vectors=vectors,
+                payload=({"user_id": USER_ID, "doc_id": "bench", "chunk_index": i} for i in range(len(vectors))),
+                ids=range(len(vectors)),
+                batch_size=512,
+            )
+            wait_until_indexed(client, cfg.collection_name)
+            build = time.perf_counter() - start
+            rss_after = resident_bytes(args.url)
+            measured = "n/a"
+            if rss_before is not None and rss_after is not None:
+                measured = f"{(rss_after - rss_before) / len(vectors) * 1_000_000 / 1e9:.2f}"
+
+            latencies, hits = [], 0
+            for query, expected in zip(queries, truth):
+                t = time.perf_counter()
+                results = search(client, cfg, USER_ID, query, limit=args.k)
+                latencies.append((time.perf_counter() - t) * 1000)
+                hits += len({r["chunk_index"] for r in results} & set(expected.tolist()))
+            recall = hits / (args.queries * args.k)
+            if baseline_recall is None:
+                baseline_recall = recall
+
+            print(
+                f"{name:>15} {estimated_ram_bytes_per_million(args.dim, quantization, on_disk) / 1e9:>10.2f} "
+                f"{measured:>10} {build:>8.1f} "
+                f"{np.percentile(latencies, 50):>7.1f} {np.percentile(latencies, 99):>7.1f} "
+                f"{recall:>7.3f} {baseline_recall - recall:>6.3f}"
+            )
+        finally:
+            # ensure_collection also made a registry next to the scratch collection
+            drop_collection(client, cfg)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,62 @@
+"""
+Cross-encoder re-ranking latency per candidate count N, to pick RERANK_CANDIDATES
+and RERANK_BUDGET_MS.
+
+Scores N chunks from the PDFs in data/ against a set of questions in one batch per
+question and reports the median and p95 latency.
+
+Usage:
+    python -m benchmarks.bench_reranker [--model cross-encoder/ms-marco-MiniLM-L-6-v2] [--n 10 20 40] [--backend onnx]
+"""
+import argparse
+import glob
+import os
+import time
+
+import numpy as np
+
+from pipeline.chunk_pdf import chunk_pdf
+from src.reranker import CrossEncoderReranker
+
+QUESTIONS = [
+    "What is the main finding of the study?",
+    "Which methods were used to collect data?",
+    "What are the limitations mentioned?",
+    "How is the model evaluated?",
+    "What dataset was used?",
+]
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--data", default="data")
+    parser.add_argument("--model", default="cross-encoder/ms-marco-MiniLM-L-6-v2")
+    parser.add_argument("--backend", default="onnx")
+    parser.add_argument("--n", type=int, nargs="+", default=[5, 10, 20, 40])
+    parser.add_argument("--repeat", type=int, default=3)
+    args = parser.parse_args()
+
+    texts = []
+    for path in sorted(glob.glob(os.path.join(args.data, "*.pdf"))):
+        with open(path, "rb") as f:
+            texts.extend(c["text"] for c in chunk_pdf(f))
+    if not texts:
+        raise SystemExit(f"No PDFs found in {args.data}")
+
+    reranker = CrossEncoderReranker(model_name=args.model, backend=args.backend)
+    print(f"warm up {reranker.warm_up():.2f}s, {len(texts)} chunks available\n")
+    print(f"{'N':>4} {'median ms':>10} {'p95 ms':>8} {'ms/pair':>8}")
+    for n in args.n:
+        batch = (texts * (n // len(texts) + 1))[:n]
+        samples = []
+        for _ in range(args.repeat):
+            for question in QUESTIONS:
+                start = time.perf_counter()
+                reranker.score(question, batch)
+                samples.append((time.perf_counter() - start) * 1000)
+        median = float(np.median(samples))
+        print(f"{n:>4} {median:>10.1f} {float(np.percentile(samples, 95)):>8.1f} {median / n:>8.2f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,125 @@
+"""
+Cold-start cost of the app: module import time and time to the first answer token.
+
+Every measurement runs in a fresh interpreter, so nothing is cached between runs.
+"import" times `import <module>` for each module the Streamlit script pulls in, and
+lists the slowest imports reported by `python -X importtime`. "first response"
+(--answer, needs the Qdrant/Gemma/Tavily/Mem0 keys) builds RagService.from_env()
+and streams one web-mode answer, reporting setup, time to first token and total.
+
+--ref runs the same measurements against another commit, checked out in a temporary
+git worktree, for a before/after comparison (e.g. --ref HEAD~1).
+
+Usage:
+    python -m benchmarks.bench_startup [--runs 5] [--answer] [--ref HEAD~1]
+"""
+import argparse
+import json
+import os
+import statistics
+import subprocess
+import sys
+import tempfile
+
+MODULES = ["src.rag_core", "src.mem0_client", "src.rag_service"]
+
+IMPORT_SNIPPET = """
+import json, time
+start = time.perf_counter()
+import {module}
+print(json.dumps({{"seconds": time.perf_counter() - start}}))
+"""
+
+ANSWER_SNIPPET = """
+import json, time
+start = time.perf_counter()
+from src.rag_service import RagService
+service = RagService.from_env()
+ready = time.perf_counter()
+retrieval, stream = service.answer("bench-startup", {question!r}, mode="web")
+first = None
+for _ in stream:
+    if first is None:
+        first = time.perf_counter()
+end = time.perf_counter()
+print(json.dumps({{"setup": ready - start, "first_token": (first or end) - start, "total": end - start}}))
+"""
+
+
+def run_snippet(tree, code):
+    result = subprocess.run(
+        [sys.executable, "-c", code], cwd=tree, capture_output=True, text=True, check=True,
+        env={**os.environ, "PYTHONPATH": tree},
+    )
+    return json.loads(result.stdout.strip().splitlines()[-1])
+
+
+def slowest_imports(tree, module, top):
+    # -X importtime writes "import time: self [us] | cumulative | imported package" to stderr
+    result = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", f"import {module}"], cwd=tree, capture_output=True, text=True,
+        env={**os.environ, "PYTHONPATH": tree},
+    )
+    per_package = {}
+    for line in result.stderr.splitlines():
+        parts = line.split("|")
+        if len(parts) != 3 or not parts[0].split(":")[-1].strip().isdigit():
+            continue
+        # sum self time per top-level package, so torch isn't listed once per submodule
+        package = parts[2].strip().split(".")[0]
+        per_package[package] = per_package.get(package, 0) + int(parts[0].split(":")[-1])
+    return sorted(((us, name) for name, us in per_package.items()), reverse=True)[:top]
+
+
+def measure(tree, args):
+    report = {"imports": {}, "slowest": {}}
+    for module in MODULES:
+        seconds = [run_snippet(tree, IMPORT_SNIPPET.format(module=module))["seconds"] for _ in range(args.runs)]
+        report["imports"][module] = statistics.median(seconds)
+        report["slowest"][module] = slowest_imports(tree, module, args.top)
+    if args.answer:
+        runs = [run_snippet(tree, ANSWER_SNIPPET.format(question=args.question)) for _ in range(args.runs)]
+        report["answer"] = {key: statistics.median(r[key] for r in runs) for key in runs[0]}
+    return report
+
+
+def print_report(label, report):
+    print(f"== {label}")
+    for module, seconds in report["imports"].items():
+        print(f"  import {module:<20} {seconds * 1000:>9.1f} ms")
+        for us, name in report["slowest"][module]:
+            print(f"      {us / 1000:>9.1f} ms  {name}")
+    if "answer" in report:
+        answer = report["answer"]
+        print(f"  from_env()            {answer['setup'] * 1000:>9.1f} ms")
+        print(f"  first token           {answer['first_token'] * 1000:>9.1f} ms")
+        print(f"  full answer           {answer['total'] * 1000:>9.1f} ms")
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--runs", type=int, default=5)
+    parser.add_argument("--top", type=int, default=5, help="slowest imports listed per module")
+    parser.add_argument("--answer", action="store_true", help="also time the first answer (needs API keys)")
+    parser.add_argument("--question", default="What is retrieval augmented generation?")
+    parser.add_argument("--ref", help="git ref to compare against, e.g. HEAD~1")
+    args = parser.parse_args()
+
+    root = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+    if args.ref:
+        with tempfile.TemporaryDirectory() as tmp:
+            worktree = os.path.join(tmp, "before")
+            subprocess.run(["git", "worktree", "add", "--detach", worktree, args.ref], cwd=root, check=True,
+                           capture_output=True)
+            try:
+                if os.path.exists(os.path.join(root, ".env")):
+                    # the keys aren't committed; reuse this checkout's
+                    os.symlink(os.path.join(root, ".env"), os.path.join(worktree, ".env"))
+                print_report(args.ref, measure(worktree, args))
+            finally:
+                subprocess.run(["git", "worktree", "remove", "--force", worktree], cwd=root, check=True)
+    print_report("working tree", measure(root, args))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,84 @@
+"""
+Exercise CachedWebSearch against a local fake Tavily (no network, no API key).
+
+Simulates concurrent sessions asking overlapping questions and reports how many
+calls actually reached the search backend, the cache hit rate and latency.
+
+Usage:
+    python -m benchmarks.bench_web_search_cache [--sessions 16] [--questions 200] [--latency 0.3]
+"""
+import argparse
+import random
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+from src.web_search import CachedWebSearch
+
+
+class FakeTavily:
+    """
+    Stand-in for TavilySearchResults: same .run(query) -> list of {"content": ...} shape.
+    """
+
+    def __init__(self, latency=0.3):
+        self.latency = latency
+        self.calls = 0
+        self._lock = threading.Lock()
+
+    def run(self, query):
+        with self._lock:
+            self.calls += 1
+        time.sleep(self.latency)
+        return [{"url": f"https://example.com/{i}", "content": f"result {i} for {query}"} for i in range(5)]
+
+
+QUESTIONS = [
+    "What is the capital of France?",
+    "what is the capital of france",
+    "Who won the latest world cup?",
+    "What is the current price of gold?",
+    "Explain quantum computing.",
+    "How tall is Mount Everest?",
+    "Who is the CEO of OpenAI now?",
+    "What is retrieval augmented generation?",
+]
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--sessions", type=int, default=16)
+    parser.add_argument("--questions", type=int, default=200)
+    parser.add_argument("--latency", type=float, default=0.3)
+    args = parser.parse_args()
+
+    fake = FakeTavily(latency=args.latency)
+    search = CachedWebSearch(fake, ttl=60, short_ttl=5)
+    rng = random.Random(0)
+    queries = [rng.choice(QUESTIONS) for _ in range(args.questions)]
+
+    latencies = []
+
+    def ask(query):
+        start = time.perf_counter()
+        results = search.run(query)
+        latencies.append(time.perf_counter() - start)
+        assert results and "content" in results[0]
+
+    start = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=args.sessions) as pool:
+        list(pool.map(ask, queries))
+    elapsed = time.perf_counter() - start
+
+    latencies.sort()
+    stats = search.stats()
+    print(f"{args.questions} lookups from {args.sessions} concurrent sessions in {elapsed:.2f}s")
+    print(f"backend calls: {fake.calls} (uncached would be {args.questions})")
+    print(f"hits {stats['hits']}, misses {stats['misses']}, coalesced {stats['coalesced']}, "
+          f"hit rate {stats['hit_rate']:.1%}")
+    print(f"latency p50 {latencies[len(latencies) // 2] * 1000:.1f} ms, "
+          f"p99 {latencies[int(len(latencies) * 0.99) - 1] * 1000:.1f} ms")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,106 @@
+"""
+Recall@k of dense, sparse (BM25) and fused (RRF) retrieval on the PDFs in data/.
+
+Indexes every PDF into an in-memory Qdrant collection with both vector kinds, then
+asks two kinds of synthetic questions whose answer chunk is known:
+  - "span": a verbatim 12-word span from a chunk
+  - "identifier": the identifier-like terms of a chunk (codes, numbers, acronyms)
+
+Usage:
+    python -m benchmarks.eval_hybrid_retrieval [--data data] [--k 5] [--queries 100]
+"""
+import argparse
+import glob
+import os
+import random
+
+from qdrant_client import QdrantClient
+from qdrant_client.http import models
+
+from pipeline.chunk_pdf import chunk_pdf
+from qdrant_operations import QdrantConfig, ensure_collection, search, sparse_encoder, upsert_chunks
+from src.embeddings import EmbeddingManager
+from src.sparse_encoder import exact_match_terms
+
+USER_ID = "eval"
+
+
+def sparse_only(client, cfg, query_text, limit):
+    indices, values = sparse_encoder.encode_query(query_text)
+    points = client.query_points(
+        collection_name=cfg.collection_name,
+        query=models.SparseVector(indices=indices, values=values),
+        using=cfg.sparse_vector_name,
+        query_filter=models.Filter(
+            must=[models.FieldCondition(key="user_id", match=models.MatchValue(value=USER_ID))]
+        ),
+        limit=limit,
+        with_payload=True,
+    ).points
+    return [{"doc_id": p.payload["doc_id"], "page": p.payload["page"], "chunk_index": p.payload["chunk_index"]} for p in points]
+
+
+def build_queries(chunks_by_doc, n, rng):
+    queries = {"span": [], "identifier": []}
+    for filename, chunks in chunks_by_doc.items():
+        for chunk in chunks:
+            target = (filename, chunk["page"], chunk["chunk_index"])
+            words = chunk["text"].split()
+            if len(words) >= 20:
+                start = rng.randrange(len(words) - 12)
+                queries["span"].append((" ".join(words[start:start + 12]), target))
+            identifiers = list(dict.fromkeys(exact_match_terms(chunk["text"])))
+            if identifiers:
+                queries["identifier"].append((" ".join(identifiers[:3]), target))
+    for kind in queries:
+        rng.shuffle(queries[kind])
+        queries[kind] = queries[kind][:n]
+    return queries
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--data", default="data")
+    parser.add_argument("--k", type=int, default=5)
+    parser.add_argument("--queries", type=int, default=100, help="per query kind")
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args()
+
+    embedder = EmbeddingManager()
+    cfg = QdrantConfig(url=None, api_key=None, collection_name="eval_hybrid",
+                       vector_size=embedder.dimension, sparse_vector_name="bm25")
+    client = QdrantClient(":memory:")
+    ensure_collection(client, cfg)
+
+    chunks_by_doc = {}
+    for path in sorted(glob.glob(os.path.join(args.data, "*.pdf"))):
+        filename = os.path.basename(path)
+        with open(path, "rb") as f:
+            chunks = chunk_pdf(f)
+        upsert_chunks(client, cfg, USER_ID, filename, embedder.embed_texts([c["text"] for c in chunks]), chunks)
+        chunks_by_doc[filename] = chunks
+        print(f"indexed {filename}: {len(chunks)} chunks")
+
+    queries = build_queries(chunks_by_doc, args.queries, random.Random(args.seed))
+    print(f"\nrecall@{args.k}")
+    print(f"{'queries':>11} {'n':>5} {'dense':>7} {'sparse':>7} {'fused':>7}")
+    for kind, rows in queries.items():
+        if not rows:
+            continue
+        vectors = embedder.embed_texts([q for q, _ in rows])
+        hits = {"dense": 0, "sparse": 0, "fused": 0}
+        for (question, target), vector in zip(rows, vectors):
+            results = {
+                "dense": search(client, cfg, USER_ID, vector, limit=args.k),
+                "sparse": sparse_only(client, cfg, question, args.k),
+                "fused": search(client, cfg, USER_ID, vector, limit=args.k, query_text=question),
+            }
+            for method, found in results.items():
+                if target in {(r["doc_id"], r["page"], r["chunk_index"]) for r in found}:
+                    hits[method] += 1
+        n = len(rows)
+        print(f"{kind:>11} {n:>5} {hits['dense'] / n:>7.2f} {hits['sparse'] / n:>7.2f} {hits['fused'] / n:>7.2f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,91 @@
+"""
+Precision / recall of the memory router against a labelled question set.
+
+Compares the embedding-based MemoryRouter with the old substring heuristic
+(memory_router.mentions_self). "Positive" means the question needs Mem0 memories.
+The fallback rate is the share of questions whose score lies within --uncertainty of
+the margin; those are decided by --fallback (MEMORY_ROUTER_FALLBACK) instead.
+
+Labelled questions must not restate the router's exemplars, or the score measures
+memorisation: any question whose cosine similarity to an exemplar is at least
+--max-exemplar-similarity is reported and left out.
+
+Usage:
+    python -m benchmarks.eval_memory_router [--labels benchmarks/memory_router_labels.jsonl] [--margin 0.0]
+        [--uncertainty 0.02] [--fallback router|always|never|keywords]
+"""
+import argparse
+import json
+
+import numpy as np
+
+from src.embeddings import EmbeddingManager
+from src.memory_router import (
+    GENERAL_EXAMPLES, MEMORY_ROUTER_FALLBACK, MEMORY_ROUTER_MARGIN, MEMORY_ROUTER_UNCERTAINTY, PERSONAL_EXAMPLES,
+    MemoryRouter, mentions_self,
+)
+
+
+def precision_recall(labels, predictions):
+    tp = sum(1 for y, p in zip(labels, predictions) if y and p)
+    fp = sum(1 for y, p in zip(labels, predictions) if not y and p)
+    fn = sum(1 for y, p in zip(labels, predictions) if y and not p)
+    precision = tp / (tp + fp) if tp + fp else 0.0
+    recall = tp / (tp + fn) if tp + fn else 0.0
+    return precision, recall, tp + fp
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--labels", default="benchmarks/memory_router_labels.jsonl")
+    parser.add_argument("--margin", type=float, default=MEMORY_ROUTER_MARGIN)
+    parser.add_argument("--uncertainty", type=float, default=MEMORY_ROUTER_UNCERTAINTY)
+    parser.add_argument("--fallback", default=MEMORY_ROUTER_FALLBACK, choices=["router", "always", "never", "keywords"])
+    parser.add_argument("--max-exemplar-similarity", type=float, default=0.9)
+    parser.add_argument("--show-errors", action="store_true")
+    args = parser.parse_args()
+
+    with open(args.labels, "r", encoding="utf-8") as f:
+        rows = [json.loads(line) for line in f if line.strip()]
+
+    embedder = EmbeddingManager()
+    exemplars = PERSONAL_EXAMPLES + GENERAL_EXAMPLES
+    vectors = np.asarray(embedder.embed_texts([r["question"] for r in rows] + exemplars), dtype=np.float32)
+    vectors /= np.maximum(np.linalg.norm(vectors, axis=1, keepdims=True), 1e-12)
+    similarity = vectors[:len(rows)] @ vectors[len(rows):].T
+    kept = []
+    for row, sims in zip(rows, similarity):
+        nearest = int(np.argmax(sims))
+        if sims[nearest] >= args.max_exemplar_similarity:
+            print(f"left out (cosine {sims[nearest]:.2f} to exemplar '{exemplars[nearest]}'): {row['question']}")
+        else:
+            kept.append(row)
+    rows = kept
+    questions = [r["question"] for r in rows]
+    labels = [r["personal"] for r in rows]
+
+    router = MemoryRouter(embedder, margin=args.margin, uncertainty=args.uncertainty, fallback=args.fallback)
+    decisions = [router.decide(q) for q in questions]
+    candidates = {
+        "substring": [mentions_self(q) for q in questions],
+        "router": [personal for personal, _ in decisions],
+    }
+    unsure = sum(1 for _, fell_back in decisions if fell_back)
+
+    print(f"{len(rows)} questions, {sum(labels)} personal")
+    print(f"fallback rate: {unsure}/{len(rows)} ({unsure / max(len(rows), 1):.1%}) within {args.uncertainty} "
+          f"of the margin, decided by '{args.fallback}'\n")
+    print(f"{'method':>10} {'precision':>10} {'recall':>7} {'mem0 calls':>11}")
+    for name, predictions in candidates.items():
+        precision, recall, calls = precision_recall(labels, predictions)
+        print(f"{name:>10} {precision:>10.2f} {recall:>7.2f} {calls:>11}")
+
+    if args.show_errors:
+        print("\nrouter errors:")
+        for q, y, p in zip(questions, labels, candidates["router"]):
+            if y != p:
+                print(f"  expected {'personal' if y else 'general'}: {q} (score {router.score(q):+.3f})")
+
+
+if __name__ == "__main__":
+    main()
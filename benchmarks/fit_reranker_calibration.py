@@ -0,0 +1,127 @@
+"""
+Fits the Platt scaling parameters of the cross-encoder re-ranker on labelled pairs.
+
+Each labelled pair is a question, a chunk text and whether the chunk answers the
+question. The model's logits are fitted to the labels with one-dimensional logistic
+regression (Platt's smoothed targets, Newton steps). The script reports log loss,
+calibration error (ECE, 10 bins) and precision / recall at RERANK_THRESHOLD, before
+and after the fit, and prints the RERANK_PLATT_SCALE / RERANK_PLATT_BIAS to set.
+
+--labels is a JSONL file of {"question", "text", "relevant": true/false}. Without it,
+pairs are synthesised from the PDFs in data/: a 12-word span of a chunk is the question,
+that chunk is relevant and `--negatives` random other chunks are not. Real questions
+are harder than verbatim spans, so prefer a labelled file when one is available.
+
+Usage:
+    python -m benchmarks.fit_reranker_calibration [--labels pairs.jsonl] [--model cross-encoder/ms-marco-MiniLM-L-6-v2]
+"""
+import argparse
+import glob
+import json
+import os
+import random
+
+import numpy as np
+
+from src.reranker import RERANK_THRESHOLD, CrossEncoderReranker
+
+
+def load_labels(path):
+    with open(path, "r", encoding="utf-8") as f:
+        rows = [json.loads(line) for line in f if line.strip()]
+    return [(r["question"], r["text"], bool(r["relevant"])) for r in rows]
+
+
+def synthetic_labels(data_dir, n, negatives, rng):
+    from pipeline.chunk_pdf import chunk_pdf
+
+    texts = []
+    for path in sorted(glob.glob(os.path.join(data_dir, "*.pdf"))):
+        with open(path, "rb") as f:
+            texts.extend(c["text"] for c in chunk_pdf(f))
+    if len(texts) < 2:
+        raise SystemExit(f"Not enough PDF chunks in {data_dir}; pass --labels")
+    pairs = []
+    for i in rng.sample(range(len(texts)), min(n, len(texts))):
+        words = texts[i].split()
+        if len(words) < 20:
+            continue
+        start = rng.randrange(len(words) - 12)
+        question = " ".join(words[start:start + 12])
+        pairs.append((question, texts[i], True))
+        for j in rng.sample([j for j in range(len(texts)) if j != i], min(negatives, len(texts) - 1)):
+            pairs.append((question, texts[j], False))
+    return pairs
+
+
+def fit_platt(logits, labels, iterations=100):
+    """
+    (scale, bias) minimising log loss of sigmoid(scale * logit + bias).
+    """
+    x = np.asarray(logits, dtype=np.float64)
+    y = np.asarray(labels, dtype=np.float64)
+    positives, negatives = y.sum(), len(y) - y.sum()
+    # Platt's smoothed targets keep the fit finite on separable data
+    t = np.where(y > 0, (positives + 1) / (positives + 2), 1 / (negatives + 2))
+    scale, bias = 1.0, 0.0
+    for _ in range(iterations):
+        p = 1 / (1 + np.exp(-(scale * x + bias)))
+        gradient = np.array([np.sum((p - t) * x), np.sum(p - t)])
+        w = p * (1 - p) + 1e-12
+        hessian = np.array([[np.sum(w * x * x), np.sum(w * x)], [np.sum(w * x), np.sum(w)]])
+        step = np.linalg.solve(hessian + 1e-9 * np.eye(2), gradient)
+        scale, bias = scale - step[0], bias - step[1]
+        if np.abs(step).max() < 1e-9:
+            break
+    return float(scale), float(bias)
+
+
+def report(name, probabilities, labels, threshold):
+    p = np.clip(probabilities, 1e-7, 1 - 1e-7)
+    y = np.asarray(labels, dtype=np.float64)
+    log_loss = -np.mean(y * np.log(p) + (1 - y) * np.log(1 - p))
+    bins = np.minimum((p * 10).astype(int), 9)
+    ece = sum(abs(p[bins == b].mean() - y[bins == b].mean()) * np.mean(bins == b) for b in range(10) if np.any(bins == b))
+    predicted = p >= threshold
+    tp = np.sum(predicted & (y > 0))
+    precision = tp / max(predicted.sum(), 1)
+    recall = tp / max((y > 0).sum(), 1)
+    print(f"{name:>10} {log_loss:>9.3f} {ece:>7.3f} {precision:>10.3f} {recall:>7.3f}")
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--labels", help="JSONL of {question, text, relevant}")
+    parser.add_argument("--data", default="data")
+    parser.add_argument("--pairs", type=int, default=200, help="synthetic questions when --labels is not given")
+    parser.add_argument("--negatives", type=int, default=3)
+    parser.add_argument("--model", default="cross-encoder/ms-marco-MiniLM-L-6-v2")
+    parser.add_argument("--backend", default="onnx")
+    parser.add_argument("--threshold", type=float, default=RERANK_THRESHOLD)
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args()
+
+    if args.labels:
+        pairs = load_labels(args.labels)
+    else:
+        print("No --labels given; fitting on synthetic span questions from", args.data)
+        pairs = synthetic_labels(args.data, args.pairs, args.negatives, random.Random(args.seed))
+
+    reranker = CrossEncoderReranker(model_name=args.model, backend=args.backend, scale=1.0, bias=0.0)
+    logits, labels = [], []
+    for question, text, relevant in pairs:
+        logits.append(float(reranker.to_logits(reranker.raw_scores(question, [text]))[0]))
+        labels.append(relevant)
+    logits = np.asarray(logits)
+    print(f"{len(pairs)} pairs, {sum(labels)} relevant; model outputs "
+          f"{'probabilities' if reranker.outputs_probabilities else 'logits'}\n")
+
+    scale, bias = fit_platt(logits, labels)
+    print(f"{'':>10} {'log loss':>9} {'ECE':>7} {'precision':>10} {'recall':>7}   (at threshold {args.threshold})")
+    report("default", 1 / (1 + np.exp(-logits)), labels, args.threshold)
+    report("fitted", 1 / (1 + np.exp(-(scale * logits + bias))), labels, args.threshold)
+    print(f"\nexport RERANK_PLATT_SCALE={scale:.4f} RERANK_PLATT_BIAS={bias:.4f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -1,18 +1,23 @@
 from dotenv import load_dotenv
-from qdrant_client import QdrantClient
-from qdrant_operations import ensure_collection, QdrantConfig
-import os
+from qdrant_operations import backfill_registry, config_from_env, ensure_collection, get_qdrant_client, migrate_collection
+import sys
 
 load_dotenv()
 
-cfg = QdrantConfig(
-    url=os.environ["QDRANT_CONSOLE_URL"],
-    api_key=os.environ["QDRANT_API_KEY"],
-)
+cfg = config_from_env()
 
-client = QdrantClient(url=cfg.url, api_key=cfg.api_key)
+client = get_qdrant_client(cfg)
 
 ensure_collection(client, cfg)
 
+# --migrate applies QDRANT_QUANTIZATION / QDRANT_ON_DISK to an existing collection
+if "--migrate" in sys.argv:
+    migrate_collection(client, cfg)
+    print(f"Migrated: quantization={cfg.quantization}, on_disk={cfg.on_disk}")
+
+# --backfill-registry rebuilds the document registry from the stored chunks
+if "--backfill-registry" in sys.argv:
+    backfill_registry(client, cfg)
+
 print("Collection ready!")
 print(client.get_collections())
@@ -2,43 +2,31 @@ import os
 import uuid
 import streamlit as st
 from streamlit_local_storage import LocalStorage
-from qdrant_client import QdrantClient
-from qdrant_operations import upsert_chunks, list_user_docs, delete_document, search, ensure_collection, QdrantConfig
 from dotenv import load_dotenv
 from st_copy_to_clipboard import st_copy_to_clipboard
-from langchain_community.tools.tavily_search import TavilySearchResults
-from src.rag_core import rag_answer
 import re
 from datetime import datetime
 
 
-from pipeline.chunk_pdf import chunk_pdf
-from src.embeddings import EmbeddingManager
-from src.llm_gemma import GemmaLLM
-from src.mem0_client import add_user_memories
-
-embedder = EmbeddingManager()
-
-
+from src.prompt_builder import ConversationWindow
+from src.ingest_ledger import file_sha256
+from src import tracing
 
 load_dotenv()
 
-cfg = QdrantConfig(
-    url=os.environ.get("QDRANT_CONSOLE_URL"),
-    api_key=os.environ.get("QDRANT_API_KEY"),
-    collection_name="all_user_docs",
-    vector_size=384,       #1536,                  # match your embedding model
-    distance="Cosine"                  # or "Dot" / "Euclid"
-)
+# with RAG_API_URL set the app is a thin client of api.py; otherwise it runs everything in-process
+RAG_API_URL = os.environ.get("RAG_API_URL")
 
-tavily_tool = TavilySearchResults(api_key=os.environ.get("TAVILY_API_KEY"))
 
-qdrant_client = QdrantClient(
-    url=cfg.url,
-    api_key=cfg.api_key,
-)
-
-ensure_collection(qdrant_client, cfg)
+@st.cache_resource
+def get_backend():
+    # one backend (models, clients, caches) per process, shared by every session and rerun;
+    # heavy modules are imported here, on first use, not when the script starts
+    if RAG_API_URL:
+        from src.api_client import RagApiClient
+        return RagApiClient(RAG_API_URL)
+    from src.resources import get_rag_service
+    return get_rag_service()
 
 def generate_user_id():
     full_uuid = str(uuid.uuid4())
@@ -101,45 +89,70 @@ st.title("RAG Chatbot")
 # initiate chat history in session state
 if "messages" not in st.session_state:
     st.session_state["messages"] = []   # list of {"role": "user"/"assistant", "content": str}
+if "session_id" not in st.session_state:
+    st.session_state["session_id"] = str(uuid.uuid4())
+if "ingested" not in st.session_state:
+    st.session_state["ingested"] = set()   # (user_id, sha256, filename) of uploads already sent
+if "conversation_window" not in st.session_state:
+    st.session_state["conversation_window"] = ConversationWindow()   # rolling summary of older turns
 
 active_user_id = get_active_user_id()
 
-
-def process_pdf(uploaded_file, chunk_size=800, chunk_overlap=200):
-    chunks = chunk_pdf(uploaded_file, chunk_size, chunk_overlap)
-    texts = [c["text"] for c in chunks]   # flatten for embedding
-    vectors = embedder.embed_texts(texts)
-
-    return chunks, vectors
+# the page above is already drawn while models and clients load on a cold start
+with st.spinner("Loading models..."):
+    backend = get_backend()
 
 
 uploaded_files = st.file_uploader("Upload a PDF", type=["pdf"], accept_multiple_files=True)
 if uploaded_files:
     for uploaded_file in uploaded_files:
         filename = uploaded_file.name
-
-        chunks, vectors = process_pdf(uploaded_file)
-
-        upsert_chunks(qdrant_client, cfg, active_user_id, filename, vectors, chunks)
-
-        st.success(f"{filename} uploaded and stored!")
-
-
-
-docs = list_user_docs(qdrant_client, cfg, active_user_id)
+        # Streamlit reruns the script on every interaction; don't resend what this session already stored
+        upload_key = (active_user_id, file_sha256(uploaded_file.getvalue()), filename)
+        if upload_key in st.session_state["ingested"]:
+            continue
+        progress_bar = st.progress(0.0, text=f"Ingesting {filename}...")
+
+        def report_progress(chunks_done, last_page, total_pages):
+            progress_bar.progress(
+                min(last_page / max(total_pages, 1), 1.0),
+                text=f"Ingesting {filename}: page {last_page}/{total_pages}, {chunks_done} chunks stored",
+            )
+
+        # files already ingested (by any session) are skipped, and only pages whose text
+        # changed since the stored revision are re-embedded
+        summary = backend.ingest(active_user_id, filename, uploaded_file.getvalue(), progress=report_progress)
+        progress_bar.empty()
+        st.session_state["ingested"].add(upload_key)
+        if summary["skipped"]:
+            continue
+
+        if summary["unchanged"]:
+            st.success(
+                f"{filename} updated: {len(summary['changed'])} page(s) changed, "
+                f"{len(summary['removed'])} removed, {summary['unchanged']} unchanged."
+            )
+        else:
+            st.success(f"{filename} uploaded and stored!")
+
+
+
+docs = backend.list_docs(active_user_id)
 for doc_id, fname in docs:
     col1, col2 = st.columns([4,1])
     with col1:
         st.write(f"📄 {fname}")
     with col2:
         if st.button(f"❌", key=f"del_{doc_id}"):
-            delete_document(qdrant_client, cfg, active_user_id, fname)
+            backend.delete(active_user_id, fname)
+            st.session_state["ingested"] = {
+                k for k in st.session_state["ingested"] if not (k[0] == active_user_id and k[2] == fname)
+            }
             st.warning(f"{fname} deleted")
 
 
 
 
-SCORE_THRESHOLD = 0.35  # threshold  changed 
 mode = st.radio(
     "Choose retrieval mode:",
     ["Hybrid (PDF + Web)", "PDF only", "Web only"],
@@ -158,74 +171,55 @@ user_query = st.chat_input("Ask a question:")
 
 
 if user_query:
+    # every traced stage of this turn (embedding, Qdrant, Tavily, Mem0, Gemma) lands here
+    turn_spans = tracing.start_turn()
+
     # Append user message to history and render
     st.session_state["messages"].append({"role": "user", "content": user_query})
     with st.chat_message("user"):
         st.markdown(user_query)
 
-    # Embedding for retrieval
-    query_vector = embedder.embed_texts([user_query])[0]
-
     doc_options = ["All PDFs"] + [fname for _, fname in docs]
     selected_doc = st.selectbox("Search scope:", doc_options)
 
-    # always start with empty context
-    context = []
-
-
-    if mode != "Web only":
-        context = search(
-            qdrant_client, cfg, active_user_id, query_vector,
-            filename=None if selected_doc == "All PDFs" else selected_doc
-        )
+    # answer with combined context + Mem0 user memory; generation_stats fills in as it streams
+    generation_stats = {}
+    # Qdrant, Tavily and Mem0 lookups run concurrently; in hybrid mode the web search
+    # starts speculatively and is dropped when the PDF score clears the threshold.
+    # The answer keeps the recent turns verbatim and summarises older ones within budget.
+    retrieval, answer_stream = backend.answer(
+        active_user_id, user_query,
+        messages=st.session_state["messages"],
+        mode={"PDF only": "pdf", "Web only": "web"}.get(mode, "hybrid"),
+        filename=None if selected_doc == "All PDFs" else selected_doc,
+        window=st.session_state["conversation_window"],
+        stats=generation_stats,
+        session_id=st.session_state["session_id"],
+    )
+    context = retrieval["context"]
+    web_context = retrieval["web_context"]
+
+    if retrieval["used_web"] and mode != "Web only":
+        st.info("Low similarity score — using Tavily results.")
+    if retrieval["degraded"]:
+        st.caption(f"Skipped slow or failing sources: {', '.join(retrieval['degraded'])}")
+    timings = retrieval["timings"]
+    if "rerank" in timings or "rerank_skipped" in timings:
+        if "rerank" in timings:
+            rerank_note = f"re-rank {timings['rerank'] * 1000:.0f} ms"
+        else:
+            rerank_note = "re-rank skipped (over latency budget)"
+        st.caption(f"Qdrant {timings['pdf_search'] * 1000:.0f} ms · {rerank_note}")
 
-    # Check score threshold
-    use_web = False
-
-    if mode == "PDF only":
-        use_web = False
-    elif mode == "Web only":
-        context = []
-        use_web = True
-    else:
-        if not context:
-            use_web = True
-        elif context[0]["score"] < SCORE_THRESHOLD:
-            use_web = True
-
-    web_context = []
-    if use_web:
-        st.info("Low similarity score — fetching Tavily results...")
-        web_results = tavily_tool.run(user_query)[:3]
-
-        web_context = [
-    {
-        "doc_id": "web",
-        "text": snippet.get("content", ""),
-        "score": 1.0
-    }
-    for snippet in web_results
-]
-
-
-   
-    
-
-    # merge contexts
-    final_context = context + web_context
     if mode == "PDF only" and not context:
         st.warning("No relevant content found in your PDFs.")
 
-    # answer with combined context + Mem0 user memory
-    recent_msgs_for_context = st.session_state["messages"]    #[-8:]  # Last 4 turns
-
-    answer = rag_answer(user_query, final_context, active_user_id,recent_messages=recent_msgs_for_context)
-
     # Display qdrant context
     if context:
         with st.expander("📄 PDF context", expanded=False):
             for c in context[:3]:
-                st.write(f"{c['doc_id']} (score={c['score']:.3f})")
+                rerank_note = f", rerank={c['rerank_score']:.3f}" if "rerank_score" in c else ""
+                st.write(f"{c['doc_id']} (score={c['score']:.3f}{rerank_note})")
                 st.write(f"- {c['text']}")
 
     # Display Tavily context
@@ -234,11 +228,25 @@ if user_query:
             for w in web_context[:3]:
                 st.write(f"- {w['text']}")
 
-    # Append assistant answer to history and render
-    st.session_state["messages"].append({"role": "assistant", "content": answer})
+    # Render the answer as it is generated, then append it to history
     with st.chat_message("assistant"):
-        st.markdown(answer)
+        answer = st.write_stream(answer_stream)
+        if generation_stats.get("answer_cache_hit"):
+            st.caption("Answer reused from an identical earlier question on the same context")
+        elif "ttft_s" in generation_stats:
+            prompt_tokens = generation_stats.get("prompt_tokens", {})
+            st.caption(
+                f"First token {generation_stats['ttft_s']:.2f}s · "
+                f"generation {generation_stats['total_s']:.2f}s · "
+                f"prompt ≈{sum(prompt_tokens.values())} tokens "
+                f"({', '.join(f'{k} {v}' for k, v in prompt_tokens.items())})"
+            )
+    st.session_state["messages"].append({"role": "assistant", "content": answer})
+
+    with st.expander("⏱ Timing breakdown", expanded=False):
+        st.caption("Retrieval stages run concurrently, so their times overlap")
+        st.dataframe(
+            [{k: (round(v, 1) if isinstance(v, float) else v) for k, v in s.items()} for s in turn_spans],
+            use_container_width=True,
+        )
 
-    # Send recent messages to Mem0 as memory
-    recent_msgs = st.session_state["messages"][-6:]  # last few turns
-    add_user_memories(active_user_id, recent_msgs)
@@ -1,10 +1,35 @@
-from langchain_community.document_loaders import PyPDFLoader
-from langchain_text_splitters import RecursiveCharacterTextSplitter
-import pdfplumber
+import hashlib
+import itertools
+import multiprocessing
+import os
+import tempfile
+import threading
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
 
-def chunk_pdf_loader(uploaded_file, chunk_size=800, chunk_overlap=200):
-    loader = PyPDFLoader(uploaded_file)
-    document = loader.load()
+from pipeline.extractors import get_extractor
+
+
+def _read_pdf_bytes(uploaded_file):
+    if isinstance(uploaded_file, (str, os.PathLike)):
+        with open(uploaded_file, "rb") as f:
+            return f.read()
+    if hasattr(uploaded_file, "seek"):
+        uploaded_file.seek(0)
+    return uploaded_file.read()
+
+
+def chunk_pdf_loader(uploaded_file, chunk_size=800, chunk_overlap=200, extractor=None):
+    from langchain_core.documents import Document
+    from langchain_text_splitters import RecursiveCharacterTextSplitter
+
+    extractor = get_extractor(extractor)
+    source = uploaded_file if isinstance(uploaded_file, str) else getattr(uploaded_file, "name", "")
+    document = [
+        # same metadata shape as PyPDFLoader (0-based page)
+        Document(page_content=text, metadata={"source": source, "page": page_number - 1})
+        for page_number, text in extractor.iter_pages(_read_pdf_bytes(uploaded_file))
+    ]
 
     print(document)
 
@@ -17,20 +42,126 @@ def chunk_pdf_loader(uploaded_file, chunk_size=800, chunk_overlap=200):
 
 
 
-def chunk_pdf(uploaded_file, chunk_size=800, chunk_overlap=200):
-    docs = []
-    with pdfplumber.open(uploaded_file) as pdf:
-        for i, page in enumerate(pdf.pages):
-            text = page.extract_text() or ""
-            splitter = RecursiveCharacterTextSplitter(
-                chunk_size=chunk_size,
-                chunk_overlap=chunk_overlap
-            )
-            chunks = splitter.split_text(text)
-            for j, chunk in enumerate(chunks):
-                docs.append({"text": chunk, "page": i+1, "chunk_index": j, "filename": uploaded_file.name})
-    return docs
-    # return chunks
+def page_count(uploaded_file, extractor=None):
+    return get_extractor(extractor).page_count(_read_pdf_bytes(uploaded_file))
+
+
+_pools = {}   # worker count -> ProcessPoolExecutor
+_pool_lock = threading.Lock()
+_worker_document = None   # (path, extractor, opened document) last used by this pool worker
+
+
+def _extraction_pool(workers):
+    # one pool per process and worker count, shared by every document of that size
+    # (so a pool is never shut down under a running ingest); spawned, not forked,
+    # since the parent runs model and server threads
+    with _pool_lock:
+        if workers not in _pools:
+            _pools[workers] = ProcessPoolExecutor(max_workers=workers, mp_context=multiprocessing.get_context("spawn"))
+        return _pools[workers]
+
+
+def shutdown_extraction_pools():
+    """
+    Stops every extraction pool; the next parallel extraction starts a fresh one.
+    """
+    with _pool_lock:
+        pools = list(_pools.values())
+        _pools.clear()
+    for pool in pools:
+        pool.shutdown(wait=True)
+
+
+def _extract_page_range(path, extractor, start, end):
+    # consecutive ranges of one document mostly land on the same worker; parse it once there
+    global _worker_document
+    if _worker_document is None or _worker_document[0] != path:
+        if _worker_document is not None:
+            _worker_document[1].close(_worker_document[2])
+        with open(path, "rb") as f:
+            _worker_document = (path, extractor, extractor.open(f.read()))
+    _, extractor, document = _worker_document
+    return [(i + 1, extractor.page_text(document, i)) for i in range(start, end)]
+
+
+def iter_pages_parallel(uploaded_file, workers=None, pages_per_task=8, extractor=None):
+    """
+    Same output as iter_pages, but page ranges are extracted in the process-wide pool.
+    Results are yielded in page order, with at most workers * 2 ranges in flight, so
+    memory stays bounded however long the document is. The PDF is handed to the
+    workers as a temporary file, not pickled into every task.
+    """
+    extractor = get_extractor(extractor)
+    data = _read_pdf_bytes(uploaded_file)
+    total = extractor.page_count(data)
+
+    workers = workers or os.cpu_count() or 1
+    pool = _extraction_pool(workers)
+    ranges = ((start, min(start + pages_per_task, total)) for start in range(0, total, pages_per_task))
+
+    with tempfile.NamedTemporaryFile(suffix=".pdf", delete=False) as f:
+        f.write(data)
+    del data
+    pending = deque()
+    try:
+        for start, end in itertools.islice(ranges, workers * 2):
+            pending.append(pool.submit(_extract_page_range, f.name, extractor, start, end))
+        while pending:
+            pages = pending.popleft().result()
+            for start, end in itertools.islice(ranges, 1):
+                pending.append(pool.submit(_extract_page_range, f.name, extractor, start, end))
+            yield from pages
+    finally:
+        for future in pending:
+            future.cancel()
+        os.remove(f.name)
+
+
+def iter_pages(uploaded_file, workers=1, extractor=None):
+    """
+    Yields (page_number, text) for every page, page numbers starting at 1.
+    Pages are released as soon as their text is extracted, so memory stays flat.
+    With workers > 1 extraction is spread over a process pool (see iter_pages_parallel).
+    `extractor` is a backend name or PageExtractor (see pipeline.extractors), default PDF_EXTRACTOR.
+    """
+    if workers and workers > 1:
+        yield from iter_pages_parallel(uploaded_file, workers, extractor=extractor)
+        return
+
+    yield from get_extractor(extractor).iter_pages(_read_pdf_bytes(uploaded_file))
+
+
+def page_text_hash(text):
+    return hashlib.sha256(text.encode("utf-8")).hexdigest()
+
+
+def iter_chunks(pages, filename, chunk_size=800, chunk_overlap=200):
+    """
+    Lazily splits (page_number, text) pairs into chunk dicts.
+    """
+    # imported here so page extraction (and the extraction worker processes) skip langchain
+    from langchain_text_splitters import RecursiveCharacterTextSplitter
+
+    splitter = RecursiveCharacterTextSplitter(
+        chunk_size=chunk_size,
+        chunk_overlap=chunk_overlap
+    )
+    for page_number, text in pages:
+        for j, chunk in enumerate(splitter.split_text(text)):
+            yield {"text": chunk, "page": page_number, "chunk_index": j, "filename": filename}
+
+
+def chunk_pages(pages, filename, chunk_size=800, chunk_overlap=200):
+    """
+    Splits (page_number, text) pairs into a list of chunk dicts.
+    """
+    return list(iter_chunks(pages, filename, chunk_size, chunk_overlap))
+
+
+def chunk_pdf(uploaded_file, chunk_size=800, chunk_overlap=200, workers=1, extractor=None):
+    return chunk_pages(
+        iter_pages(uploaded_file, workers, extractor), uploaded_file.name, chunk_size, chunk_overlap
+    )
 
 
 
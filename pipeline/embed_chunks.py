@@ -1,8 +1,9 @@
-from fastembed import TextEmbedding
 import numpy as np
 
+from src.model_registry import get_model, get_dimension
+
 def embed_texts(texts, model_name="sentence-transformers/all-MiniLM-L6-v2"):
-    model = TextEmbedding(model_name=model_name)
+    model = get_model("fastembed", model_name)
 
     clean_texts = [
         t if isinstance(t, str)
@@ -19,7 +20,7 @@ def embed_texts(texts, model_name="sentence-transformers/all-MiniLM-L6-v2"):
     return embeddings
 
 def embed_query(query, model_name="sentence-transformers/all-MiniLM-L6-v2"):
-    model = TextEmbedding(model_name=model_name)
+    model = get_model("fastembed", model_name)
     embedding_generator = model.embed([query])
 
     # Extract the embedding from the generator
@@ -30,15 +31,8 @@ def embed_query(query, model_name="sentence-transformers/all-MiniLM-L6-v2"):
 
 
 def get_embedding_size(model_name="sentence-transformers/all-MiniLM-L6-v2"):
-    model = TextEmbedding(model_name=model_name)
-
-    embedding_generator = model.embed(["test"])   #it is a generator
-
-    first_embedding = next(embedding_generator)
-
-    vector_dimension = len(first_embedding)
-
-    return vector_dimension
+    # cached per process; no dummy inference when fastembed knows the model's dim
+    return get_dimension("fastembed", model_name)
 
 if __name__=="__main__":
-    print("Vector Dimension:", get_embedding_size())
\ No newline at end of file
+    print("Vector Dimension:", get_embedding_size())
@@ -0,0 +1,335 @@
+import io
+import multiprocessing
+import os
+import threading
+
+
+DEFAULT_EXTRACTOR = os.environ.get("PDF_EXTRACTOR", "pdfplumber")
+DEFAULT_PAGE_TIMEOUT = float(os.environ.get("PDF_PAGE_TIMEOUT", "20"))
+
+
+class PageExtractor:
+    """
+    Extracts text from PDF bytes page by page.
+    Backends implement open / pages_in / page_text (and close when the opened
+    document holds resources); page indices start at 0, yielded page numbers at 1.
+    """
+    name = ""
+
+    def open(self, data: bytes):
+        """
+        Parses the PDF once and returns the opened document.
+        """
+        raise NotImplementedError
+
+    def pages_in(self, document) -> int:
+        raise NotImplementedError
+
+    def page_text(self, document, index: int) -> str:
+        raise NotImplementedError
+
+    def close(self, document) -> None:
+        pass
+
+    def page_count(self, data: bytes) -> int:
+        document = self.open(data)
+        try:
+            return self.pages_in(document)
+        finally:
+            self.close(document)
+
+    def iter_pages(self, data: bytes, start: int = 0, end: int = None):
+        """
+        Yields (page_number, text) for page indices start..end-1.
+        """
+        document = self.open(data)
+        try:
+            end = self.pages_in(document) if end is None else end
+            for i in range(start, end):
+                yield i + 1, self.page_text(document, i)
+        finally:
+            self.close(document)
+
+
+class PdfPlumberExtractor(PageExtractor):
+    name = "pdfplumber"
+
+    def open(self, data):
+        import pdfplumber
+        return pdfplumber.open(io.BytesIO(data))
+
+    def pages_in(self, document):
+        return len(document.pages)
+
+    def page_text(self, document, index):
+        page = document.pages[index]
+        text = page.extract_text() or ""
+        page.flush_cache()
+        return text
+
+    def close(self, document):
+        document.close()
+
+
+class PypdfExtractor(PageExtractor):
+    name = "pypdf"
+
+    def open(self, data):
+        from pypdf import PdfReader
+        return PdfReader(io.BytesIO(data))
+
+    def pages_in(self, document):
+        return len(document.pages)
+
+    def page_text(self, document, index):
+        return document.pages[index].extract_text() or ""
+
+
+class PdfiumExtractor(PageExtractor):
+    name = "pypdfium2"
+
+    def open(self, data):
+        import pypdfium2 as pdfium
+        return pdfium.PdfDocument(data)
+
+    def pages_in(self, document):
+        return len(document)
+
+    def page_text(self, document, index):
+        page = document[index]
+        textpage = page.get_textpage()
+        text = textpage.get_text_range() or ""
+        textpage.close()
+        page.close()
+        # pdfium uses CRLF line breaks; match the other backends
+        return text.replace("\r\n", "\n")
+
+    def close(self, document):
+        document.close()
+
+
+def _timed_worker(conn, extractor):
+    # long-lived: ("open", data) -> page count, ("page", i) -> text, ("close",), None -> exit
+    document = None
+    try:
+        while True:
+            message = conn.recv()
+            if message is None:
+                return
+            if message[0] == "open":
+                try:
+                    document = extractor.open(message[1])
+                    conn.send(extractor.pages_in(document))
+                except Exception as e:
+                    document = None
+                    conn.send(e)
+            elif message[0] == "page":
+                try:
+                    text = extractor.page_text(document, message[1])
+                except Exception as e:
+                    print(f"{extractor.name}: page {message[1] + 1} failed ({e}), skipped")
+                    text = ""
+                conn.send(text)
+            elif message[0] == "close" and document is not None:
+                extractor.close(document)
+                document = None
+    except EOFError:
+        return
+    finally:
+        if document is not None:
+            extractor.close(document)
+        conn.close()
+
+
+class TimedExtractor(PageExtractor):
+    """
+    Runs another extractor in long-lived worker processes and enforces a per-page
+    time limit. Workers are started with "spawn" (never forked from a process that
+    already runs model and server threads) and kept between documents; each document
+    is sent to a worker and parsed once, then pages are requested by number. A page
+    that exceeds `page_timeout` seconds (or crashes the parser) yields "" and the
+    worker is replaced, re-opening the document, so one pathological page cannot
+    stall ingestion. Concurrent documents each check out their own worker.
+    """
+
+    def __init__(self, inner: PageExtractor, page_timeout: float = DEFAULT_PAGE_TIMEOUT):
+        self.inner = inner
+        self.page_timeout = page_timeout
+        self.name = inner.name
+        self._idle = []   # [process, connection] of workers without an open document
+        self._lock = threading.Lock()
+
+    def __getstate__(self):
+        # pickled into extraction pool processes; they start their own workers
+        return {"inner": self.inner, "page_timeout": self.page_timeout, "name": self.name}
+
+    def __setstate__(self, state):
+        self.__dict__.update(state)
+        self._idle = []
+        self._lock = threading.Lock()
+
+    def _start_worker(self):
+        context = multiprocessing.get_context("spawn")
+        conn, child_conn = context.Pipe()
+        proc = context.Process(target=_timed_worker, args=(child_conn, self.inner), daemon=True)
+        proc.start()
+        child_conn.close()
+        return [proc, conn]
+
+    @staticmethod
+    def _stop_worker(worker):
+        proc, conn = worker
+        conn.close()
+        if proc.is_alive():
+            proc.kill()
+        proc.join()
+
+    def _open_in(self, worker, data):
+        worker[1].send(("open", data))
+        reply = worker[1].recv()
+        if isinstance(reply, Exception):
+            raise reply
+        return reply
+
+    def open(self, data):
+        with self._lock:
+            worker = self._idle.pop() if self._idle else None
+        if worker is None or not worker[0].is_alive():
+            worker = self._start_worker()
+        try:
+            pages = self._open_in(worker, data)
+        except Exception:
+            self._stop_worker(worker)
+            raise
+        return {"worker": worker, "data": data, "pages": pages}
+
+    def pages_in(self, document):
+        return document["pages"]
+
+    def page_text(self, document, index):
+        conn = document["worker"][1]
+        try:
+            conn.send(("page", index))
+            if conn.poll(self.page_timeout):
+                return conn.recv()
+            print(f"{self.name}: page {index + 1} exceeded {self.page_timeout}s, skipped")
+        except (EOFError, OSError):
+            print(f"{self.name}: parser crashed on page {index + 1}, skipped")
+        self._stop_worker(document["worker"])
+        document["worker"] = self._start_worker()
+        self._open_in(document["worker"], document["data"])
+        return ""
+
+    def close(self, document):
+        worker = document.pop("worker", None)
+        if worker is None:
+            return
+        try:
+            worker[1].send(("close",))
+        except OSError:
+            self._stop_worker(worker)
+            return
+        with self._lock:
+            self._idle.append(worker)
+
+
+def looks_garbled(text: str) -> bool:
+    """
+    Heuristic for pages where a fast parser produced nothing useful:
+    empty text, unmapped glyphs ("(cid:12)"), replacement characters, or mostly symbols.
+    """
+    stripped = text.strip()
+    if not stripped:
+        return True
+    if stripped.count("(cid:") * 8 > len(stripped) * 0.1:
+        return True
+    if stripped.count("\ufffd") > len(stripped) * 0.05:
+        return True
+    readable = sum(1 for ch in stripped if ch.isalnum() or ch.isspace())
+    return readable < len(stripped) * 0.6
+
+
+class FallbackExtractor(PageExtractor):
+    """
+    Uses a fast extractor for every page and re-extracts only the pages where it
+    returned empty or garbled text with a heavier fallback. The fallback parses the
+    document once, on the first bad page.
+    """
+
+    def __init__(self, primary: PageExtractor, fallback: PageExtractor):
+        self.primary = primary
+        self.fallback = fallback
+        self.name = f"{primary.name}+{fallback.name}"
+
+    def open(self, data):
+        return {"data": data, "primary": self.primary.open(data), "fallback": None}
+
+    def pages_in(self, document):
+        return self.primary.pages_in(document["primary"])
+
+    def page_text(self, document, index):
+        text = self.primary.page_text(document["primary"], index)
+        if looks_garbled(text):
+            if document["fallback"] is None:
+                document["fallback"] = self.fallback.open(document["data"])
+            fallback_text = self.fallback.page_text(document["fallback"], index)
+            if fallback_text.strip():
+                text = fallback_text
+        return text
+
+    def close(self, document):
+        self.primary.close(document["primary"])
+        if document["fallback"] is not None:
+            self.fallback.close(document["fallback"])
+
+
+EXTRACTORS = {
+    "pdfplumber": PdfPlumberExtractor,
+    "pypdf": PypdfExtractor,
+    "pypdfium2": PdfiumExtractor,
+}
+
+
+def _fastest_available() -> PageExtractor:
+    try:
+        import pypdfium2  # noqa: F401
+        return PdfiumExtractor()
+    except ImportError:
+        return PypdfExtractor()
+
+
+# timed extractors keep their worker processes, so one instance per setting is shared
+_timed_extractors = {}
+_timed_extractors_lock = threading.Lock()
+
+
+def _timed(name, extractor, page_timeout):
+    with _timed_extractors_lock:
+        key = (name, page_timeout)
+        if key not in _timed_extractors:
+            _timed_extractors[key] = TimedExtractor(extractor, page_timeout)
+        return _timed_extractors[key]
+
+
+def get_extractor(name: str = None, page_timeout: float = DEFAULT_PAGE_TIMEOUT) -> PageExtractor:
+    """
+    Returns an extractor by name: "pdfplumber" (default), "pypdf", "pypdfium2", or
+    "auto" (fastest installed parser with pdfplumber fallback for bad pages).
+    A PageExtractor instance is returned unchanged.
+    page_timeout > 0 enforces a per-page time limit in worker processes; 0/None disables it.
+    """
+    if isinstance(name, PageExtractor):
+        return name
+    name = name or DEFAULT_EXTRACTOR
+    if name == "auto":
+        primary = _fastest_available()
+        fallback = PdfPlumberExtractor()
+        if page_timeout:
+            primary = _timed(primary.name, primary, page_timeout)
+            fallback = _timed(fallback.name, fallback, page_timeout)
+        return FallbackExtractor(primary, fallback)
+
+    if name not in EXTRACTORS:
+        raise ValueError(f"Unknown PDF extractor '{name}', choose from {sorted(EXTRACTORS)} or 'auto'")
+    extractor = EXTRACTORS[name]()
+    return _timed(name, extractor, page_timeout) if page_timeout else extractor
@@ -0,0 +1,80 @@
+from pipeline.chunk_pdf import iter_pages, page_text_hash, iter_chunks
+from pipeline.stream_ingest import stream_ingest
+from qdrant_operations import get_page_hashes, delete_stale_pages, register_document
+
+
+def _size_of(uploaded_file):
+    if hasattr(uploaded_file, "getbuffer"):
+        return uploaded_file.getbuffer().nbytes
+    return getattr(uploaded_file, "size", None)
+
+
+def reingest_document(
+    client,
+    cfg,
+    embedder,
+    user_id,
+    uploaded_file,
+    chunk_size=800,
+    chunk_overlap=200,
+    batch_size=64,
+    progress=None,
+    workers=1,
+):
+    """
+    Diff-based (re-)ingest of a PDF.
+
+    Hashes each page's extracted text and compares it with the page_hash stored in the
+    Qdrant payload. Only changed/new pages are chunked, embedded and upserted; points of
+    removed pages (and leftover chunks of changed pages) are deleted. A document that is
+    not stored yet simply has every page "changed", so this is also the first-ingest path.
+
+    Changed pages are streamed through `stream_ingest`, so memory stays bounded however
+    large the PDF is. `progress(chunks_done, last_page)` is forwarded to it.
+    `workers` > 1 extracts page text in a process pool.
+
+    The document's registry entry is written once, at the end.
+
+    Returns a summary dict with the changed / removed / unchanged page numbers, the
+    chunks written by this run ("chunks") and the document's chunks in all ("total_chunks").
+    """
+    filename = uploaded_file.name
+    stored_hashes = get_page_hashes(client, cfg, user_id, filename)
+    new_hashes = {}
+    changed = []
+
+    def changed_pages():
+        for page, text in iter_pages(uploaded_file, workers):
+            new_hashes[page] = page_text_hash(text)
+            if stored_hashes.get(page) != new_hashes[page]:
+                changed.append(page)
+                yield page, text
+
+    def hashed_chunks():
+        for chunk in iter_chunks(changed_pages(), filename, chunk_size, chunk_overlap):
+            chunk["page_hash"] = new_hashes[chunk["page"]]
+            yield chunk
+
+    chunk_count = stream_ingest(
+        client, cfg, embedder, user_id, filename, hashed_chunks(),
+        batch_size=batch_size, progress=progress,
+    )
+
+    removed = [page for page in stored_hashes if page not in new_hashes]
+
+    # upsert first, then drop what is stale, so unchanged content is never missing
+    # per page: a changed page keeps only chunks with its own new hash, a removed page keeps none
+    keep = {page: new_hashes[page] for page in changed}
+    keep.update({page: None for page in removed})
+    delete_stale_pages(client, cfg, user_id, filename, keep)
+
+    # one registry write per ingest, with the final chunk and page counts
+    entry = register_document(client, cfg, user_id, filename, pages=len(new_hashes), bytes=_size_of(uploaded_file))
+
+    return {
+        "changed": changed,
+        "removed": removed,
+        "unchanged": len(new_hashes) - len(changed),
+        "chunks": chunk_count,
+        "total_chunks": entry["chunks"],
+    }
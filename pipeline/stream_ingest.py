@@ -0,0 +1,118 @@
+import queue
+import threading
+
+from qdrant_operations import upsert_chunks
+
+
+_DONE = object()
+
+
+class _StageError:
+    def __init__(self, exc):
+        self.exc = exc
+
+
+def _put(q, item, stop):
+    # bounded put that gives up once the consumer has failed
+    while not stop.is_set():
+        try:
+            q.put(item, timeout=0.1)
+            return True
+        except queue.Full:
+            continue
+    return False
+
+
+def _batch_stage(chunks, batch_size, out_q, stop):
+    try:
+        batch = []
+        for chunk in chunks:
+            batch.append(chunk)
+            if len(batch) == batch_size:
+                if not _put(out_q, batch, stop):
+                    return
+                batch = []
+        if batch:
+            _put(out_q, batch, stop)
+        _put(out_q, _DONE, stop)
+    except Exception as e:
+        _put(out_q, _StageError(e), stop)
+
+
+def _embed_stage(embedder, in_q, out_q, stop):
+    try:
+        while not stop.is_set():
+            try:
+                batch = in_q.get(timeout=0.1)
+            except queue.Empty:
+                continue
+            if batch is _DONE or isinstance(batch, _StageError):
+                _put(out_q, batch, stop)
+                return
+            vectors = embedder.embed_texts([c["text"] for c in batch])
+            if not _put(out_q, (batch, vectors), stop):
+                return
+    except Exception as e:
+        _put(out_q, _StageError(e), stop)
+
+
+def stream_ingest(
+    client,
+    cfg,
+    embedder,
+    user_id,
+    filename,
+    chunks,
+    batch_size=64,
+    queue_size=4,
+    progress=None,
+):
+    """
+    Bounded-memory ingestion: chunks -> embed -> upsert.
+
+    `chunks` may be any iterable (typically a generator reading the PDF page by page).
+    Stages run in their own threads connected by queues of at most `queue_size` batches,
+    so at most ~(2 * queue_size + 2) * batch_size chunks/vectors are alive at once,
+    regardless of document size. Embedding runs in fixed-size batches and upserts are
+    pipelined with wait=False; only the final batch waits, so every point is applied
+    when this returns.
+
+    progress(chunks_done, last_page) is called after each batch is sent.
+    Returns the number of chunks upserted.
+    """
+    chunk_q = queue.Queue(maxsize=queue_size)
+    vector_q = queue.Queue(maxsize=queue_size)
+    stop = threading.Event()
+
+    workers = [
+        threading.Thread(target=_batch_stage, args=(chunks, batch_size, chunk_q, stop), daemon=True),
+        threading.Thread(target=_embed_stage, args=(embedder, chunk_q, vector_q, stop), daemon=True),
+    ]
+    for w in workers:
+        w.start()
+
+    done = 0
+    pending = None  # hold one batch back so the last upsert can be sent with wait=True
+    try:
+        while True:
+            item = vector_q.get()
+            if item is _DONE:
+                break
+            if isinstance(item, _StageError):
+                raise item.exc
+            if pending is not None:
+                done += upsert_chunks(client, cfg, user_id, filename, pending[1], pending[0], wait=False)
+                if progress:
+                    progress(done, pending[0][-1]["page"])
+            pending = item
+
+        if pending is not None:
+            done += upsert_chunks(client, cfg, user_id, filename, pending[1], pending[0], wait=True)
+            if progress:
+                progress(done, pending[0][-1]["page"])
+    finally:
+        stop.set()
+        for w in workers:
+            w.join()
+
+    return done
@@ -1,8 +1,40 @@
+from datetime import datetime, timezone
 from typing import List, Dict, Optional, Tuple
 from qdrant_client import QdrantClient
 from qdrant_client.http import models
+from qdrant_client.http.exceptions import ResponseHandlingException, UnexpectedResponse
+import functools
+import os
+import random
+import threading
+import time
 import uuid
 
+import httpx
+import numpy as np
+
+from src.sparse_encoder import BM25SparseEncoder, exact_match_terms, tokenize
+from src.tracing import traced
+
+sparse_encoder = BM25SparseEncoder()
+
+
+# callables (user_id, filename) run after a user's stored documents change,
+# e.g. to invalidate answers cached against the old content
+_document_change_listeners = []
+
+
+def on_documents_changed(listener) -> None:
+    _document_change_listeners.append(listener)
+
+
+def _notify_documents_changed(user_id: str, filename: str) -> None:
+    for listener in _document_change_listeners:
+        try:
+            listener(user_id, filename)
+        except Exception as e:
+            print(f"Document change listener failed: {e}")
+
 
 class QdrantConfig:
     def __init__(
@@ -12,132 +44,566 @@ class QdrantConfig:
         collection_name: str = "all_user_docs", 
         vector_size: int = 384,                    
         distance: str = "Cosine",     
+        sparse_vector_name: Optional[str] = None,   # e.g. "bm25" to enable hybrid search
+        quantization: Optional[str] = None,         # None, "scalar" (int8) or "binary"
+        on_disk: bool = False,                      # keep original float32 vectors on disk (mmap)
+        rescore: bool = True,                       # re-score quantized candidates with the originals
+        oversampling: float = 2.0,                  # fetch limit * oversampling candidates before rescoring
+        hnsw_m: int = 0,                            # 0: no global graph, only per-tenant graphs
+        hnsw_payload_m: int = 16,                   # links per node in the per-tenant (user_id) graphs
+        hnsw_ef: Optional[int] = None,              # search-time ef; None uses Qdrant's default
+        prefer_grpc: bool = False,                  # gRPC transport (port grpc_port) instead of REST
+        grpc_port: int = 6334,
+        timeout: int = 10,                          # seconds per request
+        pool_size: int = 32,                        # pooled HTTP connections per client
+        retries: int = 3,                           # extra attempts on transient errors
+        retry_backoff: float = 0.2,                 # base delay (s), doubled per attempt, fully jittered
     ):
         self.url = url
         self.api_key = api_key
         self.collection_name = collection_name
         self.vector_size = vector_size
         self.distance = distance
+        self.sparse_vector_name = sparse_vector_name
+        if quantization not in (None, "scalar", "binary"):
+            raise ValueError(f"Unknown quantization '{quantization}', choose from None, 'scalar', 'binary'")
+        self.quantization = quantization
+        self.on_disk = on_disk
+        self.rescore = rescore
+        self.oversampling = oversampling
+        self.hnsw_m = hnsw_m
+        self.hnsw_payload_m = hnsw_payload_m
+        self.hnsw_ef = hnsw_ef
+        self.prefer_grpc = prefer_grpc
+        self.grpc_port = grpc_port
+        self.timeout = timeout
+        self.pool_size = pool_size
+        self.retries = retries
+        self.retry_backoff = retry_backoff
+
+
+def config_from_env(vector_size: int = 384) -> QdrantConfig:
+    return QdrantConfig(
+        url=os.environ.get("QDRANT_CONSOLE_URL"),
+        api_key=os.environ.get("QDRANT_API_KEY"),
+        collection_name="all_user_docs",
+        vector_size=vector_size,              # match your embedding model
+        distance="Cosine",                    # or "Dot" / "Euclid"
+        # set (e.g. "bm25") to add BM25 sparse vectors and fuse them with dense search;
+        # only applies to a newly created collection
+        sparse_vector_name=os.environ.get("QDRANT_SPARSE_VECTOR") or None,
+        # memory vs recall trade-offs; apply to an existing collection with `python init_qdrant.py --migrate`
+        quantization=os.environ.get("QDRANT_QUANTIZATION") or None,   # "scalar" or "binary"
+        on_disk=os.environ.get("QDRANT_ON_DISK", "0") == "1",
+        oversampling=float(os.environ.get("QDRANT_OVERSAMPLING", "2.0")),
+        prefer_grpc=os.environ.get("QDRANT_PREFER_GRPC", "0") == "1",
+        timeout=int(os.environ.get("QDRANT_TIMEOUT", "10")),
+        retries=int(os.environ.get("QDRANT_RETRIES", "3")),
+    )
+
+
+# HTTP statuses / gRPC codes worth retrying: overload and brief unavailability
+TRANSIENT_STATUS = {429, 502, 503, 504}
+TRANSIENT_GRPC_CODES = {"UNAVAILABLE", "DEADLINE_EXCEEDED", "RESOURCE_EXHAUSTED"}
+
+
+def is_transient(error: Exception) -> bool:
+    if isinstance(error, ResponseHandlingException):   # connection errors and timeouts
+        return True
+    if isinstance(error, UnexpectedResponse):
+        return error.status_code in TRANSIENT_STATUS
+    code = getattr(error, "code", None)                # grpc.RpcError
+    if callable(code):
+        try:
+            return code().name in TRANSIENT_GRPC_CODES
+        except Exception:
+            return False
+    return False
+
+
+class RetryingClient:
+    """
+    Wraps a QdrantClient: every method call is retried up to
+    `retries` times on transient errors, sleeping a random 0..backoff * 2**attempt
+    seconds in between so callers that failed together don't retry together.
+    Other attributes pass straight through.
+    """
+
+    def __init__(self, client, retries: int = 3, backoff: float = 0.2):
+        self.client = client
+        self.retries = retries
+        self.backoff = backoff
+
+    def _delay(self, name, attempt, error):
+        delay = random.uniform(0, self.backoff * 2 ** attempt)
+        print(f"Qdrant {name} failed ({error}); retry {attempt + 1}/{self.retries} in {delay:.2f}s")
+        return delay
+
+    def __getattr__(self, name):
+        attr = getattr(self.client, name)
+        if not callable(attr):
+            return attr
 
+        @functools.wraps(attr)
+        def call(*args, **kwargs):
+            for attempt in range(self.retries + 1):
+                try:
+                    return attr(*args, **kwargs)
+                except Exception as e:
+                    if attempt == self.retries or not is_transient(e):
+                        raise
+                    time.sleep(self._delay(name, attempt, e))
+        return call
+
+
+_clients = {}
+_clients_lock = threading.Lock()
+
+
+def _shared_client(client_class, cfg: QdrantConfig):
+    key = (client_class.__name__, cfg.url, cfg.api_key, cfg.prefer_grpc, cfg.grpc_port, cfg.timeout)
+    with _clients_lock:
+        if key not in _clients:
+            client = client_class(
+                url=cfg.url,
+                api_key=cfg.api_key,
+                prefer_grpc=cfg.prefer_grpc,
+                grpc_port=cfg.grpc_port,
+                timeout=cfg.timeout,
+                # one keep-alive pool shared by every caller (REST; gRPC multiplexes one channel)
+                limits=httpx.Limits(max_connections=cfg.pool_size, max_keepalive_connections=cfg.pool_size),
+            )
+            _clients[key] = RetryingClient(client, cfg.retries, cfg.retry_backoff)
+        return _clients[key]
 
 
 def get_qdrant_client(cfg: QdrantConfig) -> QdrantClient:
-    return QdrantClient(url=cfg.url, api_key=cfg.api_key)
+    """
+    The process-wide client for cfg's server and transport, created on first use
+    and shared by every caller (it is thread-safe), with retries on transient errors.
+    """
+    return _shared_client(QdrantClient, cfg)
 
 
-def ensure_collection(client: QdrantClient, cfg: QdrantConfig) -> None:
+def quantization_config(cfg: QdrantConfig):
     """
-    Ensure collection exists with given vector configuration.
+    Qdrant quantization config for cfg.quantization. Quantized vectors always stay
+    in RAM; only the originals move to disk with cfg.on_disk.
     """
-    try:
-        client.get_collection(cfg.collection_name)
-    except Exception:
-        client.create_collection(
-            collection_name=cfg.collection_name,
-            vectors_config=models.VectorParams(
-                size=cfg.vector_size,
-                distance=models.Distance(cfg.distance),
-            ),
-            hnsw_config=models.HnswConfigDiff(        
-                payload_m=16,
-                m=0,    
-            ),
+    if cfg.quantization == "scalar":
+        return models.ScalarQuantization(
+            scalar=models.ScalarQuantizationConfig(
+                type=models.ScalarType.INT8,
+                quantile=0.99,
+                always_ram=True,
+            )
         )
+    if cfg.quantization == "binary":
+        return models.BinaryQuantization(binary=models.BinaryQuantizationConfig(always_ram=True))
+    return None
+
+
+def search_params(cfg: QdrantConfig) -> Optional[models.SearchParams]:
+    if not cfg.quantization and cfg.hnsw_ef is None:
+        return None
+    return models.SearchParams(
+        hnsw_ef=cfg.hnsw_ef,
+        quantization=models.QuantizationSearchParams(
+            ignore=False,
+            rescore=cfg.rescore,
+            oversampling=cfg.oversampling,
+        ) if cfg.quantization else None,
+    )
+
+
+# (id(client), collection name) pairs already checked by ensure_collection
+_ensured = set()
+# ...and those whose existing collection could not take the sparse vector
+_dense_only = set()
+_ensured_lock = threading.Lock()
+
+
+def ensure_collection(client: QdrantClient, cfg: QdrantConfig, recreate: bool = False) -> None:
+    """
+    Ensure collection (and its document registry) exists with given vector configuration.
+    The check runs once per client and collection in a process; recreate=True drops
+    an existing collection first (benchmarks). A registry missing next to an existing
+    collection is created and backfilled from the stored chunks.
+    """
+    key = (id(client), cfg.collection_name)
+    registry = registry_collection(cfg)
+    with _ensured_lock:
+        if key in _ensured and not recreate:
+            if key in _dense_only:
+                cfg.sparse_vector_name = None
+            return
+        _dense_only.discard(key)
+        if recreate:
+            for name in (cfg.collection_name, registry):
+                if client.collection_exists(name):
+                    client.delete_collection(name)
+        existed = client.collection_exists(cfg.collection_name)
+        if not existed:
+            _create_collection(client, cfg)
+        elif cfg.sparse_vector_name and not _ensure_sparse_vector(client, cfg):
+            _dense_only.add(key)
+            cfg.sparse_vector_name = None
+        if not client.collection_exists(registry):
+            _create_registry(client, cfg)
+            if existed:
+                backfill_registry(client, cfg)
+        _ensured.add(key)
+
+
+def drop_collection(client: QdrantClient, cfg: QdrantConfig) -> None:
+    """
+    Deletes a collection together with its registry (scratch collections in benchmarks).
+    """
+    with _ensured_lock:
+        for name in (cfg.collection_name, registry_collection(cfg)):
+            if client.collection_exists(name):
+                client.delete_collection(name)
+        _ensured.discard((id(client), cfg.collection_name))
+        _dense_only.discard((id(client), cfg.collection_name))
+
 
-        # Create tenant payload index on "user_id"
-        client.create_payload_index(
+def _ensure_sparse_vector(client: QdrantClient, cfg: QdrantConfig) -> bool:
+    """
+    Adds cfg.sparse_vector_name to an existing collection created without it, so
+    upserts and searches that name it don't fail. Returns False if the collection
+    can't take it; the caller then falls back to dense-only search.
+    """
+    params = client.get_collection(cfg.collection_name).config.params
+    if cfg.sparse_vector_name in (params.sparse_vectors or {}):
+        return True
+    try:
+        client.update_collection(
             collection_name=cfg.collection_name,
-            field_name="user_id",
-            field_schema=models.KeywordIndexParams(
-                type=models.KeywordIndexType.KEYWORD,
-                is_tenant=True,   
-            ),
+            sparse_vectors_config={
+                cfg.sparse_vector_name: models.SparseVectorParams(modifier=models.Modifier.IDF),
+            },
         )
+    except Exception as e:
+        print(f"WARNING: collection '{cfg.collection_name}' has no sparse vector "
+              f"'{cfg.sparse_vector_name}' and it could not be added ({e}); "
+              f"QDRANT_SPARSE_VECTOR is ignored and search is dense-only")
+        return False
+    print(f"WARNING: added sparse vector '{cfg.sparse_vector_name}' to collection "
+          f"'{cfg.collection_name}'; chunks stored before now have none until they are re-ingested")
+    return True
+
+
+def _create_collection(client: QdrantClient, cfg: QdrantConfig) -> None:
+    client.create_collection(
+        collection_name=cfg.collection_name,
+        vectors_config=models.VectorParams(
+            size=cfg.vector_size,
+            distance=models.Distance(cfg.distance),
+            on_disk=cfg.on_disk,
+        ),
+        quantization_config=quantization_config(cfg),
+        hnsw_config=models.HnswConfigDiff(        
+            payload_m=cfg.hnsw_payload_m,
+            m=cfg.hnsw_m,    
+        ),
+        # IDF is computed by Qdrant, so the local BM25 encoder needs no corpus stats
+        sparse_vectors_config={
+            cfg.sparse_vector_name: models.SparseVectorParams(modifier=models.Modifier.IDF),
+        } if cfg.sparse_vector_name else None,
+    )
+
+    # Create tenant payload index on "user_id"
+    client.create_payload_index(
+        collection_name=cfg.collection_name,
+        field_name="user_id",
+        field_schema=models.KeywordIndexParams(
+            type=models.KeywordIndexType.KEYWORD,
+            is_tenant=True,   
+        ),
+    )
+
+    
+    client.create_payload_index(
+        collection_name=cfg.collection_name,
+        field_name="doc_id",
+        field_schema=models.KeywordIndexParams(
+            type=models.KeywordIndexType.KEYWORD,
+        ),
+    )
+
+
+
+def registry_collection(cfg: QdrantConfig) -> str:
+    return f"{cfg.collection_name}_registry"
+
+
+def _create_registry(client: QdrantClient, cfg: QdrantConfig) -> None:
+    # one vectorless point per (user, document); listing a user's documents reads only these
+    client.create_collection(collection_name=registry_collection(cfg), vectors_config={})
+    client.create_payload_index(
+        collection_name=registry_collection(cfg),
+        field_name="user_id",
+        field_schema=models.KeywordIndexParams(
+            type=models.KeywordIndexType.KEYWORD,
+            is_tenant=True,
+        ),
+    )
+
+
+def migrate_collection(client: QdrantClient, cfg: QdrantConfig) -> None:
+    """
+    Applies cfg's quantization and on_disk settings to an existing collection in
+    place. Qdrant rebuilds the affected segments in the background; the collection
+    keeps serving queries meanwhile.
+    """
+    client.update_collection(
+        collection_name=cfg.collection_name,
+        vectors_config={"": models.VectorParamsDiff(on_disk=cfg.on_disk)},
+        quantization_config=quantization_config(cfg) or models.Disabled.DISABLED,
+    )
+
+
+def chunk_point_id(user_id: str, filename: str, page: int, chunk_index: int) -> str:
+    """
+    Deterministic point ID for a chunk, so re-uploading a document overwrites its points
+    instead of adding copies.
+    """
+    return str(uuid.uuid5(uuid.NAMESPACE_URL, f"{user_id}/{filename}/{page}/{chunk_index}"))
+
+
+def document_point_id(user_id: str, filename: str) -> str:
+    """
+    Registry point ID of a document.
+    """
+    return str(uuid.uuid5(uuid.NAMESPACE_URL, f"{user_id}/{filename}"))
+
+
+def _doc_filter(user_id: str, filename: str) -> models.Filter:
+    return models.Filter(
+        must=[
+            models.FieldCondition(key="user_id", match=models.MatchValue(value=user_id)),
+            models.FieldCondition(key="doc_id", match=models.MatchValue(value=filename)),
+        ]
+    )
+
 
-        
-        client.create_payload_index(
+def register_document(
+    client: QdrantClient,
+    cfg: QdrantConfig,
+    user_id: str,
+    filename: str,
+    **fields,
+) -> None:
+    """
+    Creates or refreshes a document's registry entry: filename, chunk count (an indexed
+    count of its points), ingest time, plus any `fields` given (pages, bytes).
+    Fields not given keep their stored values. Returns the stored entry.
+    """
+    point_id = document_point_id(user_id, filename)
+    existing = client.retrieve(collection_name=registry_collection(cfg), ids=[point_id], with_payload=True)
+    payload = dict(existing[0].payload or {}) if existing else {"pages": None, "bytes": None}
+    payload.update(
+        user_id=user_id,
+        doc_id=filename,
+        filename=filename,
+        chunks=client.count(
+            collection_name=cfg.collection_name, count_filter=_doc_filter(user_id, filename), exact=True,
+        ).count,
+        ingested_at=datetime.now(timezone.utc).isoformat(),
+        **fields,
+    )
+    client.upsert(
+        collection_name=registry_collection(cfg),
+        points=[models.PointStruct(id=point_id, vector={}, payload=payload)],
+        wait=True,
+    )
+    return payload
+
+
+def get_document(
+    client: QdrantClient,
+    cfg: QdrantConfig,
+    user_id: str,
+    filename: str,
+) -> Optional[Dict]:
+    """
+    The document's registry entry, or None if it isn't stored.
+    """
+    points = client.retrieve(
+        collection_name=registry_collection(cfg), ids=[document_point_id(user_id, filename)], with_payload=True,
+    )
+    return points[0].payload if points and points[0].payload else None
+
+
+def backfill_registry(client: QdrantClient, cfg: QdrantConfig, batch_size: int = 1000) -> int:
+    """
+    Rebuilds registry entries from the chunks already stored (documents ingested before
+    the registry existed). Scrolls the whole collection once, fetching only the id
+    fields and page numbers. Returns the number of documents registered.
+    """
+    docs: Dict[Tuple[str, str], Dict] = {}
+    offset = None
+    while True:
+        points, offset = client.scroll(
             collection_name=cfg.collection_name,
-            field_name="doc_id",
-            field_schema=models.KeywordIndexParams(
-                type=models.KeywordIndexType.KEYWORD,
-            ),
+            limit=batch_size,
+            offset=offset,
+            with_payload=models.PayloadSelectorInclude(include=["user_id", "doc_id", "filename", "page"]),
+            with_vectors=False,
         )
+        for p in points:
+            payload = p.payload or {}
+            if not payload.get("user_id") or not payload.get("doc_id"):
+                continue
+            doc = docs.setdefault(
+                (payload["user_id"], payload["doc_id"]),
+                {"filename": payload.get("filename") or payload["doc_id"], "chunks": 0, "pages": set()},
+            )
+            doc["chunks"] += 1
+            if payload.get("page") is not None:
+                doc["pages"].add(payload["page"])
+        if offset is None:
+            break
 
+    points = [
+        models.PointStruct(
+            id=document_point_id(user_id, doc_id),
+            vector={},
+            payload={
+                "user_id": user_id,
+                "doc_id": doc_id,
+                "filename": doc["filename"],
+                "chunks": doc["chunks"],
+                "pages": len(doc["pages"]) or None,
+                "bytes": None,
+                "ingested_at": None,
+            },
+        )
+        for (user_id, doc_id), doc in docs.items()
+    ]
+    for i in range(0, len(points), batch_size):
+        client.upsert(collection_name=registry_collection(cfg), points=points[i:i + batch_size], wait=True)
+    print(f"Registry backfilled: {len(points)} documents")
+    return len(points)
 
 
+@traced("qdrant.upsert", result_size=int)
 def upsert_chunks(
     client: QdrantClient,
     cfg: QdrantConfig,
     user_id: str,
     filename: str,
     vectors: List[List[float]],
-    chunks: List[str],
+    chunks: List[Dict],
+    wait: bool = True,
 ) -> int:
     """
     Upserts chunks into Qdrant with payload partitioning
-    Uses user_id + filename as identifiers
+    Uses user_id + filename as identifiers; point IDs are derived from
+    user_id/filename/page/chunk so repeated upserts are idempotent.
+    Callers register the document (register_document) once all its chunks are written.
     """
     points = []
+    encoder = sparse_encoder if cfg.sparse_vector_name else None
     for i, (vec, chunk) in enumerate(zip(vectors, chunks)):
-        point_id = str(uuid.uuid4())  
+        chunk_index = chunk.get("chunk_index", i)
+        point_id = chunk_point_id(user_id, filename, chunk["page"], chunk_index)
+        payload = {
+            "user_id": user_id,
+            "doc_id": filename,
+            "filename": filename,
+            "page": chunk["page"],
+            "chunk_index": chunk_index,
+            "text": chunk["text"],
+        }
+        if "page_hash" in chunk:
+            payload["page_hash"] = chunk["page_hash"]
+        vector = vec.tolist() if hasattr(vec, "tolist") else vec
+        if encoder is not None:
+            indices, values = encoder.encode_document(chunk["text"])
+            vector = {
+                "": vector,
+                cfg.sparse_vector_name: models.SparseVector(indices=indices, values=values),
+            }
         points.append(
             models.PointStruct(
                 id=point_id,
-                vector=vec,
-                payload={
-                    "user_id": user_id,
-                    "doc_id": filename,  
-                    "filename": filename,
-                    "page": chunk["page"],
-                    "chunk_index": i,
-                    "text": chunk["text"],
-                },
+                vector=vector,
+                payload=payload,
             )
         )
-    client.upsert(collection_name=cfg.collection_name, points=points, wait=True)
+    if not points:
+        return 0
+    client.upsert(collection_name=cfg.collection_name, points=points, wait=wait)
+    _notify_documents_changed(user_id, filename)
     return len(points)
 
 
 
-def list_user_docs(
+def get_page_hashes(
     client: QdrantClient,
     cfg: QdrantConfig,
     user_id: str,
-    limit: int = 1000,
-) -> List[Tuple[str, str]]:
+    filename: str,
+    batch_size: int = 1000,
+) -> Dict[int, Optional[str]]:
     """
-    Returns (doc_id, filename) pairs for user's stored docs
+    Returns {page: page_hash} for a stored document.
+    Only the page fields are fetched, never the chunk text or vectors.
+    Points stored before page hashing existed map to None.
     """
-    scroll_res = client.scroll(
-        collection_name=cfg.collection_name,
-        scroll_filter=models.Filter(
-            must=[models.FieldCondition(key="user_id", match=models.MatchValue(value=user_id))]
-        ),
-        limit=limit,
-        with_payload=True,
-    )
-    points = scroll_res[0] if isinstance(scroll_res, tuple) else scroll_res
-    seen: Dict[str, str] = {}
-    for p in points:
-        payload = p.payload or {}
-        did = payload.get("doc_id")
-        fname = payload.get("filename")
-        if did and did not in seen:
-            seen[did] = fname or did
-    return [(did, seen[did]) for did in seen]
-
+    doc_filter = _doc_filter(user_id, filename)
+    hashes: Dict[int, Optional[str]] = {}
+    offset = None
+    while True:
+        points, offset = client.scroll(
+            collection_name=cfg.collection_name,
+            scroll_filter=doc_filter,
+            limit=batch_size,
+            offset=offset,
+            with_payload=models.PayloadSelectorInclude(include=["page", "page_hash"]),
+            with_vectors=False,
+        )
+        for p in points:
+            payload = p.payload or {}
+            page = payload.get("page")
+            if page is None:
+                continue
+            # a page with any legacy (unhashed) chunk must be treated as changed
+            if page in hashes and hashes[page] != payload.get("page_hash"):
+                hashes[page] = None
+            else:
+                hashes.setdefault(page, payload.get("page_hash"))
+        if offset is None:
+            break
+    return hashes
 
 
-def delete_document(
+def delete_stale_pages(
     client: QdrantClient,
     cfg: QdrantConfig,
     user_id: str,
     filename: str,
+    keep: Dict[int, Optional[str]],
 ) -> None:
     """
-    Deletes all points for given user_id + filename (doc_id).
+    For each {page: page_hash} in `keep`, deletes that page's points unless they carry
+    that page's own hash (None deletes the whole page). Used after an incremental upsert
+    to drop removed pages and leftover chunks of changed pages. Hashes are matched per
+    page, so an old chunk survives only on the page whose new text it belongs to.
     """
-    print("DELETING...")
+    if not keep:
+        return
+    stale = []
+    for page, page_hash in keep.items():
+        stale.append(
+            models.Filter(
+                must=[models.FieldCondition(key="page", match=models.MatchValue(value=page))],
+                must_not=[
+                    models.FieldCondition(key="page_hash", match=models.MatchValue(value=page_hash)),
+                ] if page_hash else None,
+            )
+        )
     client.delete(
         collection_name=cfg.collection_name,
         points_selector=models.FilterSelector(
@@ -145,16 +611,92 @@ def delete_document(
                 must=[
                     models.FieldCondition(key="user_id", match=models.MatchValue(value=user_id)),
                     models.FieldCondition(key="doc_id", match=models.MatchValue(value=filename)),
-                ]
+                ],
+                should=stale,
             )
         ),
         wait=True,
     )
+    _notify_documents_changed(user_id, filename)
+
+
+def list_user_documents(
+    client: QdrantClient,
+    cfg: QdrantConfig,
+    user_id: str,
+    batch_size: int = 256,
+) -> List[Dict]:
+    """
+    Registry entries (doc_id, filename, chunks, pages, bytes, ingested_at) of a user's
+    stored docs. Reads one small point per document through the user_id tenant index,
+    so the cost doesn't grow with the number of chunks.
+    """
+    entries = []
+    offset = None
+    while True:
+        points, offset = client.scroll(
+            collection_name=registry_collection(cfg),
+            scroll_filter=models.Filter(
+                must=[models.FieldCondition(key="user_id", match=models.MatchValue(value=user_id))]
+            ),
+            limit=batch_size,
+            offset=offset,
+            with_payload=True,
+            with_vectors=False,
+        )
+        entries.extend(p.payload for p in points if p.payload)
+        if offset is None:
+            break
+    return sorted(entries, key=lambda e: e["filename"])
+
+
+@traced("qdrant.list_docs", result_size=len)
+def list_user_docs(
+    client: QdrantClient,
+    cfg: QdrantConfig,
+    user_id: str,
+) -> List[Tuple[str, str]]:
+    """
+    Returns (doc_id, filename) pairs for user's stored docs
+    """
+    return [(e["doc_id"], e["filename"]) for e in list_user_documents(client, cfg, user_id)]
+
+
+
+def delete_document(
+    client: QdrantClient,
+    cfg: QdrantConfig,
+    user_id: str,
+    filename: str,
+) -> None:
+    """
+    Deletes all points for given user_id + filename (doc_id), and its registry entry.
+    """
+    print("DELETING...")
+    client.delete(
+        collection_name=cfg.collection_name,
+        points_selector=models.FilterSelector(filter=_doc_filter(user_id, filename)),
+        wait=True,
+    )
+    client.delete(
+        collection_name=registry_collection(cfg),
+        points_selector=models.PointIdsList(points=[document_point_id(user_id, filename)]),
+        wait=True,
+    )
+    _notify_documents_changed(user_id, filename)
     print("Deleted")
 
 
 
 
+def _dense_vector(vector):
+    # with a sparse vector configured, points carry {"": dense, name: sparse}
+    if isinstance(vector, dict):
+        vector = vector.get("")
+    return vector
+
+
+@traced("qdrant.search", result_size=len)
 def search(
     client: QdrantClient,
     cfg: QdrantConfig,
@@ -162,23 +704,55 @@ def search(
     query_vector: List[float],
     limit: int = 5,
     filename: Optional[str] = None,
+    query_text: Optional[str] = None,
+    prefetch_limit: int = 20,
 ) -> List[Dict]:
     """
     Search Qdrant with query_vector.
     Scope by user_id, optionally restrict to filename (doc_id).
     Returns list of payload dicts.
+
+    With cfg.sparse_vector_name set and query_text given, dense and BM25 sparse
+    candidates are fetched as prefetches and fused with reciprocal rank fusion in a
+    single query. "score" stays the dense cosine similarity (so score thresholds keep
+    their meaning), "fusion_score" is the RRF score, and "exact_match" tells whether
+    the chunk contains every identifier-like query term (part numbers, codes, acronyms).
     """
     must = [models.FieldCondition(key="user_id", match=models.MatchValue(value=user_id))]
     if filename:
         must.append(models.FieldCondition(key="doc_id", match=models.MatchValue(value=filename)))
+    query_filter = models.Filter(must=must)
 
-    results = client.query_points(
-        collection_name=cfg.collection_name,
-        query=query_vector,
-        limit=limit,
-        query_filter=models.Filter(must=must),
-        with_payload=True,
-    )
+    hybrid = bool(cfg.sparse_vector_name and query_text)
+    if hybrid:
+        dense = query_vector.tolist() if hasattr(query_vector, "tolist") else list(query_vector)
+        indices, values = sparse_encoder.encode_query(query_text)
+        results = client.query_points(
+            collection_name=cfg.collection_name,
+            prefetch=[
+                models.Prefetch(query=dense, filter=query_filter, limit=prefetch_limit, params=search_params(cfg)),
+                models.Prefetch(
+                    query=models.SparseVector(indices=indices, values=values),
+                    using=cfg.sparse_vector_name,
+                    filter=query_filter,
+                    limit=prefetch_limit,
+                ),
+            ],
+            query=models.FusionQuery(fusion=models.Fusion.RRF),
+            limit=limit,
+            query_filter=query_filter,
+            with_payload=True,
+            with_vectors=[""],
+        )
+    else:
+        results = client.query_points(
+            collection_name=cfg.collection_name,
+            query=query_vector,
+            limit=limit,
+            query_filter=query_filter,
+            search_params=search_params(cfg),
+            with_payload=True,
+        )
 
     # Normalize return type
     if isinstance(results, tuple):
@@ -188,22 +762,33 @@ def search(
     else:
         points = results
 
+    if hybrid:
+        q = np.asarray(dense, dtype=np.float32)
+        q = q / max(float(np.linalg.norm(q)), 1e-12)
+        identifiers = set(exact_match_terms(query_text))
+
     seen = set()
     unique_results = []
     for p in points:
         if not getattr(p, "payload", None):
             continue
-        key = (p.payload.get("doc_id"), p.payload.get("chunk_index"))
+        key = (p.payload.get("doc_id"), p.payload.get("page"), p.payload.get("chunk_index"))
         if key in seen:
             continue
         seen.add(key)
-        unique_results.append({
+        result = {
             "doc_id": p.payload.get("doc_id"),
             "text": p.payload.get("text"),
             "score": getattr(p, "score", None),
             "page": p.payload.get("page"),
             "chunk_index": p.payload.get("chunk_index"),
             "filename": p.payload.get("filename"),
-        })
+        }
+        if hybrid:
+            vec = np.asarray(_dense_vector(p.vector), dtype=np.float32)
+            result["fusion_score"] = result["score"]
+            result["score"] = float(vec @ q / max(float(np.linalg.norm(vec)), 1e-12))
+            result["exact_match"] = bool(identifiers) and identifiers <= set(tokenize(result["text"] or ""))
+        unique_results.append(result)
 
     return unique_results
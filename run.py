@@ -1,12 +1,8 @@
 from dotenv import load_dotenv
-from qdrant_client import QdrantClient
-import os
+from qdrant_operations import config_from_env, get_qdrant_client
 
 load_dotenv()
 
-client = QdrantClient(
-    url=os.environ["QDRANT_CONSOLE_URL"],
-    api_key=os.environ["QDRANT_API_KEY"]
-)
+client = get_qdrant_client(config_from_env())
 
 print(client.get_collections())
@@ -0,0 +1,112 @@
+import hashlib
+import os
+import threading
+import time
+
+import numpy as np
+
+from qdrant_operations import on_documents_changed
+
+
+ANSWER_CACHE_THRESHOLD = float(os.environ.get("ANSWER_CACHE_THRESHOLD", "0.95"))
+ANSWER_CACHE_TTL = float(os.environ.get("ANSWER_CACHE_TTL", "3600"))
+ANSWER_CACHE_MAX_PER_USER = int(os.environ.get("ANSWER_CACHE_MAX_PER_USER", "256"))
+
+
+def _digest(text) -> str:
+    return hashlib.sha256(str(text).encode("utf-8")).hexdigest()
+
+
+def context_fingerprint(context_chunks, memories=None, history: str = "") -> str:
+    """
+    Exact fingerprint of everything the prompt is grounded on: ranked chunk IDs plus
+    a hash of each chunk's text (so a re-ingested revision of a document never matches
+    an answer built from the old one), content hashes for web snippets, any memories
+    used, and the recent chat history with its rolling summary.
+    """
+    parts = []
+    for chunk in context_chunks or []:
+        if not isinstance(chunk, dict):
+            parts.append("raw:" + _digest(chunk))
+        elif chunk.get("doc_id") == "web":
+            parts.append("web:" + _digest(chunk.get("text", "")))
+        else:
+            parts.append(f"{chunk.get('doc_id')}/{chunk.get('page')}/{chunk.get('chunk_index')}:{_digest(chunk.get('text', ''))}")
+    for memory in memories or []:
+        parts.append("mem:" + memory)
+    if history:
+        parts.append("history:" + _digest(history))
+    return _digest("\n".join(parts))
+
+
+class AnswerCache:
+    """
+    Per-user semantic answer cache.
+
+    An answer is reused only when the new question's embedding has cosine similarity
+    >= `threshold` with a cached question AND the retrieved context fingerprint is
+    identical, so the answer was grounded on exactly the same chunks, memories and chat
+    history. A user's entries are dropped whenever upsert_chunks / delete_document change
+    that user's documents.
+
+    The cache and that invalidation are per process: with several API workers, the
+    others learn nothing of a delete or re-ingest. They still never serve a stale answer,
+    because the fingerprint hashes the retrieved chunk texts; their old entries simply
+    stop matching and expire with the TTL.
+    """
+
+    def __init__(
+        self,
+        threshold: float = ANSWER_CACHE_THRESHOLD,
+        ttl: float = ANSWER_CACHE_TTL,
+        max_per_user: int = ANSWER_CACHE_MAX_PER_USER,
+    ):
+        self.threshold = threshold
+        self.ttl = ttl
+        self.max_per_user = max_per_user
+        self._entries = {}   # user_id -> list of (expires_at, unit question vector, fingerprint, answer)
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        on_documents_changed(self.invalidate)
+
+    @staticmethod
+    def _unit(vector):
+        vector = np.asarray(vector, dtype=np.float32)
+        return vector / max(float(np.linalg.norm(vector)), 1e-12)
+
+    def lookup(self, user_id: str, question_vector, fingerprint: str):
+        q = self._unit(question_vector)
+        now = time.monotonic()
+        with self._lock:
+            entries = [e for e in self._entries.get(user_id, []) if e[0] > now]
+            self._entries[user_id] = entries
+            candidates = [e for e in entries if e[2] == fingerprint]
+            if candidates:
+                similarities = np.stack([e[1] for e in candidates]) @ q
+                best = int(np.argmax(similarities))
+                if similarities[best] >= self.threshold:
+                    self.hits += 1
+                    return candidates[best][3]
+            self.misses += 1
+            return None
+
+    def store(self, user_id: str, question_vector, fingerprint: str, answer: str) -> None:
+        if not answer:
+            return
+        with self._lock:
+            entries = self._entries.setdefault(user_id, [])
+            entries.append((time.monotonic() + self.ttl, self._unit(question_vector), fingerprint, answer))
+            del entries[:-self.max_per_user]
+
+    def invalidate(self, user_id: str, filename: str = None) -> None:
+        with self._lock:
+            self._entries.pop(user_id, None)
+
+    def stats(self) -> dict:
+        with self._lock:
+            return {
+                "hits": self.hits,
+                "misses": self.misses,
+                "entries": sum(len(e) for e in self._entries.values()),
+            }
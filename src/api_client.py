@@ -0,0 +1,117 @@
+import json
+
+import requests
+
+from src import tracing
+
+
+class RagApiClient:
+    """
+    Client for api.py with the same methods as src.rag_service.RagService, so the
+    Streamlit app can use either (set RAG_API_URL to go through the service).
+    """
+
+    def __init__(self, base_url: str, timeout: float = 120.0):
+        self.base_url = base_url.rstrip("/")
+        self.timeout = timeout
+        self.session = requests.Session()
+
+    def _url(self, user_id: str, path: str = "") -> str:
+        return f"{self.base_url}/users/{requests.utils.quote(user_id, safe='')}{path}"
+
+    def _events(self, response):
+        response.raise_for_status()
+        for line in response.iter_lines(decode_unicode=True):
+            if line:
+                yield json.loads(line)
+
+    def ingest(self, user_id: str, filename: str, data: bytes, progress=None) -> dict:
+        response = self.session.post(
+            self._url(user_id, "/documents"),
+            files={"file": (filename, data, "application/pdf")},
+            stream=True,
+            timeout=self.timeout,
+        )
+        for event in self._events(response):
+            if event["type"] == "progress":
+                if progress is not None:
+                    progress(event["chunks"], event["page"], event["pages"])
+            elif event["type"] == "error":
+                raise RuntimeError(f"Ingest of {filename} failed: {event['detail']}")
+            elif event["type"] == "done":
+                event.pop("type")
+                return event
+        raise RuntimeError(f"Ingest of {filename} ended without a result")
+
+    def list_docs(self, user_id: str):
+        return [(d["doc_id"], d["filename"]) for d in self.documents(user_id)]
+
+    def documents(self, user_id: str):
+        response = self.session.get(self._url(user_id, "/documents"), timeout=self.timeout)
+        response.raise_for_status()
+        return response.json()
+
+    def delete(self, user_id: str, filename: str) -> None:
+        response = self.session.delete(
+            self._url(user_id, f"/documents/{requests.utils.quote(filename, safe='')}"),
+            timeout=self.timeout,
+        )
+        response.raise_for_status()
+
+    def search(self, user_id: str, question: str, filename: str = None, limit: int = 5):
+        response = self.session.post(
+            self._url(user_id, "/search"),
+            json={"question": question, "filename": filename, "limit": limit},
+            timeout=self.timeout,
+        )
+        response.raise_for_status()
+        return response.json()
+
+    def answer(
+        self,
+        user_id: str,
+        question: str,
+        messages: list = None,
+        mode: str = "hybrid",
+        filename: str = None,
+        window=None,
+        stats: dict = None,
+        session_id: str = None,
+    ):
+        """
+        Same contract as RagService.answer. `window` is ignored: the service keeps the
+        rolling summary per session_id. Server-side spans are added to the current
+        tracing turn when the stream ends.
+        """
+        response = self.session.post(
+            self._url(user_id, "/answer"),
+            json={
+                "question": question,
+                "messages": messages or [],
+                "mode": mode,
+                "filename": filename,
+                "session_id": session_id,
+            },
+            stream=True,
+            timeout=self.timeout,
+        )
+        events = self._events(response)
+        retrieval = next(events)
+        retrieval.pop("type", None)
+
+        def answer_stream():
+            for event in events:
+                if event["type"] == "delta":
+                    yield event["text"]
+                elif event["type"] == "done":
+                    if stats is not None:
+                        stats.update(event.get("stats", {}))
+                    turn = tracing.current_turn()
+                    if turn is not None:
+                        turn.extend(event.get("spans", []))
+                    return
+                elif event["type"] == "error":
+                    raise RuntimeError(f"Answer failed: {event['detail']}")
+            raise RuntimeError("Answer stream ended without a result")
+
+        return retrieval, answer_stream()
@@ -0,0 +1,115 @@
+import os
+import threading
+import time
+from collections import Counter
+from concurrent.futures import Future
+
+import numpy as np
+
+from src import tracing
+
+
+EMBED_BATCH_MAX_WAIT_MS = float(os.environ.get("EMBED_BATCH_MAX_WAIT_MS", "5"))
+EMBED_BATCH_MAX_SIZE = int(os.environ.get("EMBED_BATCH_MAX_SIZE", "32"))
+
+
+class EmbeddingBatcher:
+    """
+    Micro-batches concurrent embedding requests in front of an EmbeddingManager.
+
+    Each submit() returns a Future. A background thread takes the first waiting text,
+    keeps collecting for up to `max_wait_ms` or until `max_batch` texts are queued,
+    runs one batched embed_texts() call and resolves every caller's future with its
+    own row. A lone request pays at most `max_wait_ms` of extra latency; under load
+    many single-query forward passes become one.
+
+    stats() returns the batch-size histogram used to tune the two knobs; the same
+    sizes and queue waits are exported to Prometheus when it is available.
+    """
+
+    def __init__(self, embedder, max_wait_ms: float = EMBED_BATCH_MAX_WAIT_MS, max_batch: int = EMBED_BATCH_MAX_SIZE):
+        self.embedder = embedder
+        self.max_wait = max_wait_ms / 1000
+        self.max_batch = max_batch
+        self._cond = threading.Condition()
+        self._queue = []    # (text, future, enqueued_at)
+        self._batch_sizes = Counter()
+        self._closed = False
+        self._thread = threading.Thread(target=self._run, name="embedding-batcher", daemon=True)
+        self._thread.start()
+
+    @property
+    def dimension(self):
+        return self.embedder.dimension
+
+    def submit(self, text: str) -> Future:
+        future = Future()
+        with self._cond:
+            if self._closed:
+                raise RuntimeError("EmbeddingBatcher is closed")
+            self._queue.append((text, future, time.perf_counter()))
+            self._cond.notify()
+        return future
+
+    def embed_texts(self, texts):
+        """
+        Drop-in for EmbeddingManager.embed_texts; every text joins the shared batches.
+        """
+        with tracing.span("embed.batched", texts=len(texts)):
+            futures = [self.submit(text) for text in texts]
+            if not futures:
+                return np.empty((0, self.dimension), dtype=np.float32)
+            return np.stack([f.result() for f in futures])
+
+    def _next_batch(self):
+        with self._cond:
+            while not self._queue and not self._closed:
+                self._cond.wait()
+            if not self._queue:
+                return None
+            deadline = self._queue[0][2] + self.max_wait
+            while len(self._queue) < self.max_batch and not self._closed:
+                remaining = deadline - time.perf_counter()
+                if remaining <= 0:
+                    break
+                self._cond.wait(timeout=remaining)
+            batch, self._queue = self._queue[:self.max_batch], self._queue[self.max_batch:]
+            return batch
+
+    def _run(self):
+        while True:
+            batch = self._next_batch()
+            if batch is None:
+                return
+            started = time.perf_counter()
+            with self._cond:
+                self._batch_sizes[len(batch)] += 1
+            tracing.observe("embed_batch_size", len(batch))
+            for _, _, enqueued_at in batch:
+                tracing.observe("embed_batch_wait_seconds", started - enqueued_at)
+
+            try:
+                vectors = self.embedder.embed_texts([text for text, _, _ in batch])
+            except Exception as e:
+                for _, future, _ in batch:
+                    future.set_exception(e)
+                continue
+            for (_, future, _), vector in zip(batch, vectors):
+                future.set_result(vector)
+
+    def stats(self) -> dict:
+        with self._cond:
+            sizes = dict(sorted(self._batch_sizes.items()))
+        batches = sum(sizes.values())
+        return {
+            "batches": batches,
+            "texts": sum(size * count for size, count in sizes.items()),
+            "mean_batch": sum(size * count for size, count in sizes.items()) / batches if batches else 0.0,
+            "batch_sizes": sizes,
+        }
+
+    def close(self) -> None:
+        with self._cond:
+            self._closed = True
+            self._cond.notify_all()
+        self._thread.join()
@@ -0,0 +1,244 @@
+import atexit
+import hashlib
+import json
+import os
+import threading
+from collections import OrderedDict
+
+import numpy as np
+
+try:
+    import fcntl
+except ImportError:   # Windows: no directory locking, so give each process its own EMBEDDING_CACHE_DIR
+    fcntl = None
+
+
+DEFAULT_CACHE_DIR = os.environ.get("EMBEDDING_CACHE_DIR", ".embedding_cache")
+DEFAULT_MAX_BYTES = int(os.environ.get("EMBEDDING_CACHE_MAX_BYTES", str(512 * 1024 * 1024)))
+# appended index lines before the JSON snapshot is rewritten and the log emptied
+INDEX_LOG_MAX = int(os.environ.get("EMBEDDING_CACHE_LOG_MAX", "4096"))
+
+
+def cache_key(model_name: str, text: str) -> str:
+    return hashlib.sha256(f"{model_name}\0{text}".encode("utf-8")).hexdigest()
+
+
+def _lock_dir(path):
+    """
+    Takes an exclusive, non-blocking lock on a cache directory. Returns the open lock
+    file (kept open for as long as the lock is held), or None if another process has it.
+    """
+    os.makedirs(path, exist_ok=True)
+    lock_file = open(os.path.join(path, "lock"), "a")
+    if fcntl is None:
+        return lock_file
+    try:
+        fcntl.flock(lock_file, fcntl.LOCK_EX | fcntl.LOCK_NB)
+    except OSError:
+        lock_file.close()
+        return None
+    return lock_file
+
+
+class EmbeddingCache:
+    """
+    On-disk, content-addressed embedding cache keyed by (model name, text hash).
+
+    Vectors live in an append-only float32 file read through np.memmap. The key -> row
+    index is a JSON snapshot (which also keeps LRU order) plus an append-only log of
+    keys added since; each put appends only its new keys, and the snapshot is rewritten
+    once the log passes INDEX_LOG_MAX lines, after evictions and on flush()/exit. When
+    live vectors exceed `max_bytes` the least recently used entries are evicted, and the
+    data file is compacted once more than half of it is dead rows.
+
+    Safe for threads within one process. A process holds an exclusive lock on its
+    directory; further processes (e.g. API workers) sharing `cache_dir` each use a
+    worker-N subdirectory instead, so their files never interleave.
+    """
+
+    def __init__(self, cache_dir: str = DEFAULT_CACHE_DIR, max_bytes: int = DEFAULT_MAX_BYTES):
+        self._dir_lock = _lock_dir(cache_dir)
+        n = 0
+        while self._dir_lock is None:
+            n += 1
+            self._dir_lock = _lock_dir(os.path.join(cache_dir, f"worker-{n}"))
+        self.cache_dir = os.path.join(cache_dir, f"worker-{n}") if n else cache_dir
+        self.max_bytes = max_bytes
+        self._data_path = os.path.join(self.cache_dir, "vectors.f32")
+        self._index_path = os.path.join(self.cache_dir, "index.json")
+        self._log_path = os.path.join(self.cache_dir, "index.log")
+        self._lock = threading.Lock()
+        self._index = OrderedDict()   # key -> row, least recently used first
+        self._rows = 0                # rows in the data file, live or dead
+        self._generation = 0          # log lines from other generations predate the snapshot
+        self._log_lines = 0
+        self._mmap = None
+        self.dim = None
+        self.hits = 0
+        self.misses = 0
+        self._load()
+        self._log = open(self._log_path, "a", encoding="utf-8")
+        atexit.register(self.flush)
+
+    def _load(self):
+        state = None
+        if os.path.exists(self._index_path) and os.path.exists(self._data_path):
+            try:
+                with open(self._index_path, "r", encoding="utf-8") as f:
+                    state = json.load(f)
+            except (OSError, ValueError) as e:
+                print(f"Embedding cache index unreadable, starting empty: {e}")
+        # a data file shorter than the index claims means an interrupted write
+        if state and os.path.getsize(self._data_path) >= state["rows"] * state["dim"] * 4:
+            self.dim = state["dim"]
+            self._rows = state["rows"]
+            self._generation = state.get("generation", 0)
+            self._index = OrderedDict((key, row) for key, row in state["entries"])
+            self._replay_log()
+        else:
+            self._generation = (state or {}).get("generation", 0) + 1
+            if os.path.exists(self._log_path):
+                os.remove(self._log_path)
+        # drop rows appended after the last index write so new rows line up with the index
+        with open(self._data_path, "ab") as f:
+            f.truncate(self._rows * (self.dim or 0) * 4)
+
+    def _replay_log(self):
+        if not os.path.exists(self._log_path):
+            return
+        file_rows = os.path.getsize(self._data_path) // (self.dim * 4)
+        with open(self._log_path, "r", encoding="utf-8") as f:
+            for line in f:
+                parts = line.split()
+                # skip torn lines, lines from before the snapshot and rows that never fully landed
+                if (not line.endswith("\n") or len(parts) != 3 or parts[0] != str(self._generation)
+                        or not parts[2].isdigit()):
+                    continue
+                row = int(parts[2])
+                if row < file_rows:
+                    self._index[parts[1]] = row
+                    self._rows = max(self._rows, row + 1)
+                    self._log_lines += 1
+
+    def _save_index(self):
+        # a new generation makes any log lines left by a crash before the truncate below stale
+        self._generation += 1
+        tmp_path = f"{self._index_path}.tmp"
+        with open(tmp_path, "w", encoding="utf-8") as f:
+            json.dump({
+                "dim": self.dim,
+                "rows": self._rows,
+                "generation": self._generation,
+                "entries": list(self._index.items()),
+            }, f)
+        os.replace(tmp_path, self._index_path)
+        self._log.truncate(0)
+        self._log_lines = 0
+
+    def flush(self) -> None:
+        """
+        Writes the index snapshot (including LRU order) and empties the log.
+        """
+        with self._lock:
+            if self.dim is not None and not self._log.closed:
+                self._save_index()
+
+    def close(self) -> None:
+        self.flush()
+        with self._lock:
+            self._log.close()
+            self._dir_lock.close()
+        atexit.unregister(self.flush)
+
+    def _vectors(self):
+        if self._mmap is None or self._mmap.shape[0] != self._rows:
+            self._mmap = np.memmap(self._data_path, dtype=np.float32, mode="r", shape=(self._rows, self.dim))
+        return self._mmap
+
+    def get_many(self, model_name: str, texts):
+        """
+        Returns a list aligned with texts: a float32 vector for hits, None for misses.
+        """
+        keys = [cache_key(model_name, t) for t in texts]
+        with self._lock:
+            if not self._index:
+                self.misses += len(keys)
+                return [None] * len(keys)
+            vectors = self._vectors()
+            results = []
+            for key in keys:
+                row = self._index.get(key)
+                if row is None:
+                    self.misses += 1
+                    results.append(None)
+                else:
+                    self.hits += 1
+                    self._index.move_to_end(key)
+                    results.append(np.array(vectors[row]))
+            return results
+
+    def put_many(self, model_name: str, texts, vectors) -> None:
+        vectors = np.ascontiguousarray(vectors, dtype=np.float32)
+        if len(texts) == 0:
+            return
+        with self._lock:
+            first_put = self.dim is None
+            if first_put:
+                self.dim = vectors.shape[1]
+            elif vectors.shape[1] != self.dim:
+                raise ValueError(f"Embedding cache holds {self.dim}-dim vectors, got {vectors.shape[1]}")
+
+            new_keys, new_rows = [], []
+            for key, vec in zip((cache_key(model_name, t) for t in texts), vectors):
+                if key in self._index:
+                    self._index.move_to_end(key)
+                    continue
+                self._index[key] = self._rows + len(new_rows)
+                new_keys.append(key)
+                new_rows.append(vec)
+            if new_rows:
+                with open(self._data_path, "ab") as f:
+                    f.write(np.stack(new_rows).tobytes())
+                # rows are written before the log lines that point at them
+                self._log.write("".join(
+                    f"{self._generation} {key} {self._rows + i}\n" for i, key in enumerate(new_keys)
+                ))
+                self._log.flush()
+                self._rows += len(new_rows)
+                self._log_lines += len(new_rows)
+
+            # the first snapshot records dim, without which the log can't be replayed
+            if self._evict() or first_put or self._log_lines >= INDEX_LOG_MAX:
+                self._save_index()
+
+    def _evict(self) -> bool:
+        row_bytes = self.dim * 4
+        if len(self._index) * row_bytes <= self.max_bytes:
+            return False
+        target = int(self.max_bytes * 0.9) // row_bytes
+        while len(self._index) > target:
+            self._index.popitem(last=False)
+        if self._rows > 2 * len(self._index):
+            self._compact()
+        return True
+
+    def _compact(self):
+        vectors = self._vectors()
+        keys = list(self._index.keys())
+        live = np.array(vectors[[self._index[k] for k in keys]]) if keys else np.empty((0, self.dim), np.float32)
+        self._mmap = None
+        tmp_path = f"{self._data_path}.tmp"
+        with open(tmp_path, "wb") as f:
+            f.write(live.tobytes())
+        os.replace(tmp_path, self._data_path)
+        self._index = OrderedDict((key, row) for row, key in enumerate(keys))
+        self._rows = len(keys)
+
+    def stats(self) -> dict:
+        with self._lock:
+            return {
+                "hits": self.hits,
+                "misses": self.misses,
+                "entries": len(self._index),
+                "bytes": len(self._index) * (self.dim or 0) * 4,
+            }
@@ -1,12 +1,88 @@
-from langchain_community.embeddings import HuggingFaceEmbeddings
+import os
+
 import numpy as np
 
+from src.model_registry import get_model, get_dimension, warm_up
+from src.tracing import span
+
+
+DEFAULT_BACKEND = os.environ.get("EMBEDDING_BACKEND", "torch")
+DEFAULT_BATCH_SIZE = int(os.environ.get("EMBEDDING_BATCH_SIZE", "32"))
+DEFAULT_THREADS = int(os.environ.get("EMBEDDING_THREADS", "0")) or None
+ONNX_INT8_FILE = os.environ.get("EMBEDDING_ONNX_INT8_FILE", "onnx/model_quint8_avx2.onnx")
+
+# all backends run the same sentence-transformers model on CPU
+BACKENDS = {
+    "torch": {"backend": "torch"},
+    "onnx": {"backend": "onnx"},
+    "onnx-int8": {"backend": "onnx", "file_name": ONNX_INT8_FILE},
+}
+
 
 class EmbeddingManager:
-    def __init__(self, model_name="sentence-transformers/all-MiniLM-L6-v2"):
-        self.model = HuggingFaceEmbeddings(model_name=model_name)
+    def __init__(
+        self,
+        model_name="sentence-transformers/all-MiniLM-L6-v2",
+        cache=None,
+        backend=None,
+        batch_size=None,
+        threads=None,
+    ):
+        self.model_name = model_name
+        self.backend = backend or DEFAULT_BACKEND
+        if self.backend not in BACKENDS:
+            raise ValueError(f"Unknown embedding backend '{self.backend}', choose from {sorted(BACKENDS)}")
+        self.batch_size = batch_size or DEFAULT_BATCH_SIZE
+
+        self._options = dict(BACKENDS[self.backend])
+        threads = threads or DEFAULT_THREADS
+        if threads:
+            self._options["threads"] = threads
+        # shared across sessions/threads; loaded once per process
+        self.model = get_model("sentence-transformers", model_name, **self._options)
+
+        # optional src.embedding_cache.EmbeddingCache; hits never reach the model
+        self.cache = cache
+        # vectors from different backends differ slightly, so they are cached apart
+        self.cache_namespace = model_name if self.backend == "torch" else f"{model_name}:{self.backend}"
+
+    def _embed(self, texts):
+        vectors = self.model.encode(
+            texts,
+            batch_size=self.batch_size,
+            convert_to_numpy=True,
+            show_progress_bar=False,
+        )
+        return np.ascontiguousarray(vectors, dtype=np.float32)
 
     def embed_texts(self, texts):
-        embeddings = self.model.embed_documents(texts)
-        return np.array(embeddings)
-    
\ No newline at end of file
+        """
+        Returns a contiguous float32 array of shape (len(texts), dimension).
+        """
+        with span("embed", texts=len(texts)) as attrs:
+            if self.cache is None:
+                return self._embed(texts)
+
+            cached = self.cache.get_many(self.cache_namespace, texts)
+            # only the misses (de-duplicated) go to the model
+            missing = list(dict.fromkeys(t for t, vec in zip(texts, cached) if vec is None))
+            attrs["cache_hits"] = len(texts) - sum(vec is None for vec in cached)
+            attrs["cache_hit"] = not missing
+            if missing:
+                fresh = dict(zip(missing, self._embed(missing)))
+                self.cache.put_many(self.cache_namespace, missing, np.stack(list(fresh.values())))
+                cached = [vec if vec is not None else fresh[t] for t, vec in zip(texts, cached)]
+
+            if not cached:
+                return np.empty((0, self.dimension), dtype=np.float32)
+            return np.ascontiguousarray(np.stack(cached), dtype=np.float32)
+
+    @property
+    def dimension(self):
+        return get_dimension("sentence-transformers", self.model_name, **self._options)
+
+    def warm_up(self):
+        return warm_up("sentence-transformers", self.model_name, **self._options)
+
+    def cache_stats(self):
+        return self.cache.stats() if self.cache is not None else {}
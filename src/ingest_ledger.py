@@ -0,0 +1,114 @@
+import hashlib
+import json
+import os
+import threading
+import time
+from contextlib import contextmanager
+from typing import Dict, Optional
+
+try:
+    import fcntl
+except ImportError:   # Windows: no cross-process lock, run a single process per ledger file
+    fcntl = None
+
+
+DEFAULT_LEDGER_PATH = os.environ.get("INGEST_LEDGER_PATH", ".ingest_ledger.json")
+
+
+def file_sha256(data: bytes) -> str:
+    return hashlib.sha256(data).hexdigest()
+
+
+class IngestLedger:
+    """
+    Records which revision (SHA-256 of the bytes) of each of a user's files is already
+    ingested, so Streamlit reruns can skip re-extracting / re-embedding / re-upserting
+    them. The same bytes under another filename are a different document and are ingested.
+    The ledger is only a hint: it is local to this host, so a caller confirms the
+    document is still stored (its registry entry in Qdrant) before skipping.
+
+    Persisted as a small JSON file: {user_id: {filename: {"sha256", "chunks", "ingested_at"}}}.
+    Several processes (API workers) may share it: every change is a read-merge-write
+    under an exclusive lock on a sidecar .lock file, and reads reload the file when
+    another process has replaced it.
+    """
+
+    def __init__(self, path: str = DEFAULT_LEDGER_PATH):
+        self.path = path
+        self._lock = threading.Lock()
+        self._mtime = None
+        self._entries: Dict[str, Dict[str, dict]] = {}
+        self._refresh()
+
+    def _load(self) -> Dict[str, Dict[str, dict]]:
+        if not os.path.exists(self.path):
+            return {}
+        try:
+            with open(self.path, "r", encoding="utf-8") as f:
+                entries = json.load(f)
+        except (OSError, ValueError) as e:
+            print(f"Ingest ledger unreadable, starting empty: {e}")
+            return {}
+        # older ledgers were keyed {user_id: {sha256: {"filename", ...}}}
+        for user_id, user_entries in entries.items():
+            if any("filename" in e for e in user_entries.values()):
+                entries[user_id] = {
+                    e["filename"]: {"sha256": digest, "chunks": e.get("chunks"), "ingested_at": e.get("ingested_at")}
+                    for digest, e in user_entries.items()
+                }
+        return entries
+
+    def _refresh(self) -> None:
+        mtime = os.path.getmtime(self.path) if os.path.exists(self.path) else None
+        if mtime != self._mtime:
+            self._entries = self._load()
+            self._mtime = mtime
+
+    @contextmanager
+    def _file_lock(self):
+        with open(f"{self.path}.lock", "a") as lock_file:
+            if fcntl is not None:
+                fcntl.flock(lock_file, fcntl.LOCK_EX)
+            yield
+
+    def _update(self, change) -> None:
+        # reload under the lock so other processes' writes are merged, not overwritten
+        with self._lock, self._file_lock():
+            self._entries = self._load()
+            if change(self._entries) is False:
+                return
+            tmp_path = f"{self.path}.{os.getpid()}.tmp"
+            with open(tmp_path, "w", encoding="utf-8") as f:
+                json.dump(self._entries, f)
+            os.replace(tmp_path, self.path)
+            self._mtime = os.path.getmtime(self.path)
+
+    def contains(self, user_id: str, digest: str, filename: str) -> bool:
+        entry = self.get(user_id, filename)
+        return entry is not None and entry["sha256"] == digest
+
+    def get(self, user_id: str, filename: str) -> Optional[dict]:
+        with self._lock:
+            self._refresh()
+            return self._entries.get(user_id, {}).get(filename)
+
+    def record(self, user_id: str, digest: str, filename: str, chunks: int) -> None:
+        def change(entries):
+            # a new revision under the same name replaces the old one
+            entries.setdefault(user_id, {})[filename] = {
+                "sha256": digest,
+                "chunks": chunks,
+                "ingested_at": time.time(),
+            }
+
+        self._update(change)
+
+    def forget_filename(self, user_id: str, filename: str) -> None:
+        """
+        Drop the ledger entry for this user's filename (called when the document is deleted).
+        """
+        def change(entries):
+            if entries.get(user_id, {}).pop(filename, None) is None:
+                return False
+
+        self._update(change)
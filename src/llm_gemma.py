@@ -62,11 +62,13 @@
 #         """
 
 # src/llm_gemma.py
-from google import genai
 from dotenv import load_dotenv
 load_dotenv()
 
 import os
+import time
+
+from src.tracing import span
 
 
 class GemmaLLM:
@@ -75,10 +77,11 @@ class GemmaLLM:
         if not api_key:
             raise ValueError("GOOGLE_API_KEY not set in .env")
 
+        from google import genai   # heavy; only needed once a model is actually built
         self.client = genai.Client(api_key=api_key)
         self.model_name = model_name
 
-    def generate(self, question, context, memory_text: str = "", recent_history: str = ""):
+    def build_prompt(self, question, context, memory_text: str = "", recent_history: str = ""):
         sections = []
 
         if recent_history:
@@ -187,7 +190,7 @@ OUTPUT RULE
 CONTEXT
 ========================
 
-{context}
+{full_context}
 
 ========================
 QUESTION
@@ -196,14 +199,24 @@ QUESTION
 {question}
 
         """
+        return prompt
 
-
-
-        response = self.client.models.generate_content(
-            # model=self.client.models.generate_content(
-            model=self.model_name,
-            contents=prompt,
-        )
+    def generate(self, question, context, memory_text: str = "", recent_history: str = "", stats: dict = None):
+        """
+        Blocking generation; returns the full answer text.
+        `stats`, if given, receives "total_s".
+        """
+        prompt = self.build_prompt(question, context, memory_text=memory_text, recent_history=recent_history)
+
+        start = time.perf_counter()
+        with span("gemma.generate", prompt_chars=len(prompt)):
+            response = self.client.models.generate_content(
+                # model=self.client.models.generate_content(
+                model=self.model_name,
+                contents=prompt,
+            )
+        if stats is not None:
+            stats["total_s"] = time.perf_counter() - start
 
         if hasattr(response, "output_text"):
             return response.output_text
@@ -211,3 +224,48 @@ QUESTION
             return response.text
         else:
             return str(response)
+
+    def summarize(self, summary: str, text: str, max_tokens: int) -> str:
+        """
+        Folds `text` (older chat turns) into an existing rolling `summary`.
+        Returns "" when the model gives no text.
+        """
+        prompt = f"""Update the running summary of a chat with the new messages below.
+Keep names, personal facts, decisions and open questions. Use at most {max_tokens * 3 // 4} words.
+
+CURRENT SUMMARY:
+{summary or "(empty)"}
+
+NEW MESSAGES:
+{text}
+
+UPDATED SUMMARY:"""
+        with span("gemma.summarize", prompt_chars=len(prompt)):
+            response = self.client.models.generate_content(model=self.model_name, contents=prompt)
+        return getattr(response, "text", None) or ""
+
+    def generate_stream(self, question, context, memory_text: str = "", recent_history: str = "", stats: dict = None):
+        """
+        Streaming generation; yields text deltas as the model produces them.
+        `stats`, if given, receives "ttft_s" (time to first token) and "total_s".
+        """
+        prompt = self.build_prompt(question, context, memory_text=memory_text, recent_history=recent_history)
+        stats = {} if stats is None else stats
+
+        start = time.perf_counter()
+        with span("gemma.stream", prompt_chars=len(prompt)) as attrs:
+            answer_chars = 0
+            for chunk in self.client.models.generate_content_stream(
+                model=self.model_name,
+                contents=prompt,
+            ):
+                text = getattr(chunk, "text", None)
+                if not text:
+                    continue
+                if "ttft_s" not in stats:
+                    stats["ttft_s"] = time.perf_counter() - start
+                    attrs["ttft_ms"] = stats["ttft_s"] * 1000
+                answer_chars += len(text)
+                attrs["answer_chars"] = answer_chars
+                yield text
+        stats["total_s"] = time.perf_counter() - start
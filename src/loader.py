@@ -1,15 +1,24 @@
 import os
-from langchain_community.document_loaders import PyPDFLoader
+from langchain_core.documents import Document
 from langchain_text_splitters import RecursiveCharacterTextSplitter
 
+from pipeline.extractors import get_extractor
 
-def load_and_chunk_pdfs(pdf_folder: str, chunk_size=800, chunk_overlap=200):
+
+def load_and_chunk_pdfs(pdf_folder: str, chunk_size=800, chunk_overlap=200, extractor=None):
     documents = []
+    extractor = get_extractor(extractor)
 
     for file in os.listdir(pdf_folder):
         if file.endswith(".pdf"):
-            loader = PyPDFLoader(os.path.join(pdf_folder, file))
-            docs = loader.load()
+            path = os.path.join(pdf_folder, file)
+            with open(path, "rb") as f:
+                data = f.read()
+            # same metadata shape as PyPDFLoader (0-based page)
+            docs = [
+                Document(page_content=text, metadata={"source": path, "page": page_number - 1})
+                for page_number, text in extractor.iter_pages(data)
+            ]
             documents.extend(docs)
 
     splitter = RecursiveCharacterTextSplitter(
@@ -19,4 +28,4 @@ def load_and_chunk_pdfs(pdf_folder: str, chunk_size=800, chunk_overlap=200):
 
     chunks = splitter.split_documents(documents)
     return chunks
-print("works fine")
\ No newline at end of file
+print("works fine")
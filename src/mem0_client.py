@@ -1,12 +1,29 @@
-from mem0 import MemoryClient
-from dotenv import load_dotenv
+import atexit
+import hashlib
 import os
+import random
+import threading
+import time
+from collections import OrderedDict
 
-load_dotenv()
+from src.resources import get_mem0_client
+from src.tracing import span
 
-mem0_client = MemoryClient(
-    api_key=os.getenv("MEM0_API_KEY"),
-)
+MEMORY_CACHE_TTL = float(os.getenv("MEM0_CACHE_TTL", "300"))
+# sessions whose high-water mark is remembered; the least recently active are forgotten
+MEMORY_SESSIONS_MAX = int(os.getenv("MEM0_SESSIONS_MAX", "10000"))
+
+# user_id -> {(normalised query, limit): (expires_at, memories)}
+_memory_cache = {}
+_memory_cache_lock = threading.Lock()
+
+
+def invalidate_user_memories(user_id: str):
+    """
+    Drops cached memory searches for a user; called whenever memories are written.
+    """
+    with _memory_cache_lock:
+        _memory_cache.pop(user_id, None)
 
 
 def add_user_memories(user_id: str, messages: list):
@@ -18,13 +35,162 @@ def add_user_memories(user_id: str, messages: list):
     if not messages:
         return
     try:
-        mem0_client.add(
-            messages=messages, 
-            user_id=user_id  # scopes to the active user id
-        )
+        with span("mem0.add", messages=len(messages)):
+            get_mem0_client().add(
+                messages=messages, 
+                user_id=user_id  # scopes to the active user id
+            )
         print(f"Added memories for user {user_id}")
     except Exception as e:
         print(f"Mem0 add failed: {e}")
+    finally:
+        invalidate_user_memories(user_id)
+
+
+def _fingerprint(msg) -> str:
+    return hashlib.sha1(f"{msg['role']}\0{msg['content']}".encode("utf-8")).hexdigest()
+
+
+class MemoryWriteQueue:
+    """
+    Write-behind queue for Mem0 so the chat turn never waits on memory persistence.
+
+    - enqueue() gets the session's whole message list and keeps only messages past a
+      per-session high-water mark (per user when there is no session), so nothing is
+      sent to Mem0 twice, not even to a user id switched to mid-session. Marks are
+      kept for the `max_sessions` most recently active sessions.
+    - writes for a user are coalesced for `window` seconds and sent as one add().
+    - failed writes are retried with jittered exponential backoff, up to max_attempts.
+    - a daemon thread does the sending; pending writes are flushed at interpreter exit.
+    """
+
+    def __init__(
+        self,
+        window: float = 2.0,
+        max_attempts: int = 5,
+        base_backoff: float = 1.0,
+        max_sessions: int = MEMORY_SESSIONS_MAX,
+    ):
+        self.window = window
+        self.max_sessions = max_sessions
+        self.max_attempts = max_attempts
+        self.base_backoff = base_backoff
+        self._cond = threading.Condition()
+        self._pending = {}      # user_id -> {"messages": [...], "due": t, "attempts": n}
+        self._high_water = OrderedDict()   # session key -> (count, fingerprint of last message), LRU
+        self._in_flight = 0
+        self._closed = False
+        self._thread = threading.Thread(target=self._run, name="mem0-writer", daemon=True)
+        self._thread.start()
+        atexit.register(self.close)
+
+    @staticmethod
+    def _session_key(user_id, session_id):
+        return ("session", session_id) if session_id is not None else ("user", user_id)
+
+    def _unsent(self, key, messages):
+        count, fingerprint = self._high_water.get(key, (0, None))
+        if count and (count > len(messages) or _fingerprint(messages[count - 1]) != fingerprint):
+            count = 0   # a different / reset message list for this session
+        return messages[count:]
+
+    def enqueue(self, user_id: str, messages: list, session_id: str = None) -> None:
+        if not messages:
+            return
+        with self._cond:
+            key = self._session_key(user_id, session_id)
+            new = self._unsent(key, messages)
+            if not new:
+                return
+            self._high_water[key] = (len(messages), _fingerprint(messages[-1]))
+            self._high_water.move_to_end(key)
+            while len(self._high_water) > self.max_sessions:
+                self._high_water.popitem(last=False)
+            # memories already cached for this user may be stale once this lands
+            invalidate_user_memories(user_id)
+            entry = self._pending.setdefault(
+                user_id, {"messages": [], "due": time.monotonic() + self.window, "attempts": 0}
+            )
+            entry["messages"].extend(new)
+            self._cond.notify()
+
+    def _next_due(self):
+        due = [(entry["due"], user_id) for user_id, entry in self._pending.items()]
+        return min(due) if due else (None, None)
+
+    def _run(self):
+        while True:
+            with self._cond:
+                while True:
+                    due, user_id = self._next_due()
+                    if due is None:
+                        if self._closed:
+                            return
+                        self._cond.wait()
+                        continue
+                    delay = due - time.monotonic()
+                    if delay <= 0 or self._closed:
+                        break
+                    self._cond.wait(timeout=delay)
+                entry = self._pending.pop(user_id)
+                self._in_flight += 1
+
+            try:
+                with span("mem0.add", messages=len(entry["messages"]), attempt=entry["attempts"] + 1):
+                    get_mem0_client().add(messages=entry["messages"], user_id=user_id)
+                invalidate_user_memories(user_id)
+                print(f"Added {len(entry['messages'])} memories for user {user_id}")
+            except Exception as e:
+                entry["attempts"] += 1
+                if entry["attempts"] >= self.max_attempts or self._closed:
+                    print(f"Mem0 add failed for user {user_id}, dropping {len(entry['messages'])} messages: {e}")
+                else:
+                    backoff = self.base_backoff * 2 ** (entry["attempts"] - 1)
+                    print(f"Mem0 add failed ({e}), retrying in {backoff:.1f}s")
+                    with self._cond:
+                        # newer messages queued meanwhile go after the ones being retried
+                        queued = self._pending.pop(user_id, None)
+                        if queued:
+                            entry["messages"].extend(queued["messages"])
+                        entry["due"] = time.monotonic() + backoff * random.uniform(0.5, 1.5)
+                        self._pending[user_id] = entry
+            finally:
+                with self._cond:
+                    self._in_flight -= 1
+                    self._cond.notify_all()
+
+    def flush(self, timeout: float = 10.0) -> bool:
+        """
+        Sends everything pending now and waits until the queue is idle.
+        Returns False if it did not drain within timeout.
+        """
+        deadline = time.monotonic() + timeout
+        with self._cond:
+            for entry in self._pending.values():
+                entry["due"] = 0
+            self._cond.notify_all()
+            while self._pending or self._in_flight:
+                remaining = deadline - time.monotonic()
+                if remaining <= 0:
+                    return False
+                self._cond.wait(timeout=remaining)
+        return True
+
+    def close(self, timeout: float = 10.0) -> None:
+        with self._cond:
+            self._closed = True
+        self.flush(timeout)
+
+
+memory_writer = MemoryWriteQueue()
+
+
+def enqueue_user_memories(user_id: str, messages: list, session_id: str = None):
+    """
+    Non-blocking add_user_memories: pass the session's full message list, only the
+    messages not yet persisted are sent (in the background).
+    """
+    memory_writer.enqueue(user_id, messages, session_id=session_id)
 
 
 def get_user_memories(user_id: str, query: str, limit: int = 5) -> list:
@@ -32,15 +198,31 @@ def get_user_memories(user_id: str, query: str, limit: int = 5) -> list:
     Retrieve relevant memories for this user and query from Mem0.
 
     Uses filters={"user_id": user_id} to scope correctly.
+    Results are cached per user for MEM0_CACHE_TTL seconds, until new memories are written.
     """
+    with span("mem0.search", limit=limit) as attrs:
+        mem_texts = _search_user_memories(user_id, query, limit, attrs)
+        attrs["results"] = len(mem_texts)
+    return mem_texts
+
+
+def _search_user_memories(user_id: str, query: str, limit: int, attrs: dict) -> list:
+    cache_key = (" ".join(query.lower().split()), limit)
+    with _memory_cache_lock:
+        cached = _memory_cache.get(user_id, {}).get(cache_key)
+    attrs["cache_hit"] = bool(cached and cached[0] > time.monotonic())
+    if attrs["cache_hit"]:
+        return list(cached[1])
+
     try:
-        results = mem0_client.search(
+        results = get_mem0_client().search(
             query=query,
             filters={"user_id": user_id},                       # for multitenancy
             limit=limit
         )
     except Exception as e:
         print(f"Mem0 search failed: {e}")
+        attrs["error"] = type(e).__name__
         return []
 
     mem_texts = []
@@ -53,7 +235,12 @@ def get_user_memories(user_id: str, query: str, limit: int = 5) -> list:
             if isinstance(m, dict) and "memory" in m:
                 mem_texts.append(m["memory"])
 
-    
+    now = time.monotonic()
+    with _memory_cache_lock:
+        user_cache = _memory_cache.setdefault(user_id, {})
+        for key in [k for k, (expires_at, _) in user_cache.items() if expires_at <= now]:
+            del user_cache[key]
+        user_cache[cache_key] = (now + MEMORY_CACHE_TTL, list(mem_texts))
 
     print(mem_texts)
 
@@ -0,0 +1,116 @@
+import os
+
+import numpy as np
+
+
+# personal-minus-general score margin above which a question is personal
+MEMORY_ROUTER_MARGIN = float(os.environ.get("MEMORY_ROUTER_MARGIN", "0.0"))
+# scores within this distance of the margin count as unsure (0: the router always decides)
+MEMORY_ROUTER_UNCERTAINTY = float(os.environ.get("MEMORY_ROUTER_UNCERTAINTY", "0.0"))
+# what an unsure question gets: "router" (the margin decision anyway), "always" (fetch
+# memories), "never", or "keywords" (the old substring heuristic)
+MEMORY_ROUTER_FALLBACK = os.environ.get("MEMORY_ROUTER_FALLBACK", "router")
+
+# exemplar questions the router compares against; extend these rather than adding keywords
+PERSONAL_EXAMPLES = [
+    "What is my name?",
+    "Do you remember me?",
+    "Who am I?",
+    "What did I tell you about myself?",
+    "What are my hobbies?",
+    "Where do I live?",
+    "What is my favourite food?",
+    "Remember that I prefer short answers.",
+    "What did we discuss last time?",
+    "What was our last topic?",
+    "Which city did I say I am from?",
+    "What job do I have?",
+    "Do you know my birthday?",
+    "What are my preferences?",
+    "Remind me what I asked you earlier.",
+]
+
+GENERAL_EXAMPLES = [
+    "What is the capital of France?",
+    "Summarize the uploaded document.",
+    "What are the main findings of the study?",
+    "Explain how photosynthesis works.",
+    "What is the current population of India?",
+    "Give me some examples of machine learning algorithms.",
+    "What time zone is Tokyo in?",
+    "What does the report say about cancer detection?",
+    "Who is the prime minister of the UK?",
+    "Define the term gradient descent.",
+    "List the key points in chapter 2.",
+    "What is the name of the model used in the paper?",
+    "How does the system handle some edge cases?",
+    "What is the latest news about electric cars?",
+    "Compare the results in table 3 and table 4.",
+]
+
+
+def mentions_self(question: str) -> bool:
+    """
+    The original substring trigger, kept only as an opt-in fallback and for comparison.
+    """
+    return any(x in question.lower() for x in ["my", "me", "i ", "remember"])
+
+
+def _normalise_rows(vectors):
+    vectors = np.asarray(vectors, dtype=np.float32)
+    return vectors / np.maximum(np.linalg.norm(vectors, axis=1, keepdims=True), 1e-12)
+
+
+class MemoryRouter:
+    """
+    Decides locally whether a question is personal (needs Mem0 memories), using the
+    already-loaded embedding model instead of substring matching.
+
+    A question is personal when its nearest personal exemplar is closer (cosine) than
+    its nearest general exemplar by more than `margin`. A score within `uncertainty`
+    of the margin is unsure and decided by `fallback` (see MEMORY_ROUTER_FALLBACK).
+    With an embedding cache the question vector is usually a cache hit, since it was
+    just embedded for retrieval.
+    """
+
+    def __init__(
+        self,
+        embedder,
+        margin: float = MEMORY_ROUTER_MARGIN,
+        personal_examples=None,
+        general_examples=None,
+        uncertainty: float = MEMORY_ROUTER_UNCERTAINTY,
+        fallback: str = MEMORY_ROUTER_FALLBACK,
+    ):
+        if fallback not in ("router", "always", "never", "keywords"):
+            raise ValueError(f"Unknown memory router fallback '{fallback}'")
+        self.embedder = embedder
+        self.margin = margin
+        self.uncertainty = uncertainty
+        self.fallback = fallback
+        personal = personal_examples or PERSONAL_EXAMPLES
+        general = general_examples or GENERAL_EXAMPLES
+        vectors = _normalise_rows(embedder.embed_texts(personal + general))
+        self._personal = vectors[:len(personal)]
+        self._general = vectors[len(personal):]
+
+    def score(self, question: str, question_vector=None) -> float:
+        if question_vector is None:
+            question_vector = self.embedder.embed_texts([question])[0]
+        q = _normalise_rows([question_vector])[0]
+        return float(np.max(self._personal @ q) - np.max(self._general @ q))
+
+    def decide(self, question: str, question_vector=None):
+        """
+        Returns (is personal, whether the score fell in the unsure band).
+        """
+        score = self.score(question, question_vector)
+        unsure = abs(score - self.margin) < self.uncertainty
+        if not unsure or self.fallback == "router":
+            return score > self.margin, unsure
+        if self.fallback == "keywords":
+            return mentions_self(question), unsure
+        return self.fallback == "always", unsure
+
+    def is_personal(self, question: str, question_vector=None) -> bool:
+        return self.decide(question, question_vector)[0]
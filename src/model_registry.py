@@ -0,0 +1,140 @@
+import threading
+import time
+
+
+def _load_fastembed(model_name, **options):
+    from fastembed import TextEmbedding
+    return TextEmbedding(model_name=model_name, **options)
+
+
+def _cpu_model_kwargs(backend, file_name=None, threads=None):
+    model_kwargs = {}
+    if backend == "onnx":
+        model_kwargs["provider"] = "CPUExecutionProvider"
+        if file_name:
+            model_kwargs["file_name"] = file_name
+        if threads:
+            import onnxruntime as ort
+            session_options = ort.SessionOptions()
+            session_options.intra_op_num_threads = threads
+            model_kwargs["session_options"] = session_options
+    elif threads:
+        import torch
+        torch.set_num_threads(threads)   # torch's pool is process-wide
+    return model_kwargs or None
+
+
+def _load_sentence_transformers(model_name, backend="torch", file_name=None, threads=None):
+    """
+    backend "torch" or "onnx" (CPU). `file_name` selects an ONNX export inside the model
+    repo (e.g. an int8-quantized one); `threads` caps intra-op threads.
+    """
+    from sentence_transformers import SentenceTransformer
+
+    return SentenceTransformer(
+        model_name, device="cpu", backend=backend, model_kwargs=_cpu_model_kwargs(backend, file_name, threads)
+    )
+
+
+def _load_cross_encoder(model_name, backend="torch", file_name=None, threads=None, max_length=None):
+    """
+    A sentence-transformers CrossEncoder (query, passage) scorer; same options as
+    _load_sentence_transformers.
+    """
+    from sentence_transformers import CrossEncoder
+
+    return CrossEncoder(
+        model_name, device="cpu", backend=backend, max_length=max_length,
+        model_kwargs=_cpu_model_kwargs(backend, file_name, threads),
+    )
+
+
+LOADERS = {
+    "fastembed": _load_fastembed,
+    "sentence-transformers": _load_sentence_transformers,
+    "cross-encoder": _load_cross_encoder,
+}
+
+_models = {}
+_key_locks = {}
+_registry_lock = threading.Lock()
+_load_times = {}
+_dimensions = {}
+
+
+def _key(backend, model_name, options):
+    return (backend, model_name, tuple(sorted(options.items())))
+
+
+def get_model(backend: str, model_name: str, **options):
+    """
+    Returns the process-wide model instance for (backend, model_name, options),
+    loading it on first use. Concurrent callers asking for the same model wait for
+    a single load instead of each loading their own copy; Streamlit sessions share
+    it because they run as threads of one process.
+    """
+    key = _key(backend, model_name, options)
+    model = _models.get(key)
+    if model is not None:
+        return model
+
+    with _registry_lock:
+        if backend not in LOADERS:
+            raise ValueError(f"Unknown model backend '{backend}', choose from {sorted(LOADERS)}")
+        key_lock = _key_locks.setdefault(key, threading.Lock())
+
+    with key_lock:
+        if key not in _models:
+            start = time.perf_counter()
+            _models[key] = LOADERS[backend](model_name, **options)
+            _load_times[key] = time.perf_counter() - start
+            print(f"Loaded {backend} model {model_name} in {_load_times[key]:.2f}s")
+    return _models[key]
+
+
+def _embed_one(backend, model, text):
+    if backend == "fastembed":
+        return next(iter(model.embed([text])))
+    return model.encode([text])[0]
+
+
+def get_dimension(backend: str, model_name: str, **options) -> int:
+    """
+    Embedding dimension of a model, computed once per process and cached.
+    Uses model metadata when the backend exposes it, otherwise one embedding.
+    """
+    key = _key(backend, model_name, options)
+    if key in _dimensions:
+        return _dimensions[key]
+
+    dim = None
+    if backend == "fastembed":
+        from fastembed import TextEmbedding
+        for info in TextEmbedding.list_supported_models():
+            if info.get("model", "").lower() == model_name.lower():
+                dim = info.get("dim")
+                break
+    elif backend == "sentence-transformers":
+        dim = get_model(backend, model_name, **options).get_sentence_embedding_dimension()
+    if dim is None:
+        dim = len(_embed_one(backend, get_model(backend, model_name, **options), "test"))
+    _dimensions[key] = dim
+    return dim
+
+
+def warm_up(backend: str, model_name: str, **options) -> float:
+    """
+    Loads the model (if needed) and runs one embedding so the first real request
+    does not pay for lazy initialisation. Returns the seconds spent.
+    """
+    start = time.perf_counter()
+    model = get_model(backend, model_name, **options)
+    _embed_one(backend, model, "warm up")
+    return time.perf_counter() - start
+
+
+def load_stats() -> dict:
+    """
+    {"backend:model_name": load_seconds} for every model loaded in this process.
+    """
+    return {f"{backend}:{name}": seconds for (backend, name, _), seconds in _load_times.items()}
@@ -0,0 +1,180 @@
+import os
+import re
+
+
+# token quotas per prompt section; the fixed instructions in GemmaLLM.build_prompt come on top
+DEFAULT_BUDGET = {
+    "history": int(os.environ.get("PROMPT_HISTORY_TOKENS", "1200")),
+    "summary": int(os.environ.get("PROMPT_SUMMARY_TOKENS", "300")),
+    "memories": int(os.environ.get("PROMPT_MEMORY_TOKENS", "400")),
+    "context": int(os.environ.get("PROMPT_CONTEXT_TOKENS", "2500")),
+}
+
+# how older turns are folded into the rolling summary: "extractive" (no model call) or "llm" (Gemma)
+PROMPT_SUMMARIZER = os.environ.get("PROMPT_SUMMARIZER", "extractive")
+
+_CHARS_PER_TOKEN = 4
+
+
+def count_tokens(text: str) -> int:
+    """
+    Cheap token estimate (~4 characters per token for Gemma's tokenizer on English).
+    Used for budgeting only, so it does not need the real tokenizer.
+    """
+    return (len(text) + _CHARS_PER_TOKEN - 1) // _CHARS_PER_TOKEN
+
+
+def truncate_to_tokens(text: str, max_tokens: int) -> str:
+    max_chars = max_tokens * _CHARS_PER_TOKEN
+    if len(text) <= max_chars:
+        return text
+    return text[:max_chars].rsplit(" ", 1)[0] + " ..."
+
+
+def _format_message(msg) -> str:
+    role = "You: " if msg["role"] == "user" else "Assistant: "
+    return f"{role}{msg['content']}"
+
+
+def extractive_summarizer(summary: str, messages: list, max_tokens: int) -> str:
+    """
+    Default rolling summariser: appends the first sentence of each folded message and
+    keeps only the newest lines that fit in max_tokens. No model call.
+    """
+    lines = summary.splitlines() if summary else []
+    for msg in messages:
+        first_sentence = re.split(r"(?<=[.!?])\s", msg["content"].strip(), maxsplit=1)[0]
+        lines.append(truncate_to_tokens(_format_message({**msg, "content": first_sentence}), 60))
+    while lines and count_tokens("\n".join(lines)) > max_tokens:
+        lines.pop(0)
+    return "\n".join(lines)
+
+
+def llm_summarizer(llm=None):
+    """
+    Rolling summariser backed by an LLM with a .summarize(summary, text, max_tokens) method
+    (the shared Gemma client when `llm` is None, created on first use). Falls back to
+    extractive_summarizer when the call fails or returns nothing.
+    """
+    def summarize(summary: str, messages: list, max_tokens: int) -> str:
+        text = "\n".join(_format_message(m) for m in messages)
+        try:
+            if llm is None:
+                from src.resources import get_gemma
+                updated = get_gemma().summarize(summary, text, max_tokens)
+            else:
+                updated = llm.summarize(summary, text, max_tokens)
+        except Exception as e:
+            print(f"LLM summary failed, using extractive summary: {e}")
+            updated = None
+        if not updated or not updated.strip():
+            return extractive_summarizer(summary, messages, max_tokens)
+        return truncate_to_tokens(updated.strip(), max_tokens)
+    return summarize
+
+
+def default_summarizer():
+    """
+    The summariser selected by PROMPT_SUMMARIZER.
+    """
+    if PROMPT_SUMMARIZER == "llm":
+        return llm_summarizer()
+    if PROMPT_SUMMARIZER != "extractive":
+        print(f"Unknown PROMPT_SUMMARIZER '{PROMPT_SUMMARIZER}', using extractive")
+    return extractive_summarizer
+
+
+class ConversationWindow:
+    """
+    Per-session history state: the most recent turns are kept verbatim within the
+    history quota, and older turns are folded into a rolling summary exactly once,
+    as they leave the window. Store one instance per chat session. The summariser
+    defaults to the one selected by PROMPT_SUMMARIZER.
+    """
+
+    def __init__(self, summarizer=None):
+        self.summarizer = summarizer or default_summarizer()
+        self.summary = ""
+        self.folded = 0   # messages[:folded] are already in the summary
+
+    def update(self, messages: list, history_tokens: int, summary_tokens: int):
+        """
+        Returns (recent_messages, summary) for the current message list.
+        """
+        if len(messages) < self.folded:   # session was reset
+            self.summary, self.folded = "", 0
+
+        start = len(messages)
+        used = 0
+        while start > self.folded:
+            cost = count_tokens(_format_message(messages[start - 1]))
+            if used + cost > history_tokens and start < len(messages):
+                break
+            used += cost
+            start -= 1
+
+        if start > self.folded:
+            self.summary = self.summarizer(self.summary, messages[self.folded:start], summary_tokens)
+            self.folded = start
+        return messages[start:], self.summary
+
+
+def _fill(items, max_tokens):
+    """
+    Takes items in order until the quota is used; the item that crosses it is truncated.
+    """
+    kept, used = [], 0
+    for item in items:
+        cost = count_tokens(item)
+        if used + cost > max_tokens:
+            remaining = max_tokens - used
+            if remaining > 20:
+                kept.append(truncate_to_tokens(item, remaining))
+            break
+        kept.append(item)
+        used += cost
+    return kept
+
+
+def build_prompt_sections(context_texts, memories, messages, window=None, budget=None):
+    """
+    Assembles the context, memory and history sections under a token budget.
+
+    Returns {"context_text", "memory_text", "recent_history", "prior_history",
+    "token_counts"} where prior_history is the rolling summary plus the recent turns
+    before the current question (what an answer cache may key on) and token_counts has
+    the estimated tokens of each section.
+    """
+    budget = {**DEFAULT_BUDGET, **(budget or {})}
+    window = window or ConversationWindow()
+
+    context_text = "\n\n".join(_fill(context_texts or [], budget["context"]))
+    memory_text = "\n".join(_fill(memories or [], budget["memories"]))
+
+    recent_history = ""
+    prior_history = ""
+    summary = ""
+    if messages:
+        recent, summary = window.update(messages, budget["history"], budget["summary"])
+        lines = []
+        if summary:
+            lines.append(f"EARLIER IN THIS CHAT (summary):\n{summary}\n")
+        lines.append("RECENT CHAT HISTORY (use for 'last topic', 'we discussed' questions in a session, it may be empty if session is refreshed):")
+        lines.extend(truncate_to_tokens(_format_message(msg), budget["history"]) for msg in recent)
+        recent_history = "\n".join(lines) + "\n\n"
+        # the turn being answered is the trailing user message
+        prior = recent[:-1] if recent and recent[-1]["role"] == "user" else recent
+        prior_history = "\n".join([summary] + [_format_message(msg) for msg in prior])
+
+    return {
+        "context_text": context_text,
+        "memory_text": memory_text,
+        "recent_history": recent_history,
+        "prior_history": prior_history,
+        "token_counts": {
+            "context": count_tokens(context_text),
+            "memories": count_tokens(memory_text),
+            "summary": count_tokens(summary),
+            "history": count_tokens(recent_history) - count_tokens(summary),
+        },
+    }
@@ -1,16 +1,44 @@
-from src.llm_gemma import GemmaLLM
 from src.mem0_client import get_user_memories
+from src.prompt_builder import ConversationWindow, build_prompt_sections
+from src.answer_cache import AnswerCache, context_fingerprint
+from src.resources import get_gemma, get_memory_router
 
-gemma = GemmaLLM()
+
+def wants_memories(question: str, question_vector=None) -> bool:
+    """
+    Whether a question may need the user's long-term memories (the shared MemoryRouter;
+    unsure questions follow MEMORY_ROUTER_FALLBACK).
+    """
+    return get_memory_router().is_personal(question, question_vector)
 
 
-def rag_answer(question: str, context_chunks, user_id: str, recent_messages: list = None):
+def rag_answer(
+    question: str,
+    context_chunks,
+    user_id: str,
+    recent_messages: list = None,
+    memories: list = None,
+    stream: bool = False,
+    stats: dict = None,
+    window: ConversationWindow = None,
+    budget: dict = None,
+    answer_cache: AnswerCache = None,
+    question_vector=None,
+):
     """
     Takes a user question + retrieved Qdrant/Web chunks,
     fetches long-term memories from Mem0 for this user,
     adds recent chat history, extracts readable text, and calls the LLM.
     
     recent_messages: list of {"role": "user"/"assistant", "content": str} from session_state
+    memories: already-fetched Mem0 memories (e.g. by RetrievalOrchestrator); fetched here when None
+    stream: return a generator of text deltas instead of the full answer
+    stats: optional dict that receives generation timings ("ttft_s" when streaming, "total_s")
+           and the estimated tokens per prompt section ("prompt_tokens")
+    window: the session's ConversationWindow (keeps the rolling summary between turns)
+    budget: per-section token quotas, overriding prompt_builder.DEFAULT_BUDGET
+    answer_cache / question_vector: reuse an earlier answer to a near-identical question
+           grounded on exactly the same context (stats["answer_cache_hit"] tells which)
     """
 
     def extract_text(chunk):
@@ -29,27 +57,57 @@ def rag_answer(question: str, context_chunks, user_id: str, recent_messages: lis
         # Fallback — force string
         return str(chunk)
 
-    if not context_chunks:
-        context_text = ""
-    else:
-        context_text = "\n\n".join(
-            extract_text(c) for c in context_chunks
+    # fetch user long term memories from Mem0
+    if memories is None:
+        memories = []
+        if wants_memories(question, question_vector):
+            memories = get_user_memories(user_id, question, limit=5)
+
+    # Context, memories and chat history each get a token quota; older turns are
+    # folded into the window's rolling summary so the prompt stays flat in size
+    sections = build_prompt_sections(
+        [extract_text(c) for c in context_chunks or []],
+        memories,
+        recent_messages,
+        window=window,
+        budget=budget,
+    )
+    if stats is not None:
+        stats["prompt_tokens"] = sections["token_counts"]
+
+    # the earlier turns and summary are part of the prompt, so they are part of the key:
+    # "what's my name?" after the user just said it must not reuse the earlier answer.
+    # The current question is left out; question_vector covers it, so paraphrases match
+    fingerprint = None
+    if answer_cache is not None and question_vector is not None:
+        fingerprint = context_fingerprint(context_chunks, memories, sections["prior_history"])
+        cached_answer = answer_cache.lookup(user_id, question_vector, fingerprint)
+        if stats is not None:
+            stats["answer_cache_hit"] = cached_answer is not None
+        if cached_answer is not None:
+            return iter([cached_answer]) if stream else cached_answer
+
+    context_text = sections["context_text"]
+    memory_text = sections["memory_text"]
+    recent_history = sections["recent_history"]
+
+    if stream:
+        deltas = get_gemma().generate_stream(
+            question, context_text, memory_text=memory_text, recent_history=recent_history, stats=stats
         )
+        if fingerprint is None:
+            return deltas
+        return _store_when_done(deltas, answer_cache, user_id, question_vector, fingerprint)
 
-    # fetch user long term memories from Mem0
-    memories = []
-    if any(x in question.lower() for x in ["my", "me", "i ", "remember"]):
-       memories = get_user_memories(user_id, question, limit=5)
-
-    memory_text = "\n".join(memories) if memories else ""
-
-    # Recent chat history (short term memory)
-    recent_history = ""
-    if recent_messages:
-        recent_history = "RECENT CHAT HISTORY (use for 'last topic', 'we discussed' questions in a session, it may be empty if session is refreshed):\n"
-        for msg in recent_messages:   #[-6:]:  # Last 3 turns (6 messages)
-            role = "You: " if msg["role"] == "user" else "Assistant: "
-            recent_history += f"{role}{msg['content']}\n"
-        recent_history += "\n"
-
-    return gemma.generate(question, context_text, memory_text=memory_text, recent_history=recent_history)
+    answer = get_gemma().generate(question, context_text, memory_text=memory_text, recent_history=recent_history, stats=stats)
+    if fingerprint is not None:
+        answer_cache.store(user_id, question_vector, fingerprint, answer)
+    return answer
+
+
+def _store_when_done(deltas, answer_cache, user_id, question_vector, fingerprint):
+    parts = []
+    for delta in deltas:
+        parts.append(delta)
+        yield delta
+    answer_cache.store(user_id, question_vector, fingerprint, "".join(parts))
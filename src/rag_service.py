@@ -0,0 +1,215 @@
+import io
+import os
+
+from pipeline.chunk_pdf import page_count
+from pipeline.reingest import reingest_document
+from qdrant_operations import (
+    config_from_env, delete_document, ensure_collection, get_document, get_qdrant_client, list_user_docs,
+    list_user_documents, search,
+)
+from src.answer_cache import AnswerCache
+from src.embedding_batcher import EmbeddingBatcher, EMBED_BATCH_MAX_SIZE
+from src.ingest_ledger import IngestLedger, file_sha256
+from src.mem0_client import enqueue_user_memories, get_user_memories
+from src.memory_router import MemoryRouter
+from src.prompt_builder import ConversationWindow
+from src.rag_core import rag_answer
+from src.reranker import CrossEncoderReranker, RERANK_MODEL, RERANK_THRESHOLD
+from src.resources import get_embedder, get_tavily_tool
+from src.retrieval_orchestrator import RetrievalOrchestrator
+from src.web_search import CachedWebSearch
+
+
+SCORE_THRESHOLD = 0.35
+
+# retrieval mode -> RetrievalOrchestrator.retrieve(use_pdf, web)
+MODES = {
+    "hybrid": (True, "fallback"),
+    "pdf": (True, "off"),
+    "web": (False, "always"),
+}
+
+
+class RagService:
+    """
+    Ingest / list / delete / search / answer on top of qdrant_operations,
+    EmbeddingManager and rag_core.rag_answer.
+
+    Holds the long-lived pieces (models, clients, caches), so build it once per
+    process: the Streamlit app caches it with st.cache_resource and api.py creates
+    it at worker start-up. Methods are blocking and safe to call from several threads.
+    """
+
+    def __init__(
+        self,
+        embedder,
+        qdrant_client,
+        cfg,
+        web_search,
+        memory_router=None,
+        answer_cache=None,
+        reranker=None,
+        ingest_ledger=None,
+        score_threshold=SCORE_THRESHOLD,
+        extract_workers=1,
+        query_embedder=None,
+    ):
+        self.embedder = embedder
+        # single-question embeddings (e.g. an EmbeddingBatcher shared by concurrent turns);
+        # ingest keeps using `embedder` directly, its batches are already large
+        self.query_embedder = query_embedder or embedder
+        self.qdrant_client = qdrant_client
+        self.cfg = cfg
+        self.web_search = web_search
+        self.memory_router = memory_router
+        self.answer_cache = answer_cache
+        self.reranker = reranker
+        self.ingest_ledger = ingest_ledger
+        self.score_threshold = score_threshold
+        self.extract_workers = extract_workers
+
+    @classmethod
+    def from_env(cls):
+        # the shared process-wide resources; each is created on first use
+        embedder = get_embedder()
+        query_embedder = EmbeddingBatcher(embedder) if EMBED_BATCH_MAX_SIZE > 1 else embedder
+        cfg = config_from_env(embedder.dimension)
+        qdrant_client = get_qdrant_client(cfg)
+        ensure_collection(qdrant_client, cfg)
+
+        reranker = None
+        if RERANK_MODEL:   # optional cross-encoder stage
+            reranker = CrossEncoderReranker()
+            reranker.warm_up()
+
+        return cls(
+            embedder=embedder,
+            qdrant_client=qdrant_client,
+            cfg=cfg,
+            # one cache for every session and tenant; web results do not depend on the user
+            web_search=CachedWebSearch(get_tavily_tool()),
+            memory_router=MemoryRouter(query_embedder),
+            answer_cache=AnswerCache(),
+            reranker=reranker,
+            ingest_ledger=IngestLedger(),
+            extract_workers=int(os.environ.get("PDF_EXTRACT_WORKERS", "1")),
+            query_embedder=query_embedder,
+        )
+
+    def ingest(self, user_id: str, filename: str, data: bytes, progress=None) -> dict:
+        """
+        Stores (or incrementally updates) a PDF. A file whose bytes were already
+        ingested for this user under the same name is skipped ({"skipped": True}).
+        `progress(chunks_done, last_page, total_pages)` is called as batches land.
+        """
+        digest = file_sha256(data)
+        if self.ingest_ledger is not None and self.ingest_ledger.contains(user_id, digest, filename):
+            # the ledger is local to this host; skip only if Qdrant still has the document
+            # (another process may have deleted it, or the collection was recreated)
+            entry = get_document(self.qdrant_client, self.cfg, user_id, filename)
+            if entry and entry.get("chunks"):
+                return {"filename": filename, "skipped": True}
+            self.ingest_ledger.forget_filename(user_id, filename)
+
+        pdf = io.BytesIO(data)
+        pdf.name = filename
+        total_pages = page_count(pdf)
+
+        def report(chunks_done, last_page):
+            if progress is not None:
+                progress(chunks_done, last_page, total_pages)
+
+        # only pages whose text changed since the stored revision are re-embedded
+        summary = reingest_document(
+            self.qdrant_client, self.cfg, self.embedder, user_id, pdf,
+            progress=report, workers=self.extract_workers,
+        )
+        if self.ingest_ledger is not None:
+            self.ingest_ledger.record(user_id, digest, filename, summary["total_chunks"])
+        return {"filename": filename, "skipped": False, "pages": total_pages, **summary}
+
+    def list_docs(self, user_id: str):
+        return list_user_docs(self.qdrant_client, self.cfg, user_id)
+
+    def documents(self, user_id: str):
+        """
+        Registry entries with chunk / page counts, size and ingest time per document.
+        """
+        return list_user_documents(self.qdrant_client, self.cfg, user_id)
+
+    def delete(self, user_id: str, filename: str) -> None:
+        delete_document(self.qdrant_client, self.cfg, user_id, filename)
+        if self.ingest_ledger is not None:
+            self.ingest_ledger.forget_filename(user_id, filename)
+
+    def search(self, user_id: str, question: str, filename: str = None, limit: int = 5, query_vector=None):
+        if query_vector is None:
+            query_vector = self.query_embedder.embed_texts([question])[0]
+        return search(
+            self.qdrant_client, self.cfg, user_id, query_vector,
+            limit=limit, filename=filename, query_text=question,
+        )
+
+    def orchestrator(self, user_id: str) -> RetrievalOrchestrator:
+        return RetrievalOrchestrator(
+            search_fn=lambda query_vector, filename, question: self.search(
+                user_id, question, filename=filename, query_vector=query_vector,
+                # over-fetch when re-ranking; the orchestrator keeps the top 5 after scoring
+                limit=self.reranker.candidates if self.reranker else 5,
+            ),
+            web_search_fn=self.web_search.run,
+            memory_fn=get_user_memories,
+            memory_gate=self.memory_router.is_personal if self.memory_router else None,
+            score_threshold=self.score_threshold,
+            reranker=self.reranker,
+            rerank_threshold=RERANK_THRESHOLD,
+        )
+
+    def answer(
+        self,
+        user_id: str,
+        question: str,
+        messages: list = None,
+        mode: str = "hybrid",
+        filename: str = None,
+        window: ConversationWindow = None,
+        stats: dict = None,
+        session_id: str = None,
+    ):
+        """
+        One chat turn. `messages` is the chat so far, ending with `question`.
+
+        Returns (retrieval, answer_stream): the RetrievalOrchestrator result, and a
+        generator of answer text deltas; `stats` is filled in as the stream is consumed.
+        Once the stream is exhausted the turn is queued for Mem0 (write-behind).
+        """
+        if mode not in MODES:
+            raise ValueError(f"Unknown retrieval mode '{mode}', choose from {sorted(MODES)}")
+        use_pdf, web = MODES[mode]
+
+        query_vector = self.query_embedder.embed_texts([question])[0]
+        # Qdrant, Tavily and Mem0 lookups run concurrently; in hybrid mode the web search
+        # starts speculatively and is dropped when the PDF score clears the threshold
+        retrieval = self.orchestrator(user_id).retrieve(
+            question, query_vector, user_id, use_pdf=use_pdf, web=web, filename=filename,
+        )
+        messages = messages or [{"role": "user", "content": question}]
+        answer_stream = rag_answer(
+            question, retrieval["context"] + retrieval["web_context"], user_id,
+            recent_messages=messages,
+            memories=retrieval["memories"],
+            stream=True, stats=stats,
+            window=window,
+            answer_cache=self.answer_cache, question_vector=query_vector,
+        )
+        return retrieval, self._remember_when_done(answer_stream, user_id, messages, session_id)
+
+    @staticmethod
+    def _remember_when_done(answer_stream, user_id, messages, session_id):
+        parts = []
+        for delta in answer_stream:
+            parts.append(delta)
+            yield delta
+        # Persist new messages to Mem0 in the background (write-behind, de-duplicated)
+        turn = list(messages) + [{"role": "assistant", "content": "".join(parts)}]
+        enqueue_user_memories(user_id, turn, session_id=session_id)
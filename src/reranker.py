@@ -0,0 +1,178 @@
+import os
+import threading
+import time
+
+import numpy as np
+
+from src.model_registry import get_model
+from src.tracing import span
+
+
+RERANK_MODEL = os.environ.get("RERANK_MODEL", "")   # e.g. cross-encoder/ms-marco-MiniLM-L-6-v2; empty = off
+RERANK_BACKEND = os.environ.get("RERANK_BACKEND", "onnx")
+RERANK_CANDIDATES = int(os.environ.get("RERANK_CANDIDATES", "20"))
+RERANK_BUDGET_MS = float(os.environ.get("RERANK_BUDGET_MS", "150"))
+RERANK_THRESHOLD = float(os.environ.get("RERANK_THRESHOLD", "0.5"))
+RERANK_THREADS = int(os.environ.get("RERANK_THREADS", "0")) or None
+# Platt parameters fitted by benchmarks/fit_reranker_calibration.py; 1/0 keep the model's own scale
+RERANK_PLATT_SCALE = float(os.environ.get("RERANK_PLATT_SCALE", "1.0"))
+RERANK_PLATT_BIAS = float(os.environ.get("RERANK_PLATT_BIAS", "0.0"))
+
+
+def _logit(p):
+    p = np.clip(np.asarray(p, dtype=np.float64), 1e-7, 1 - 1e-7)
+    return np.log(p / (1 - p))
+
+
+def _applies_sigmoid(model) -> bool:
+    """
+    Whether CrossEncoder.predict already squashes scores with a sigmoid (the default for
+    single-label models) rather than returning raw logits (identity activation).
+    """
+    activation = getattr(model, "activation_fn", None)                    # sentence-transformers >= 4
+    if activation is None:
+        activation = getattr(model, "default_activation_function", None)  # 3.x
+    if activation is None:
+        return getattr(getattr(model, "config", None), "num_labels", 1) == 1
+    return type(activation).__name__ == "Sigmoid"
+
+
+class CrossEncoderReranker:
+    """
+    Re-scores over-fetched Qdrant candidates with a small cross-encoder on CPU and
+    keeps the top_k.
+
+    All (question, chunk) pairs go through the model in one batch. Scores are mapped
+    to [0, 1] with Platt scaling, sigmoid(scale * logit + bias), so a single threshold
+    (RERANK_THRESHOLD) can decide the web fallback. The logit is the model's raw output,
+    or the inverse of its sigmoid when predict() applies one. Fit scale/bias on labelled
+    pairs with benchmarks/fit_reranker_calibration.py and set RERANK_PLATT_SCALE /
+    RERANK_PLATT_BIAS; the defaults (1, 0) only apply a sigmoid to logit outputs.
+
+    The cost per pair is tracked as a running average. When scoring the candidates
+    would exceed `budget_ms`, the original (ANN) order is returned unchanged.
+    """
+
+    def __init__(
+        self,
+        model_name=RERANK_MODEL,
+        backend=RERANK_BACKEND,
+        candidates=RERANK_CANDIDATES,
+        budget_ms=RERANK_BUDGET_MS,
+        max_length=256,
+        threads=RERANK_THREADS,
+        scale=RERANK_PLATT_SCALE,
+        bias=RERANK_PLATT_BIAS,
+    ):
+        self.model_name = model_name
+        self.candidates = candidates
+        self.budget_ms = budget_ms
+        self.scale = scale
+        self.bias = bias
+        options = {"backend": backend, "max_length": max_length}
+        if threads:
+            options["threads"] = threads
+        self.model = get_model("cross-encoder", model_name, **options)
+        self.outputs_probabilities = _applies_sigmoid(self.model)
+        self._lock = threading.Lock()
+        self._per_pair_ms = None  # unknown until the first batch (or warm_up)
+        self.reranked = 0
+        self.skipped = 0
+
+    def estimate_ms(self, n: int) -> float:
+        with self._lock:
+            if self._per_pair_ms is None:
+                return 0.0
+            return self._per_pair_ms * n
+
+    def _observe(self, n: int, elapsed_ms: float) -> None:
+        with self._lock:
+            per_pair = elapsed_ms / max(n, 1)
+            if self._per_pair_ms is None:
+                self._per_pair_ms = per_pair
+            else:
+                self._per_pair_ms = 0.8 * self._per_pair_ms + 0.2 * per_pair
+
+    def to_logits(self, raw_scores):
+        raw_scores = np.asarray(raw_scores, dtype=np.float64)
+        # undo predict()'s sigmoid only when it applied one; raw logits pass through untouched
+        return _logit(raw_scores) if self.outputs_probabilities else raw_scores
+
+    def calibrate(self, raw_scores):
+        return 1.0 / (1.0 + np.exp(-(self.scale * self.to_logits(raw_scores) + self.bias)))
+
+    def raw_scores(self, question: str, texts):
+        """
+        The model's scores for (question, text) pairs, uncalibrated, in one batch.
+        """
+        if not texts:
+            return np.zeros(0, dtype=np.float32)
+        start = time.perf_counter()
+        with span("rerank", pairs=len(texts)):
+            raw = self.model.predict(
+                [(question, text) for text in texts],
+                batch_size=len(texts),
+                show_progress_bar=False,
+                convert_to_numpy=True,
+            )
+        self._observe(len(texts), (time.perf_counter() - start) * 1000)
+        return raw
+
+    def score(self, question: str, texts):
+        """
+        Calibrated relevance scores for (question, text) pairs, scored in one batch.
+        """
+        return self.calibrate(self.raw_scores(question, texts)).astype(np.float32)
+
+    def warm_up(self) -> float:
+        """
+        Runs one small batch so the first real turn does not pay for lazy
+        initialisation, and seeds the per-pair cost estimate. Returns the seconds spent.
+        """
+        start = time.perf_counter()
+        self.score("warm up", ["warm up"] * 4)
+        return time.perf_counter() - start
+
+    def rerank(self, question: str, chunks, top_k: int = 5, timings=None):
+        """
+        Returns the top_k chunks by cross-encoder score, each with "rerank_score"
+        added (the dense "score" is kept). Falls back to chunks[:top_k] in their
+        original order when the latency budget would be exceeded or scoring fails.
+        """
+        candidates = [c for c in chunks[:self.candidates] if c.get("text")]
+        if len(candidates) <= 1:
+            return list(chunks[:top_k])
+
+        estimate = self.estimate_ms(len(candidates))
+        if estimate > self.budget_ms:
+            self.skipped += 1
+            with self._lock:
+                # let the estimate drift back down so one slow batch does not disable re-ranking for good
+                self._per_pair_ms *= 0.95
+            if timings is not None:
+                timings["rerank_skipped"] = estimate / 1000
+            return list(chunks[:top_k])
+
+        start = time.perf_counter()
+        try:
+            scores = self.score(question, [c["text"] for c in candidates])
+        except Exception as e:
+            print(f"Re-ranking failed: {e}")
+            self.skipped += 1
+            return list(chunks[:top_k])
+        if timings is not None:
+            timings["rerank"] = time.perf_counter() - start
+        self.reranked += 1
+
+        order = np.argsort(-scores, kind="stable")[:top_k]
+        return [{**candidates[i], "rerank_score": float(scores[i])} for i in order]
+
+    def stats(self) -> dict:
+        with self._lock:
+            per_pair = self._per_pair_ms
+        return {
+            "reranked": self.reranked,
+            "skipped": self.skipped,
+            "ms_per_pair": per_pair,
+            "estimated_ms": self.estimate_ms(self.candidates),
+        }
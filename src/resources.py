@@ -0,0 +1,94 @@
+import functools
+import os
+import threading
+import time
+
+from dotenv import load_dotenv
+
+load_dotenv()
+
+_instances = {}
+_locks = {}
+_locks_guard = threading.Lock()
+_init_seconds = {}
+
+
+def resource(fn):
+    """
+    Turns a zero-argument factory into a lazily initialised, process-wide singleton
+    (st.cache_resource semantics, but usable outside Streamlit, e.g. by api.py).
+    Concurrent first callers wait for a single initialisation; a failed one is
+    retried on the next call.
+    """
+    name = fn.__name__
+
+    @functools.wraps(fn)
+    def provider():
+        if name in _instances:
+            return _instances[name]
+        with _locks_guard:
+            lock = _locks.setdefault(name, threading.Lock())
+        with lock:
+            if name not in _instances:
+                start = time.perf_counter()
+                _instances[name] = fn()
+                _init_seconds[name] = time.perf_counter() - start
+        return _instances[name]
+
+    return provider
+
+
+def resource_stats() -> dict:
+    """
+    {provider name: seconds its first call took} for every resource created so far.
+    """
+    return dict(_init_seconds)
+
+
+@resource
+def get_embedder():
+    from src.embedding_cache import EmbeddingCache
+    from src.embeddings import EmbeddingManager
+
+    embedder = EmbeddingManager(cache=EmbeddingCache())
+    embedder.warm_up()
+    return embedder
+
+
+@resource
+def get_gemma():
+    from src.llm_gemma import GemmaLLM
+
+    return GemmaLLM()
+
+
+@resource
+def get_mem0_client():
+    import httpx
+    from mem0 import MemoryClient
+
+    client = MemoryClient(api_key=os.getenv("MEM0_API_KEY"))
+    # the SDK's default timeout is minutes; bound it so an abandoned search frees its thread
+    client.client.timeout = httpx.Timeout(float(os.environ.get("MEM0_TIMEOUT", "10")))
+    return client
+
+
+@resource
+def get_tavily_tool():
+    from src.web_search import TavilySearch
+
+    return TavilySearch(api_key=os.environ.get("TAVILY_API_KEY"))
+
+
+@resource
+def get_memory_router():
+    from src.memory_router import MemoryRouter
+
+    return MemoryRouter(get_embedder())
+
+
+@resource
+def get_rag_service():
+    from src.rag_service import RagService
+
+    return RagService.from_env()
@@ -0,0 +1,163 @@
+import os
+import time
+from concurrent.futures import ThreadPoolExecutor, TimeoutError as FutureTimeout
+
+from src.tracing import submit_in_context
+
+
+DEFAULT_DEADLINES = {
+    "pdf": float(os.environ.get("PDF_SEARCH_DEADLINE", "3")),
+    "web": float(os.environ.get("WEB_SEARCH_DEADLINE", "8")),
+    "memories": float(os.environ.get("MEMORY_SEARCH_DEADLINE", "3")),
+}
+
+# shared by every session; lookups are network-bound, so threads are enough
+_pool = ThreadPoolExecutor(max_workers=int(os.environ.get("RETRIEVAL_WORKERS", "16")))
+
+
+def web_results_to_context(web_results, limit=3):
+    return [
+        {
+            "doc_id": "web",
+            "text": snippet.get("content", ""),
+            "score": 1.0,
+        }
+        for snippet in (web_results or [])[:limit]
+        if isinstance(snippet, dict)
+    ]
+
+
+class RetrievalOrchestrator:
+    """
+    Issues the PDF (Qdrant), web (Tavily) and memory (Mem0) lookups for one turn
+    concurrently instead of one after another.
+
+    - search_fn(query_vector, filename, question) -> list of chunk dicts with "score"
+      (and optionally "exact_match", set by hybrid search)
+    - web_search_fn(question) -> list of Tavily result dicts
+    - memory_fn(user_id, question, limit) -> list of memory strings
+    - memory_gate(question) -> bool, whether the question needs memories at all
+    - reranker: optional src.reranker.CrossEncoderReranker; search_fn should then
+      over-fetch (reranker.candidates) and the top `top_k` re-ranked chunks are kept
+
+    In "fallback" web mode the web search starts speculatively alongside Qdrant and is
+    cancelled (or its result ignored, if already running) when the top PDF score clears
+    `score_threshold` (`rerank_threshold` for re-ranked chunks) or the top chunk exactly
+    matches the question's identifiers. Every source has a deadline measured from the start of the turn;
+    a source that misses it or fails contributes nothing and is listed in "degraded".
+    A missed lookup keeps running until its HTTP client's own timeout (WEB_SEARCH_TIMEOUT,
+    MEM0_TIMEOUT, QDRANT_TIMEOUT); its timings are dropped, never added afterwards.
+    """
+
+    def __init__(
+        self,
+        search_fn,
+        web_search_fn,
+        memory_fn=None,
+        memory_gate=None,
+        score_threshold=0.35,
+        deadlines=None,
+        reranker=None,
+        rerank_threshold=0.5,
+        top_k=5,
+    ):
+        self.search_fn = search_fn
+        self.web_search_fn = web_search_fn
+        self.memory_fn = memory_fn
+        self.memory_gate = memory_gate
+        self.score_threshold = score_threshold
+        self.deadlines = {**DEFAULT_DEADLINES, **(deadlines or {})}
+        self.reranker = reranker
+        self.rerank_threshold = rerank_threshold
+        self.top_k = top_k
+
+    def _timed(self, record, name, fn, *args):
+        # each lookup writes only its own record; retrieve() merges it once the lookup
+        # is collected, so a late worker never touches the timings already returned
+        def run():
+            start = time.perf_counter()
+            try:
+                return fn(*args)
+            finally:
+                record[name] = time.perf_counter() - start
+        # spans recorded by the lookup belong to the caller's turn
+        return submit_in_context(_pool, run), record
+
+    def _collect(self, name, lookup, started, timings, degraded, default):
+        future, record = lookup
+        remaining = max(0.0, self.deadlines[name] - (time.perf_counter() - started))
+        try:
+            result = future.result(timeout=remaining)
+            timings.update(record)
+            return result
+        except FutureTimeout:
+            # a running call can't be cancelled; the HTTP clients' own timeouts end it
+            future.cancel()
+            print(f"{name} lookup missed its {self.deadlines[name]}s deadline")
+        except Exception as e:
+            timings.update(record)
+            print(f"{name} lookup failed: {e}")
+        degraded.append(name)
+        return default
+
+    def _search_pdf(self, record, query_vector, filename, question):
+        start = time.perf_counter()
+        chunks = self.search_fn(query_vector, filename, question)
+        record["pdf_search"] = time.perf_counter() - start
+        if self.reranker is None:
+            return chunks[:self.top_k]
+        return self.reranker.rerank(question, chunks, self.top_k, record)
+
+    def _pdf_is_enough(self, top):
+        if top.get("exact_match", False):
+            return True
+        if "rerank_score" in top:
+            return top["rerank_score"] >= self.rerank_threshold
+        return top["score"] >= self.score_threshold
+
+    def retrieve(self, question, query_vector, user_id, use_pdf=True, web="fallback", filename=None):
+        """
+        web: "off", "fallback" (only when PDF results are missing/weak) or "always".
+
+        Returns {"context", "web_context", "memories", "used_web", "timings", "degraded"};
+        "memories" is empty when the question did not need them.
+        """
+        started = time.perf_counter()
+        timings, degraded = {}, []
+
+        pdf_lookup = None
+        if use_pdf:
+            pdf_record = {}
+            pdf_lookup = self._timed(pdf_record, "pdf", self._search_pdf, pdf_record, query_vector, filename, question)
+        web_lookup = self._timed({}, "web", self.web_search_fn, question) if web != "off" else None
+        memory_lookup = None
+        if self.memory_fn and (self.memory_gate is None or self.memory_gate(question)):
+            memory_lookup = self._timed({}, "memories", self.memory_fn, user_id, question, 5)
+
+        context = self._collect("pdf", pdf_lookup, started, timings, degraded, []) if pdf_lookup else []
+
+        web_context = []
+        used_web = False
+        if web_lookup is not None:
+            pdf_is_enough = web == "fallback" and bool(context) and self._pdf_is_enough(context[0])
+            if pdf_is_enough:
+                web_lookup[0].cancel()
+            else:
+                used_web = True
+                web_context = web_results_to_context(
+                    self._collect("web", web_lookup, started, timings, degraded, [])
+                )
+
+        memories = (
+            self._collect("memories", memory_lookup, started, timings, degraded, []) if memory_lookup else []
+        )
+
+        timings["total"] = time.perf_counter() - started
+        return {
+            "context": context,
+            "web_context": web_context,
+            "memories": memories,
+            "used_web": used_web,
+            "timings": timings,
+            "degraded": degraded,
+        }
@@ -0,0 +1,79 @@
+import re
+import zlib
+from collections import Counter
+from typing import List, Tuple
+
+
+# identifiers such as "AB-1234", "v2.3" or "ISO/IEC" stay one token (their parts are added too)
+_TOKEN = re.compile(r"[A-Za-z0-9]+(?:[-_./][A-Za-z0-9]+)*")
+_SPLIT = re.compile(r"[-_./]")
+
+STOPWORDS = frozenset(
+    "a an and are as at be by can do does for from has have how i in is it its me my of on "
+    "or our so that the their them there these this to was we were what when where which who "
+    "why will with you your".split()
+)
+
+
+def tokenize(text: str) -> List[str]:
+    tokens = []
+    for match in _TOKEN.finditer(text.lower()):
+        token = match.group()
+        if token in STOPWORDS:
+            continue
+        tokens.append(token)
+        parts = _SPLIT.split(token)
+        if len(parts) > 1:
+            tokens.extend(p for p in parts if p and p not in STOPWORDS)
+    return tokens
+
+
+def exact_match_terms(text: str) -> List[str]:
+    """
+    Identifier-like query terms (containing a digit, or an all-caps acronym) that
+    dense embeddings tend to miss.
+    """
+    return [
+        m.group().lower()
+        for m in _TOKEN.finditer(text)
+        if any(ch.isdigit() for ch in m.group()) or (m.group().isupper() and len(m.group()) >= 2)
+    ]
+
+
+def _term_index(token: str) -> int:
+    # stable across processes (unlike hash()); Qdrant sparse indices are uint32
+    return zlib.crc32(token.encode("utf-8")) & 0x7FFFFFFF
+
+
+class BM25SparseEncoder:
+    """
+    Local BM25-style sparse vectors for Qdrant.
+
+    Documents get BM25 term-frequency weights (saturation k1, length normalisation b);
+    queries get weight 1 per distinct term. IDF is applied server-side by creating the
+    sparse vector with modifier=IDF, so no corpus statistics are kept here.
+    """
+
+    def __init__(self, k1: float = 1.2, b: float = 0.75, avg_doc_len: float = 120.0):
+        self.k1 = k1
+        self.b = b
+        self.avg_doc_len = avg_doc_len
+
+    @staticmethod
+    def _to_sparse(weights: Counter) -> Tuple[List[int], List[float]]:
+        merged = Counter()
+        for token, weight in weights.items():
+            merged[_term_index(token)] += weight
+        indices = sorted(merged)
+        return indices, [float(merged[i]) for i in indices]
+
+    def encode_document(self, text: str) -> Tuple[List[int], List[float]]:
+        tokens = tokenize(text)
+        norm = self.k1 * (1 - self.b + self.b * len(tokens) / self.avg_doc_len)
+        weights = Counter()
+        for token, tf in Counter(tokens).items():
+            weights[token] = tf * (self.k1 + 1) / (tf + norm)
+        return self._to_sparse(weights)
+
+    def encode_query(self, text: str) -> Tuple[List[int], List[float]]:
+        return self._to_sparse(Counter({token: 1.0 for token in set(tokenize(text))}))
@@ -0,0 +1,149 @@
+import contextvars
+import functools
+import os
+import threading
+import time
+from contextlib import ExitStack, contextmanager
+
+# Optional exporters: both are used only when their package is installed.
+try:
+    from prometheus_client import Counter, Histogram, start_http_server
+except ImportError:
+    Counter = Histogram = start_http_server = None
+
+try:
+    from opentelemetry import trace as otel_trace
+except ImportError:
+    otel_trace = None
+
+
+METRICS_PORT = int(os.environ.get("METRICS_PORT", "0"))   # 0 = no Prometheus endpoint
+
+_turn = contextvars.ContextVar("trace_turn", default=None)
+_metrics_lock = threading.Lock()
+_metrics = None
+
+
+def _prometheus():
+    """
+    Creates the Prometheus metrics (and starts the /metrics endpoint if METRICS_PORT
+    is set) once per process.
+    """
+    global _metrics
+    if Histogram is None:
+        return None
+    with _metrics_lock:
+        if _metrics is None:
+            _metrics = {
+                "seconds": Histogram("rag_stage_seconds", "Duration of a RAG pipeline stage", ["stage"]),
+                "errors": Counter("rag_stage_errors_total", "Failed RAG pipeline stages", ["stage"]),
+                "cache": Counter("rag_stage_cache_total", "Cache lookups per stage", ["stage", "result"]),
+                "embed_batch_size": Histogram(
+                    "rag_embed_batch_size", "Texts per micro-batched embedding call",
+                    buckets=(1, 2, 4, 8, 16, 32, 64, 128),
+                ),
+                "embed_batch_wait_seconds": Histogram(
+                    "rag_embed_batch_wait_seconds", "Time a query waited for its embedding batch to start",
+                    buckets=(0.0005, 0.001, 0.002, 0.005, 0.01, 0.02, 0.05),
+                ),
+            }
+            if METRICS_PORT:
+                start_http_server(METRICS_PORT)
+                print(f"Prometheus metrics on :{METRICS_PORT}/metrics")
+    return _metrics
+
+
+def observe(metric: str, value: float) -> None:
+    """
+    Records a value in one of the plain (label-less) Prometheus histograms above.
+    """
+    metrics = _prometheus()
+    if metrics is not None:
+        metrics[metric].observe(value)
+
+
+def start_turn(spans: list = None) -> list:
+    """
+    Starts collecting spans for one chat turn in the current context; returns the
+    list the spans are appended to. Pass an existing list to resume a turn in
+    another context (e.g. each step of a streamed response).
+    """
+    spans = [] if spans is None else spans
+    _turn.set(spans)
+    return spans
+
+
+def current_turn():
+    return _turn.get()
+
+
+@contextmanager
+def span(name: str, **attrs):
+    """
+    Times a block as stage `name`. Yields the attribute dict, so the block can add
+    sizes or outcomes, e.g. attrs["cache_hit"] = True.
+
+    Each span is appended to the current turn (if any), observed in the Prometheus
+    histogram and emitted as an OpenTelemetry span.
+    """
+    with ExitStack() as stack:
+        otel_span = None
+        if otel_trace is not None:
+            # current span, so nested stages become its children
+            otel_span = stack.enter_context(otel_trace.get_tracer("gfg_rag").start_as_current_span(name))
+        start = time.perf_counter()
+        try:
+            yield attrs
+        except GeneratorExit:
+            raise   # a streamed block closed early is not a failure
+        except BaseException as e:
+            attrs["error"] = type(e).__name__
+            raise
+        finally:
+            _record(name, time.perf_counter() - start, attrs, otel_span)
+
+
+def _record(name, duration, attrs, otel_span):
+    turn = _turn.get()
+    if turn is not None:
+        turn.append({"stage": name, "ms": duration * 1000, **attrs})
+
+    metrics = _prometheus()
+    if metrics is not None:
+        metrics["seconds"].labels(stage=name).observe(duration)
+        if "error" in attrs:
+            metrics["errors"].labels(stage=name).inc()
+        if "cache_hit" in attrs:
+            metrics["cache"].labels(stage=name, result="hit" if attrs["cache_hit"] else "miss").inc()
+
+    if otel_span is not None:
+        for key, value in attrs.items():
+            if isinstance(value, (bool, int, float, str)):
+                otel_span.set_attribute(key, value)
+
+
+def traced(name: str, result_size=None):
+    """
+    Decorator form of span(). `result_size(result)` is recorded as "results".
+    """
+    def decorator(fn):
+        @functools.wraps(fn)
+        def wrapper(*args, **kwargs):
+            with span(name) as attrs:
+                result = fn(*args, **kwargs)
+                if result_size is not None:
+                    try:
+                        attrs["results"] = result_size(result)
+                    except TypeError:
+                        pass
+                return result
+        return wrapper
+    return decorator
+
+
+def submit_in_context(pool, fn, *args):
+    """
+    pool.submit that carries the current turn over to the worker thread, so spans
+    recorded there land in the same turn.
+    """
+    return pool.submit(contextvars.copy_context().run, fn, *args)
@@ -0,0 +1,146 @@
+import os
+import re
+import threading
+import time
+from collections import OrderedDict
+from concurrent.futures import Future
+
+from src.tracing import span
+
+
+WEB_CACHE_TTL = float(os.environ.get("WEB_CACHE_TTL", "3600"))
+WEB_CACHE_SHORT_TTL = float(os.environ.get("WEB_CACHE_SHORT_TTL", "120"))
+WEB_CACHE_MAX_ENTRIES = int(os.environ.get("WEB_CACHE_MAX_ENTRIES", "1024"))
+# per-request HTTP timeout; keep it near WEB_SEARCH_DEADLINE so a late call frees its thread
+WEB_SEARCH_TIMEOUT = float(os.environ.get("WEB_SEARCH_TIMEOUT", os.environ.get("WEB_SEARCH_DEADLINE", "8")))
+TAVILY_SEARCH_URL = "https://api.tavily.com/search"
+
+_TIME_SENSITIVE = re.compile(r"\b(current|currently|now|latest|today)\b")
+
+
+def normalise_query(query: str) -> str:
+    """
+    Lowercase, drop punctuation and collapse whitespace, so trivially different
+    phrasings ("What's the capital of France?" / "what's the capital of france")
+    share a cache entry.
+    """
+    query = re.sub(r"[^\w\s']", " ", query.lower())
+    return " ".join(query.split())
+
+
+class TavilySearch:
+    """
+    Minimal Tavily search client with a real per-request timeout (the LangChain tool
+    has none, so an abandoned call could hold a retrieval thread indefinitely).
+    run(query) returns [{"url", "content"}, ...] like TavilySearchResults.run and
+    raises on HTTP errors and timeouts.
+    """
+
+    def __init__(self, api_key: str, max_results: int = 5, timeout: float = WEB_SEARCH_TIMEOUT):
+        import requests
+
+        self.api_key = api_key
+        self.max_results = max_results
+        self.timeout = timeout
+        self.session = requests.Session()
+
+    def run(self, query: str):
+        response = self.session.post(
+            TAVILY_SEARCH_URL,
+            json={"query": query, "max_results": self.max_results},
+            headers={"Authorization": f"Bearer {self.api_key}"},
+            timeout=self.timeout,
+        )
+        response.raise_for_status()
+        return [
+            {"url": r.get("url", ""), "content": r.get("content", "")}
+            for r in response.json().get("results", [])
+        ]
+
+
+class CachedWebSearch:
+    """
+    Cache in front of a web search tool (anything with .run(query), e.g. Tavily).
+
+    - entries expire after `ttl` seconds, or `short_ttl` for time-sensitive queries
+    - concurrent identical lookups are coalesced into one call (single flight)
+    - at most `max_entries` results are kept, least recently used evicted first
+    - stats() reports hits / misses / coalesced waits and the hit rate
+
+    Shared across sessions and tenants: web results do not depend on the user.
+    """
+
+    def __init__(self, tool, ttl=WEB_CACHE_TTL, short_ttl=WEB_CACHE_SHORT_TTL, max_entries=WEB_CACHE_MAX_ENTRIES):
+        self.tool = tool
+        self.ttl = ttl
+        self.short_ttl = short_ttl
+        self.max_entries = max_entries
+        self._entries = OrderedDict()   # key -> (expires_at, results)
+        self._in_flight = {}            # key -> Future of the running lookup
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.coalesced = 0
+
+    def ttl_for(self, key: str) -> float:
+        return self.short_ttl if _TIME_SENSITIVE.search(key) else self.ttl
+
+    def run(self, query: str):
+        with span("web.search", query_chars=len(query)) as attrs:
+            results = self._run(query, attrs)
+            if isinstance(results, list):
+                attrs["results"] = len(results)
+            return results
+
+    def _run(self, query: str, attrs: dict):
+        key = normalise_query(query)
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry and entry[0] > time.monotonic():
+                self._entries.move_to_end(key)
+                self.hits += 1
+                attrs["cache_hit"] = True
+                return list(entry[1])
+            future = self._in_flight.get(key)
+            leader = future is None
+            if leader:
+                future = Future()
+                self._in_flight[key] = future
+                self.misses += 1
+            else:
+                self.coalesced += 1
+            attrs["cache_hit"] = not leader   # a coalesced wait costs no Tavily call
+
+        if not leader:
+            results = future.result()
+            return list(results) if isinstance(results, list) else results
+
+        try:
+            results = self.tool.run(query)
+        except Exception as e:
+            with self._lock:
+                self._in_flight.pop(key, None)
+            future.set_exception(e)
+            raise
+
+        with self._lock:
+            # LangChain's Tavily tool returns an error string instead of raising; never cache that
+            if isinstance(results, list):
+                self._entries[key] = (time.monotonic() + self.ttl_for(key), results)
+                self._entries.move_to_end(key)
+                while len(self._entries) > self.max_entries:
+                    self._entries.popitem(last=False)
+            self._in_flight.pop(key, None)
+        future.set_result(results)
+        return list(results) if isinstance(results, list) else results
+
+    def stats(self) -> dict:
+        with self._lock:
+            lookups = self.hits + self.misses + self.coalesced
+            return {
+                "hits": self.hits,
+                "misses": self.misses,
+                "coalesced": self.coalesced,
+                "hit_rate": (self.hits + self.coalesced) / lookups if lookups else 0.0,
+                "entries": len(self._entries),
+            }
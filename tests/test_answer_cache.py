@@ -0,0 +1,51 @@
+import numpy as np
+
+import src.rag_core as rag_core
+from src.answer_cache import AnswerCache
+
+
+class FakeGemma:
+    def __init__(self):
+        self.calls = 0
+
+    def generate(self, question, context_text, memory_text="", recent_history="", stats=None):
+        self.calls += 1
+        return f"answer {self.calls}"
+
+
+CHUNKS = [{"doc_id": "d1", "page": 1, "chunk_index": 0, "text": "The warranty lasts two years.", "score": 0.8}]
+
+
+def ask(cache, question, vector, history=()):
+    messages = list(history) + [{"role": "user", "content": question}]
+    return rag_core.rag_answer(
+        question, CHUNKS, "u1", recent_messages=messages, memories=[],
+        answer_cache=cache, question_vector=vector, stats={},
+    )
+
+
+def test_paraphrased_question_hits_cache(monkeypatch):
+    gemma = FakeGemma()
+    monkeypatch.setattr(rag_core, "get_gemma", lambda: gemma)
+    cache = AnswerCache(threshold=0.95)
+    vector = np.array([1.0, 0.0, 0.0])
+
+    first = ask(cache, "How long is the warranty?", vector)
+    second = ask(cache, "What is the warranty period?", vector + np.array([0.0, 0.05, 0.0]))
+
+    assert second == first
+    assert gemma.calls == 1
+    assert cache.hits == 1
+
+
+def test_different_prior_turns_miss_cache(monkeypatch):
+    gemma = FakeGemma()
+    monkeypatch.setattr(rag_core, "get_gemma", lambda: gemma)
+    cache = AnswerCache(threshold=0.95)
+    vector = np.array([1.0, 0.0, 0.0])
+
+    ask(cache, "What's my name?", vector)
+    history = [{"role": "user", "content": "My name is Ada."}, {"role": "assistant", "content": "Hi Ada."}]
+    ask(cache, "What's my name?", vector, history)
+
+    assert gemma.calls == 2
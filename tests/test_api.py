@@ -0,0 +1,65 @@
+import json
+
+from fastapi.testclient import TestClient
+
+import api
+
+
+class FakeService:
+    def __init__(self, answer_error=None):
+        self.answer_error = answer_error
+        self.deleted = []
+
+    def delete(self, user_id, filename):
+        self.deleted.append((user_id, filename))
+
+    def answer(self, user_id, question, messages=None, mode="hybrid", filename=None,
+               window=None, stats=None, session_id=None):
+        def stream():
+            yield "The answer "
+            if self.answer_error:
+                raise self.answer_error
+            yield "is 42."
+
+        return {"context": [], "web_context": [], "memories": [], "used_web": False}, stream()
+
+
+def client_for(service):
+    # the lifespan (which loads the real models) is not entered without a `with` block
+    api.app.state.service = service
+    api.app.state.windows = api.SessionWindows()
+    return TestClient(api.app)
+
+
+def events(response):
+    return [json.loads(line) for line in response.text.splitlines() if line]
+
+
+def test_delete_filename_with_slash():
+    service = FakeService()
+    client = client_for(service)
+
+    response = client.delete("/users/u1/documents/reports%2F2024%2Fq1.pdf")
+
+    assert response.status_code == 200
+    assert response.json() == {"deleted": "reports/2024/q1.pdf"}
+    assert service.deleted == [("u1", "reports/2024/q1.pdf")]
+
+
+def test_answer_stream_ends_with_done():
+    client = client_for(FakeService())
+
+    response = client.post("/users/u1/answer", json={"question": "What is it?"})
+
+    types = [e["type"] for e in events(response)]
+    assert types == ["retrieval", "delta", "delta", "done"]
+
+
+def test_answer_stream_reports_generation_error():
+    client = client_for(FakeService(answer_error=RuntimeError("model overloaded")))
+
+    response = client.post("/users/u1/answer", json={"question": "What is it?"})
+
+    received = events(response)
+    assert [e["type"] for e in received] == ["retrieval", "delta", "error"]
+    assert received[-1]["detail"] == "model overloaded"
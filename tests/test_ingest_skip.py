@@ -0,0 +1,54 @@
+import hashlib
+import os
+
+import numpy as np
+from qdrant_client import QdrantClient
+
+from qdrant_operations import QdrantConfig, delete_document, ensure_collection
+from src.ingest_ledger import IngestLedger
+from src.rag_service import RagService
+
+PDF = os.path.join(os.path.dirname(os.path.dirname(__file__)), "data", "EJ1172284.pdf")
+
+
+class FakeEmbedder:
+    dimension = 8
+
+    def embed_texts(self, texts):
+        digests = [hashlib.sha256(t.encode("utf-8")).digest()[:self.dimension] for t in texts]
+        return np.array([np.frombuffer(d, dtype=np.uint8) / 255.0 + 0.01 for d in digests], dtype=np.float32)
+
+
+def make_service(tmp_path, client=None):
+    client = client or QdrantClient(":memory:")
+    cfg = QdrantConfig(url=None, api_key=None, collection_name="test_ingest", vector_size=FakeEmbedder.dimension)
+    ensure_collection(client, cfg)
+    ledger = IngestLedger(str(tmp_path / "ledger.json"))
+    return RagService(FakeEmbedder(), client, cfg, web_search=None, ingest_ledger=ledger)
+
+
+def test_second_upload_is_skipped_and_ledger_has_total_chunks(tmp_path):
+    service = make_service(tmp_path)
+    with open(PDF, "rb") as f:
+        data = f.read()
+
+    first = service.ingest("u1", "paper.pdf", data)
+    second = service.ingest("u1", "paper.pdf", data)
+
+    assert not first["skipped"] and first["total_chunks"] > 0
+    assert second["skipped"]
+    assert service.ingest_ledger.get("u1", "paper.pdf")["chunks"] == first["total_chunks"]
+
+
+def test_upload_deleted_elsewhere_is_ingested_again(tmp_path):
+    service = make_service(tmp_path)
+    with open(PDF, "rb") as f:
+        data = f.read()
+    service.ingest("u1", "paper.pdf", data)
+
+    # another process deletes the document; this process's ledger still lists it
+    delete_document(service.qdrant_client, service.cfg, "u1", "paper.pdf")
+    again = service.ingest("u1", "paper.pdf", data)
+
+    assert not again["skipped"]
+    assert again["total_chunks"] > 0
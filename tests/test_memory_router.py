@@ -0,0 +1,44 @@
+import numpy as np
+import pytest
+
+from src.memory_router import MemoryRouter
+
+PERSONAL = ["What is my name?"]
+GENERAL = ["What is the capital of France?"]
+
+# question -> vector; the exemplars sit on the axes, questions in between
+VECTORS = {
+    PERSONAL[0]: [1.0, 0.0],
+    GENERAL[0]: [0.0, 1.0],
+    "Where did I grow up?": [0.9, 0.1],
+    "Tell me about the capital of Peru": [0.1, 0.9],
+    "Remember the capital I mentioned?": [0.5, 0.49],
+}
+
+
+class FakeEmbedder:
+    def embed_texts(self, texts):
+        return np.array([VECTORS[t] for t in texts], dtype=np.float32)
+
+
+def router(**kwargs):
+    return MemoryRouter(FakeEmbedder(), personal_examples=PERSONAL, general_examples=GENERAL, **kwargs)
+
+
+def test_clear_questions_follow_the_margin():
+    r = router(uncertainty=0.05, fallback="never")
+    assert r.decide("Where did I grow up?") == (True, False)
+    assert r.decide("Tell me about the capital of Peru") == (False, False)
+
+
+@pytest.mark.parametrize("fallback, expected", [
+    ("router", True), ("always", True), ("never", False), ("keywords", True),
+])
+def test_unsure_questions_use_the_fallback(fallback, expected):
+    r = router(uncertainty=0.05, fallback=fallback)
+    assert r.decide("Remember the capital I mentioned?") == (expected, True)
+
+
+def test_unknown_fallback_is_rejected():
+    with pytest.raises(ValueError):
+        router(fallback="maybe")
@@ -0,0 +1,52 @@
+import src.prompt_builder as prompt_builder
+from src.prompt_builder import ConversationWindow, extractive_summarizer, llm_summarizer
+
+
+class FakeLLM:
+    def __init__(self, reply=None, error=None):
+        self.reply = reply
+        self.error = error
+        self.calls = []
+
+    def summarize(self, summary, text, max_tokens):
+        self.calls.append(text)
+        if self.error:
+            raise self.error
+        return self.reply
+
+
+def chat(turns):
+    return [
+        {"role": "user" if i % 2 == 0 else "assistant", "content": f"Message number {i}. " + "filler " * 40}
+        for i in range(turns)
+    ]
+
+
+def test_llm_summarizer_writes_the_rolling_summary():
+    llm = FakeLLM(reply="The user sent numbered messages.")
+    window = ConversationWindow(summarizer=llm_summarizer(llm))
+
+    recent, summary = window.update(chat(10), history_tokens=150, summary_tokens=100)
+
+    assert summary == "The user sent numbered messages."
+    assert len(llm.calls) == 1
+    assert "Message number 0." in llm.calls[0]
+    assert len(recent) < 10
+
+
+def test_llm_summarizer_falls_back_to_extractive_on_error():
+    messages = chat(10)
+    window = ConversationWindow(summarizer=llm_summarizer(FakeLLM(error=RuntimeError("quota"))))
+
+    recent, summary = window.update(messages, history_tokens=150, summary_tokens=100)
+
+    folded = messages[:len(messages) - len(recent)]
+    assert summary == extractive_summarizer("", folded, 100)
+
+
+def test_prompt_summarizer_setting_selects_the_default(monkeypatch):
+    monkeypatch.setattr(prompt_builder, "PROMPT_SUMMARIZER", "extractive")
+    assert ConversationWindow().summarizer is extractive_summarizer
+
+    monkeypatch.setattr(prompt_builder, "PROMPT_SUMMARIZER", "llm")
+    assert ConversationWindow().summarizer is not extractive_summarizer